@@ -2,7 +2,10 @@ from fastapi import FastAPI, BackgroundTasks
 from pydantic import BaseModel
 from typing import Literal, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from insights import message_manager
+from insights import message_manager, logger
+from utils.tokenizer import init_tokenizer
+from scrapers.http_client import close_http_client
+from scrapers.parse_pool import close_parse_pool
 
 
 class Request(BaseModel):
@@ -33,6 +36,18 @@ app.add_middleware(
     )
 
 
+@app.on_event("startup")
+def warm_up():
+    # 预热分词词典，避免第一个请求承担加载耗时
+    init_tokenizer(logger=logger)
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    await close_http_client(logger)
+    close_parse_pool(logger)
+
+
 @app.get("/")
 def read_root():
     msg = "Hello, this is Wise Union Backend, version 0.3.1"
@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from scrapers.general_crawler import general_crawler
-from utils.general_utils import extract_urls, compare_phrase_with_list
-from .get_info import get_info, pb, project_dir, logger, info_rewrite
+from scrapers.general_crawler import finish_crawled_article, general_crawler
+from scrapers.feed_discovery import FEED_DISCOVERY, get_feed_discovery
+from scrapers.html_cache import cache_only, get_html_cache
+from scrapers.new_llm_crawler import iter_smart_crawler
+from scrapers.retry_queue import RetryQueue
+from scrapers.url_patterns import get_url_pattern_store
+from utils.general_utils import extract_urls
+from utils.url_index import UrlIndex
+from utils.stages import Stage, run_stages
+from .get_info import get_info_async, pb, project_dir, logger, info_rewrite
+from .insight_index import InsightIndex
 import os
 import json
 from datetime import datetime, timedelta
@@ -22,7 +30,86 @@ extensions = ('.pdf', '.docx', '.xlsx', '.doc', '.ppt', '.pptx', '.xls', '.txt',
 # 默认天数（同时作为 within_days 的默认值）
 expiration_days = 30
 
-existing_urls = {url['url'] for url in pb.read(collection_name='articles', fields=['url']) if url['url']}
+# 已入库文章的 URL 索引（Bloom + SQLite 持久化），启动时从 articles 增量同步；
+# 只在文章写入 articles 成功后（_store_article，线程中）加入，单次 pipeline 内的去重用 queued
+existing_urls = UrlIndex(os.path.join(project_dir, 'url_index.db'), logger)
+existing_urls.sync_from_pb(pb)
+
+# 按域名学习的 URL 模板（详情页 / 列表页 / 非文章），用于列表收割时的路由
+url_patterns = get_url_pattern_store()
+
+# 按 tag 分组、预分词的 insight 索引（首次使用时加载，之后增量维护）
+insight_index = InsightIndex(pb, logger)
+
+
+# 流水线各阶段的并发与队列上限
+crawl_workers = int(os.environ.get('PIPELINE_CRAWL_WORKERS', 4))
+article_workers = int(os.environ.get('PIPELINE_ARTICLE_WORKERS', 2))
+llm_workers = int(os.environ.get('PIPELINE_LLM_WORKERS', 4))
+stage_queue_size = int(os.environ.get('PIPELINE_QUEUE_SIZE', 16))
+
+
+def _dump_cache(file_name: str, item: dict):
+    with open(os.path.join(project_dir, file_name), 'a', encoding='utf-8') as f:
+        json.dump(item, f, ensure_ascii=False, indent=4)
+
+
+def _store_article(result: dict) -> str:
+    article_id = pb.add(collection_name='articles', body=result)
+    if article_id:
+        existing_urls.add(result['url'])
+    else:
+        logger.error('add article failed, writing to cache_file')
+        _dump_cache('cache_articles.json', result)
+    return article_id
+
+
+def _article_exists(url: str) -> bool:
+    """只读缓存重新抽取时，避免同一篇文章重复入库"""
+    escaped = url.replace('\\', '\\\\').replace('"', '\\"')
+    return bool(pb.read(collection_name='articles', fields=['id'], filter=f'url="{escaped}"'))
+
+
+def _store_insights(article_id: str, result: dict, insights: list, within_days: int):
+    """insight 去重合并 + 写库（同步执行，由单 worker 串行调用，保证去重不互相踩踏）"""
+    article_tags = set()
+    insight_index.ensure(within_days)
+
+    for insight in insights:
+        article_tags.add(insight['tag'])
+
+        # >>> 需求：insight 带上 URL 与分类 <<<
+        insight['url'] = result['url']
+        insight['category'] = result.get('category', "")
+        insight['articles'] = [article_id]
+
+        # 用简化的“重叠度”判断是否语义接近
+        similar_insights = insight_index.find_similar(insight['tag'], insight['content'], 0.65, within_days)
+        if similar_insights:
+            to_rewrite = [old_insight['content'] for old_insight in similar_insights] + [insight['content']]
+            new_info_content = info_rewrite(to_rewrite)
+            if not new_info_content:
+                continue
+            insight['content'] = new_info_content
+            # 合并相关文章并删除旧 insight
+            for old_insight in similar_insights:
+                insight['articles'].extend(old_insight['articles'])
+                if not pb.delete(collection_name='insights', id=old_insight['id']):
+                    logger.error('delete insight failed')
+                insight_index.remove(old_insight['id'])
+
+        insight['id'] = pb.add(collection_name='insights', body=insight)
+        if insight['id']:
+            insight_index.add(insight)
+        else:
+            logger.error('add insight failed, writing to cache_file')
+            _dump_cache('cache_insights.json', insight)
+
+    _ = pb.update(collection_name='articles', id=article_id, body={'tag': list(article_tags)})
+    if not _:
+        logger.error(f'update article failed - article_id: {article_id}')
+        result['tag'] = list(article_tags)
+        _dump_cache('cache_articles.json', result)
 
 
 async def pipeline(
@@ -30,47 +117,145 @@ async def pipeline(
     cache: Optional[Dict[str, str]] = None,
     *,
     category: str = "",
-    within_days: int = expiration_days
+    within_days: int = expiration_days,
+    from_cache: bool = False,
+    deep_crawl: bool = False,
+    poll_feeds: bool = False
 ):
     """
     参数：
       - category: 链接的信息分类（字符串）
       - within_days: 仅处理多少天以内发布的内容（数字，默认 30）
+      - from_cache: 只从原始 HTML 缓存（scrapers/html_cache.py）重新抽取，不发任何网络请求；
+        列表页收割出的链接只要在缓存中就会重新处理（不看已见 URL），已入库的文章不会重复写入
+      - deep_crawl: 入口为栏目列表页时做同栏目 BFS 深爬（scrapers/new_llm_crawler.iter_smart_crawler），
+        每抽取出一篇文章就直接交给 article 阶段（BFS 中抓到的详情页不再重复抓取），不等整个栏目爬完；
+        早于 within_days 或已见过的文章不再跟进
+      - poll_feeds: 入口是定时调度的栏目列表页（tasks.py），先查它的 feed；单篇文章 URL、死信重放等不查
+
+    分阶段执行，阶段间为有界队列（背压）：
+      crawl（抓取 + 解析）→ article（时间过滤 + 入库）→ llm（get_info）→ persist（insight 去重 + 写库）
+    阻塞的 LLM / PocketBase 调用放到线程中，不再卡住其它站点的事件循环。
+    暂时性抓取失败（-7：网络 / 超时 / 5xx）的 URL 退避后重新投递到 crawl 阶段，多次失败写入死信表
+    （scrapers/retry_queue.py）；4xx、解码失败、错误页（-4）重试无用，直接丢弃。
+    每个 URL 的判定结果按路径模板累计（scrapers/url_patterns.py）：列表收割时丢弃已知的非文章模板，
+    已知的详情页模板跳过列表页识别。
+    poll_feeds 时入口 URL 先查站点的 RSS / Atom / sitemap（scrapers/feed_discovery.py），有可用 feed 时取其中的新文章，
+    列表页只每 FEED_LIST_RECHECK_HOURS 小时解析一次；没有可用 feed（或站点级 feed 里没有本栏目的新文章）时
+    每轮解析入口列表页。
     """
     if cache is None:
         cache = {}
+    html_cache = get_html_cache() if from_cache else None
+    if from_cache and html_cache is None:
+        logger.warning("html cache is disabled (HTML_CACHE_MAX_MB), can not re-extract from cache")
+        return
 
     # 允许通过参数覆盖/补充 cache 中的字段
     if category:
         cache.setdefault('category', category)
 
-    working_list = {url}
-    while working_list:
-        cur_url = working_list.pop()
-        existing_urls.add(cur_url)
+    # 使用 within_days 动态计算过期时间
+    expiration = datetime.now() - timedelta(days=within_days)
+    expiration_date = expiration.strftime('%Y-%m-%d')
+    queued = {url}
+    feeds = get_feed_discovery() if poll_feeds and FEED_DISCOVERY and not from_cache else None
+
+    def enqueue(links):
+        if from_cache:
+            new_urls = {u for u in links if u not in queued and u in html_cache}
+        else:
+            new_urls = {u for u in links if u not in existing_urls and u not in queued}
+        # 已知的非文章模板（非 HTML）在请求前丢弃
+        junk = {u for u in new_urls if url_patterns.route(u) == 'skip'}
+        if junk:
+            logger.info(f"skip {len(junk)} urls matching learned non-article templates")
+        new_urls -= junk
+        queued.update(new_urls)
+        for u in new_urls:
+            crawl_stage.put_nowait(u)
+
+    async def crawl(cur_url: str):
+        # 不在这里记入 existing_urls：列表页、抓取失败待重试 / 进死信、抽取失败的 URL 都不能在以后的运行中被当成已见
         if any(cur_url.lower().endswith(ext) for ext in extensions):
             logger.info(f"{cur_url} is a file, skip")
-            continue
+            return
         logger.debug(f"start processing {cur_url}")
 
         # get article process
-        flag, result = await general_crawler(cur_url, logger)
+        # 入口列表页每轮都会重复抓取，走条件请求；未变化时返回空集合
+        # 已学到的详情页模板跳过列表页识别，直接抽取正文
+        is_entry = cur_url == url
+        if is_entry and feeds is not None:
+            feed_urls = await feeds.poll(url, logger, within_days)
+            if feed_urls is not None:
+                logger.info(f"got {len(feed_urls)} new urls from feeds of {url}")
+                enqueue(feed_urls)
+                # 按更慢的节奏仍解析列表页，feed 停更或漏发时不会藏住新文章
+                if not feeds.list_recheck_due(url):
+                    return
+                logger.info(f"re-checking list page of {url} alongside its feeds")
+        if is_entry and deep_crawl:
+            # BFS 已抓取并解析过详情页，直接取正文，不再经 crawl 阶段重新请求
+            found = 0
+            async for flag, result in iter_smart_crawler(cur_url, logger, within_days=within_days,
+                                                         is_seen=None if from_cache else existing_urls.__contains__,
+                                                         parse_articles=True):
+                if flag != 11:
+                    await handle(cur_url, flag, result)
+                    continue
+                article_url = result['url']
+                # 入口本身是详情页时产出的就是入口
+                if article_url != cur_url and (article_url in queued
+                                               or (not from_cache and article_url in existing_urls)):
+                    continue
+                queued.add(article_url)
+                found += 1
+                # 与 general_crawler 的文章一致：publish_time 为 YYYYMMDD，带来源前缀与摘要
+                await handle(article_url, flag, finish_crawled_article(result))
+            if found:
+                logger.info(f"deep crawl of {cur_url} found {found} articles")
+            return
+        page_hint = None if is_entry else url_patterns.predict(cur_url)
+        flag, result = await general_crawler(cur_url, logger, conditional=is_entry and not from_cache,
+                                             page_hint='detail' if page_hint == 'detail' else None)
+        await handle(cur_url, flag, result)
+
+    async def handle(cur_url: str, flag: int, result):
         if flag == 1:
+            url_patterns.record(cur_url, 'list')
             logger.info('get new url list, add to work list')
-            new_urls = result - existing_urls
-            working_list.update(new_urls)
-            continue
+            enqueue(result)
+            return
+        elif flag == -3:
+            # 非 HTML（PDF、视频等无后缀链接）：内容问题，不重试
+            url_patterns.record(cur_url, 'junk')
+            logger.info(f"{cur_url} is not an html page, skip")
+            return
+        elif flag == -4:
+            # 4xx、解码失败、错误页、公众号格式不符：重试也不会变，直接丢弃（不计入 junk 模板）
+            logger.info(f"{cur_url} is unavailable, skip")
+            return
+        elif flag == -7:
+            if from_cache:
+                logger.info(f"{cur_url} can not be re-extracted from cache, skip")
+                return
+            # 网络 / 超时 / 5xx：延迟重试，不占用 worker；多次失败后进入死信表
+            retries.schedule(cur_url, reason='fetch failed')
+            return
         elif flag <= 0:
+            # 抽取失败（如 LLM 不可用）不说明模板不是文章，不计入 junk，避免把详情页模板学成丢弃
             logger.error("got article failed, pipeline abort")
-            continue
+            return
+        url_patterns.record(cur_url, 'detail')
+        await article_stage.put((cur_url, result))
 
-        # 使用 within_days 动态计算过期时间
-        expiration = datetime.now() - timedelta(days=within_days)
-        expiration_date = expiration.strftime('%Y-%m-%d')
+    async def store_article(item):
+        cur_url, result = item
         article_date = int(result['publish_time'])  # 预期形如 YYYYMMDD
         if article_date < int(expiration_date.replace('-', '')):
             logger.info(f"publish date is {article_date}, too old (> {within_days} days), skip")
-            continue
+            return
 
         # 写入补充字段
         for k, v in cache.items():
@@ -78,65 +263,40 @@ async def pipeline(
                 result[k] = v
         result.setdefault('category', category or "")
         result.setdefault('url', cur_url)  # 确保文章本身记录 url
+        if from_cache and await asyncio.to_thread(_article_exists, result['url']):
+            logger.debug(f"{result['url']} already stored, skip")
+            return
 
         # get info process
         logger.debug(f"article: {result['title']}")
-        article_id = pb.add(collection_name='articles', body=result)
-        if not article_id:
-            logger.error('add article failed, writing to cache_file')
-            with open(os.path.join(project_dir, 'cache_articles.json'), 'a', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=4)
-            continue
-
-        insights = get_info(f"title: {result['title']}\n\ncontent: {result['content']}")
-        if not insights:
-            continue
-
-        # post process
-        article_tags = set()
-        old_insights = pb.read(
-            collection_name='insights',
-            filter=f"updated>'{expiration_date}'",
-            fields=['id', 'tag', 'content', 'articles']
-        )
+        article_id = await asyncio.to_thread(_store_article, result)
+        if article_id:
+            await llm_stage.put((article_id, result))
 
-        for insight in insights:
-            article_tags.add(insight['tag'])
+    async def extract_info(item):
+        article_id, result = item
+        insights = await get_info_async(f"title: {result['title']}\n\ncontent: {result['content']}")
+        if insights:
+            await persist_stage.put((article_id, result, insights))
 
-            # >>> 需求：insight 带上 URL 与分类 <<<
-            insight['url'] = result.get('url', cur_url)
-            insight['category'] = result.get('category', "")
-            insight['articles'] = [article_id]
+    async def persist(item):
+        article_id, result, insights = item
+        await asyncio.to_thread(_store_insights, article_id, result, insights, within_days)
 
-            old_insight_dict = {i['content']: i for i in old_insights if i['tag'] == insight['tag']}
+    # crawl 阶段会把列表页解析出的新 URL 回写到自身队列，因此不设上限
+    crawl_stage = Stage('crawl', crawl, logger, workers=crawl_workers)
+    article_stage = Stage('article', store_article, logger, workers=article_workers, maxsize=stage_queue_size)
+    llm_stage = Stage('llm', extract_info, logger, workers=llm_workers, maxsize=stage_queue_size)
+    persist_stage = Stage('persist', persist, logger, workers=1, maxsize=stage_queue_size)
+    retries = RetryQueue(crawl_stage, logger, context={'category': category, 'within_days': within_days})
 
-            # 用简化的“重叠度”判断是否语义接近
-            similar_insights = compare_phrase_with_list(insight['content'], list(old_insight_dict.keys()), 0.65)
-            if similar_insights:
-                to_rewrite = similar_insights + [insight['content']]
-                new_info_content = info_rewrite(to_rewrite)
-                if not new_info_content:
-                    continue
-                insight['content'] = new_info_content
-                # 合并相关文章并删除旧 insight
-                for old_insight in similar_insights:
-                    insight['articles'].extend(old_insight_dict[old_insight]['articles'])
-                    if not pb.delete(collection_name='insights', id=old_insight_dict[old_insight]['id']):
-                        logger.error('delete insight failed')
-                    old_insights.remove(old_insight_dict[old_insight])
-
-            insight['id'] = pb.add(collection_name='insights', body=insight)
-            if not insight['id']:
-                logger.error('add insight failed, writing to cache_file')
-                with open(os.path.join(project_dir, 'cache_insights.json'), 'a', encoding='utf-8') as f:
-                    json.dump(insight, f, ensure_ascii=False, indent=4)
-
-        _ = pb.update(collection_name='articles', id=article_id, body={'tag': list(article_tags)})
-        if not _:
-            logger.error(f'update article failed - article_id: {article_id}')
-            result['tag'] = list(article_tags)
-            with open(os.path.join(project_dir, 'cache_articles.json'), 'a', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=4)
+    crawl_stage.put_nowait(url)
+    # 各阶段的 worker 在 run_stages 中创建，继承这里设置的只读缓存标记
+    token = cache_only.set(from_cache)
+    try:
+        await run_stages([crawl_stage, article_stage, llm_stage, persist_stage], logger, label=url)
+    finally:
+        cache_only.reset(token)
 
 
 async def message_manager(_input: dict):
@@ -1,4 +1,4 @@
-from llms.openai_wrapper import openai_llm
+from llms.openai_wrapper import openai_llm, openai_llm_async
 # from llms.siliconflow_wrapper import sfa_llm
 import re
 from utils.general_utils import get_logger_level, is_chinese
@@ -86,7 +86,16 @@ def get_info(article_content: str) -> list[dict]:
     # logger.debug(f'receive new article_content:\n{article_content}')
     result = openai_llm([{'role': 'system', 'content': system_prompt}, {'role': 'user', 'content': article_content}],
                         model=get_info_model, logger=logger, temperature=0.1)
+    return _parse_info(result, article_content)
 
+
+async def get_info_async(article_content: str) -> list[dict]:
+    result = await openai_llm_async([{'role': 'system', 'content': system_prompt}, {'role': 'user', 'content': article_content}],
+                                    model=get_info_model, logger=logger, temperature=0.1)
+    return _parse_info(result, article_content)
+
+
+def _parse_info(result: str, article_content: str) -> list[dict]:
     # results = pattern.findall(result)
     texts = result.split('<tag>')
     texts = [_.strip() for _ in texts if '</tag>' in _.strip()]
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# 按 tag 分组的内存 insight 索引：启动后只全量读取一次，之后随 add/delete 增量更新，
+# 并定期从 PocketBase 增量拉取其它进程（如 backend.py）写入的 insight。
+# 每个 tag 维护一个 SimilarityIndex（预分词 + 倒排索引），去重时只对候选做精确打分。
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from utils.similarity import SimilarityIndex
+
+
+def _to_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    try:
+        return datetime.strptime(str(value)[:19].replace('T', ' '), '%Y-%m-%d %H:%M:%S')
+    except Exception:
+        return datetime.utcnow()
+
+
+def _pb_time(value: datetime) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class InsightIndex:
+    """
+    tag -> {insight_id -> entry}，entry 形如
+    {'id', 'tag', 'content', 'articles', 'updated'}；分词与倒排在 tag 对应的 SimilarityIndex 中
+
+    window_days 取各站点 within_days 的最大值；超出窗口的条目在 evict() 时淘汰。
+    """
+
+    def __init__(self, pb, logger, *, refresh_interval: float = 300):
+        self.pb = pb
+        self.logger = logger
+        self.refresh_interval = refresh_interval
+        self.window_days = 0
+        self._by_tag: Dict[str, Dict[str, dict]] = {}
+        self._engines: Dict[str, SimilarityIndex] = {}
+        self._tag_of: Dict[str, str] = {}
+        self._watermark: Optional[datetime] = None
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+
+    def _make_entry(self, record: dict) -> dict:
+        return {
+            'id': record['id'],
+            'tag': record['tag'],
+            'content': record['content'],
+            'articles': list(record.get('articles') or []),
+            'updated': _to_datetime(record.get('updated')),
+        }
+
+    def _put(self, entry: dict, from_pb: bool = False) -> None:
+        self.remove(entry['id'])
+        self._by_tag.setdefault(entry['tag'], {})[entry['id']] = entry
+        self._engines.setdefault(entry['tag'], SimilarityIndex()).add(entry['id'], entry['content'])
+        self._tag_of[entry['id']] = entry['tag']
+        # 水位只跟随 PocketBase 返回的时间，避免本地时钟导致漏读其它进程的写入
+        if from_pb and (self._watermark is None or entry['updated'] > self._watermark):
+            self._watermark = entry['updated']
+
+    def _load(self, since: datetime) -> int:
+        count = 0
+        for record in self.pb.read_iter(collection_name='insights',
+                                        filter=f"updated>'{_pb_time(since)}'",
+                                        fields=['id', 'tag', 'content', 'articles', 'updated']):
+            if not record.get('content') or not record.get('tag'):
+                continue
+            self._put(self._make_entry(record), from_pb=True)
+            count += 1
+        return count
+
+    def ensure(self, within_days: int) -> None:
+        """保证索引覆盖最近 within_days 天；首次调用或窗口扩大时从 PocketBase 读取，其余时候做增量刷新。"""
+        with self._lock:
+            now = datetime.utcnow()
+            if within_days > self.window_days:
+                since = now - timedelta(days=within_days)
+                count = self._load(since)
+                self.window_days = within_days
+                self._last_refresh = time.monotonic()
+                self.logger.info(f"insight index loaded {count} insights within {within_days} days")
+            elif time.monotonic() - self._last_refresh > self.refresh_interval:
+                since = self._watermark or now - timedelta(days=self.window_days)
+                count = self._load(since)
+                self._last_refresh = time.monotonic()
+                if count:
+                    self.logger.debug(f"insight index refreshed {count} insights")
+            self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            cutoff = datetime.utcnow() - timedelta(days=self.window_days)
+            for entries in list(self._by_tag.values()):
+                for insight_id in [i for i, e in entries.items() if e['updated'] < cutoff]:
+                    self.remove(insight_id)
+
+    def add(self, insight: dict) -> None:
+        with self._lock:
+            record = dict(insight)
+            record.setdefault('updated', datetime.utcnow())
+            self._put(self._make_entry(record))
+
+    def remove(self, insight_id: str) -> None:
+        with self._lock:
+            tag = self._tag_of.pop(insight_id, None)
+            if tag is not None:
+                self._by_tag.get(tag, {}).pop(insight_id, None)
+                self._engines[tag].remove(insight_id)
+
+    def find_similar(self, tag: str, content: str, threshold: float, within_days: int) -> List[dict]:
+        """
+        与 compare_phrase_with_list 相同的判定：|A∩B| / min(|A|,|B|) > threshold，
+        仅在同 tag、且 updated 位于 within_days 窗口内的 insight 中查找。
+        """
+        if not content:
+            return []
+        cutoff = datetime.utcnow() - timedelta(days=within_days)
+        with self._lock:
+            engine = self._engines.get(tag)
+            if engine is None:
+                return []
+            hits = [self._by_tag[tag][i] for i in engine.query(content, threshold)]
+        similar = []
+        seen_contents = set()
+        for entry in hits:
+            if entry['updated'] < cutoff or entry['content'] in seen_contents:
+                continue
+            seen_contents.add(entry['content'])
+            similar.append(entry)
+        return similar
@@ -1,7 +1,10 @@
 import os
-from openai import OpenAI
-from openai import RateLimitError
-import time
+import asyncio
+import random
+import threading
+import weakref
+from openai import AsyncOpenAI
+from openai import RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -14,14 +17,66 @@ token = os.environ.get('LLM_API_KEY', "")
 
 
 
+# 每个模型同时在途的请求数、单次请求超时（秒）、可重试错误的最大重试次数
+llm_concurrency = int(os.environ.get('LLM_CONCURRENCY', 4))
+llm_timeout = float(os.environ.get('LLM_TIMEOUT', 120))
+llm_max_retries = int(os.environ.get('LLM_MAX_RETRIES', 4))
+# 指数退避：base * 2^attempt，上限 cap，再做 full jitter
+backoff_base = 5
+backoff_cap = 60
+
 if not base_url and not token:
     raise ValueError("LLM_API_BASE or LLM_API_KEY must be set")
-elif base_url and not token:
-    client = OpenAI(base_url=base_url)
-elif not base_url and token:
-    client = OpenAI(api_key=token)
-else:
-    client = OpenAI(api_key=token, base_url=base_url)
+client_kwargs = {'max_retries': 0, 'timeout': llm_timeout}
+if base_url:
+    client_kwargs['base_url'] = base_url
+if token:
+    client_kwargs['api_key'] = token
+
+# AsyncOpenAI 的连接池与 Semaphore 都绑定事件循环，因此按 loop 分别缓存
+_async_clients = weakref.WeakKeyDictionary()
+_semaphores = weakref.WeakKeyDictionary()
+# 进程级的按模型限流：同步版本在后台事件循环里执行，与主循环的 asyncio.Semaphore 互不相干，
+# 两边共用这里的名额，LLM_CONCURRENCY 才是整个进程的上限
+_shared_limits = {}
+_shared_limits_lock = threading.Lock()
+
+_retryable_errors = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+def _get_async_client() -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(**client_kwargs)
+        _async_clients[loop] = client
+    return client
+
+
+def _get_semaphore(model: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.setdefault(loop, {})
+    if model not in per_loop:
+        per_loop[model] = asyncio.Semaphore(llm_concurrency)
+    return per_loop[model]
+
+def _get_shared_limit(model: str) -> threading.BoundedSemaphore:
+    with _shared_limits_lock:
+        if model not in _shared_limits:
+            _shared_limits[model] = threading.BoundedSemaphore(llm_concurrency)
+        return _shared_limits[model]
+
+
+async def _acquire_shared(limit: threading.BoundedSemaphore) -> None:
+    """不阻塞事件循环地取得进程级名额；等待中被取消时，线程拿到的名额随即归还。"""
+    if limit.acquire(blocking=False):
+        return
+    waiting = asyncio.get_running_loop().run_in_executor(None, limit.acquire)
+    try:
+        await asyncio.shield(waiting)
+    except asyncio.CancelledError:
+        waiting.add_done_callback(lambda _: limit.release())
+        raise
 
 # 放在 openai_llm 文件顶部或函数内均可
 def _read_usage_total(usage) -> int:
@@ -67,33 +122,77 @@ def log_tokens(model: str, purpose: str, total_tokens: int):
         return None
 
 
-def openai_llm(messages: list, model: str, logger=None, **kwargs) -> str:
+async def openai_llm_async(messages: list, model: str, logger=None, **kwargs) -> str:
+    """
+    异步调用：按模型限流（LLM_CONCURRENCY，与同步版本共用名额），请求超时（LLM_TIMEOUT），
+    对限流/超时/连接/5xx 错误做非阻塞的指数退避重试（带 jitter）。
+    失败时返回空字符串，与同步版本保持一致。
+    """
     if logger:
         logger.debug(f'messages:\n {messages}')
         logger.debug(f'model: {model}')
         logger.debug(f'kwargs:\n {kwargs}')
 
-    try:
-        response = client.chat.completions.create(messages=messages, model=model, **kwargs)
-    except RateLimitError as e:
-        logger.warning(f'{e}\nRetrying in 60 second...')
-        time.sleep(60)
-        response = client.chat.completions.create(messages=messages, model=model, **kwargs)
-        if 'choices' not in response:
-            logger.warning(f'openai_llm warning: {response}')
-            return ""
-    except Exception as e:
+    client = _get_async_client()
+    semaphore = _get_semaphore(model)
+    shared_limit = _get_shared_limit(model)
+    response = None
+    for attempt in range(llm_max_retries + 1):
+        try:
+            # 先过本 loop 的 Semaphore，在线程中等待进程级名额的请求每个 loop 最多 LLM_CONCURRENCY 个
+            async with semaphore:
+                await _acquire_shared(shared_limit)
+                try:
+                    response = await client.chat.completions.create(messages=messages, model=model, **kwargs)
+                finally:
+                    shared_limit.release()
+            break
+        except _retryable_errors as e:
+            if attempt >= llm_max_retries:
+                if logger:
+                    logger.error(f'openai_llm error after {attempt + 1} attempts: {e}')
+                return ''
+            delay = random.uniform(0, min(backoff_cap, backoff_base * 2 ** attempt))
+            if logger:
+                logger.warning(f'{e}\nRetrying in {delay:.1f} second...')
+            # 退避期间不占用并发名额，也不阻塞事件循环
+            await asyncio.sleep(delay)
+        except Exception as e:
+            if logger:
+                logger.error(f'openai_llm error: {e}')
+            return ''
+
+    if not response or not response.choices:
         if logger:
-            logger.error(f'openai_llm error: {e}')
+            logger.warning(f'openai_llm warning: {response}')
         return ''
 
     if logger:
         logger.debug(f'result:\n {response.choices[0]}')
         logger.debug(f'usage:\n {response.usage}')
-    
+
     usage = getattr(response, "usage", None)
     total = _read_usage_total(usage)
-    log_tokens(model=model, purpose="文本摘要/处理", total_tokens=total)
+    await asyncio.to_thread(log_tokens, model=model, purpose="文本摘要/处理", total_tokens=total)
+
+    return response.choices[0].message.content or ''
+
 
+# 同步版本：在独立的后台事件循环里执行异步调用，供尚未迁移的调用方使用
+_background_loop = None
+_background_lock = threading.Lock()
 
-    return response.choices[0].message.content
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name='openai-llm-loop', daemon=True).start()
+    return _background_loop
+
+
+def openai_llm(messages: list, model: str, logger=None, **kwargs) -> str:
+    future = asyncio.run_coroutine_threadsafe(
+        openai_llm_async(messages, model, logger=logger, **kwargs), _get_background_loop())
+    return future.result()
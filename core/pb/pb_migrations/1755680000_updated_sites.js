@@ -0,0 +1,27 @@
+/// <reference path="../pb_data/types.d.ts" />
+migrate((db) => {
+  const dao = new Dao(db)
+  const collection = dao.findCollectionByNameOrId("sma08jpi5rkoxnh")
+
+  // add
+  collection.schema.addField(new SchemaField({
+    "system": false,
+    "id": "d3epcr4w",
+    "name": "deep_crawl",
+    "type": "bool",
+    "required": false,
+    "presentable": false,
+    "unique": false,
+    "options": {}
+  }))
+
+  return dao.saveCollection(collection)
+}, (db) => {
+  const dao = new Dao(db)
+  const collection = dao.findCollectionByNameOrId("sma08jpi5rkoxnh")
+
+  // remove
+  collection.schema.removeField("d3epcr4w")
+
+  return dao.saveCollection(collection)
+})
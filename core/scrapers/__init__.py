@@ -1,5 +1,5 @@
 from .mp_crawler import mp_crawler
-from .new_llm_crawler import smart_crawler
+from .new_llm_crawler import iter_smart_crawler, smart_crawler
 
 
 scraper_map = {'mp.weixin.qq.com': mp_crawler}
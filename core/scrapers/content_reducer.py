@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# LLM 兜底抽取前的正文预选（general_crawler / extract_article_three_fields 共用）：
+#   1) 一次遍历 DOM，统计每个块级容器的文本量、链接文本量与中文标点数
+#      （header/nav/footer/aside 内的文本整体按链接文本计，相当于噪声）
+#   2) 块得分 = (非链接文本 + 标点加权) × (1 - 链接密度)；从 <body> 往下，只要某个最近的块级后代
+#      独占了当前块的大部分得分就继续下钻，停在“正文被拆成几段”的那一层
+#   3) 输出 = 标题（<title> / <h1>）+ 区域外的日期行（发布时间、来源）+ 区域正文，按 token 预算截断
+# 区域过小或停在 <body>（正文抽不出来）时退回全页可见文本，同样按预算截断。
+# 原来整页可见文本超过 29999 字符就直接放弃（flag 0）；现在任何页面都能在预算内交给模型。
+# token 数按字符粗估（CJK 每字 1 个，其余每 4 个字符 1 个），不依赖具体模型的分词器。
+# 各爬虫在主进程调用 record_reduction() 累计节省量（解析子进程只返回数字）；对比见 scripts/bench_content_reducer.py
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, Tag
+
+LLM_TEXT_TOKEN_BUDGET = int(os.environ.get('LLM_TEXT_TOKEN_BUDGET', 6000))
+# 候选区域正文少于这个字符数时认为没找到正文，退回全页文本
+MIN_REGION_CHARS = 200
+# 最近的块级后代得分占当前块的比例达到这个值才下钻
+DOMINANT_SHARE = 0.75
+PUNCT_WEIGHT = 5
+# 区域前面取几行作为上下文
+CONTEXT_LINES = 4
+CONTEXT_LINE_MAX_CHARS = 120
+
+BLOCK_TAGS = frozenset(("body", "main", "article", "section", "div", "td", "form"))
+BOILERPLATE_TAGS = frozenset(("header", "nav", "footer", "aside"))
+SKIP_TAGS = frozenset(("script", "style", "noscript", "template", "head", "title", "meta", "svg", "iframe",
+                       "select", "option", "textarea"))
+PUNCTUATION = "，。！？；、"
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+_DATE_LINE_RE = re.compile(r"(20\d{2}|19\d{2})\s*[年./-]\s*\d{1,2}\s*[月./-]\s*\d{1,2}")
+
+# 主进程累计：调用次数、压缩前后的 token 数、退回全页 / 被预算截断的次数
+reducer_stats: Dict[str, int] = {'calls': 0, 'tokens_before': 0, 'tokens_after': 0, 'full_page': 0, 'truncated': 0}
+
+
+class ReducedText(NamedTuple):
+    text: str
+    tokens_before: int   # 原来会发送的整页可见文本
+    tokens_after: int
+    strategy: str        # 'region' / 'full'
+    truncated: bool
+
+    @property
+    def usage(self) -> Tuple[int, int, str, bool]:
+        """可 pickle 的统计部分，由解析子进程带回主进程交给 record_reduction()。"""
+        return self.tokens_before, self.tokens_after, self.strategy, self.truncated
+
+
+def estimate_tokens(text: str) -> int:
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _is_text(node) -> bool:
+    # Comment / CData / Doctype 等也是 NavigableString 的子类
+    return type(node) is NavigableString
+
+
+class _BlockStats:
+    __slots__ = ('text', 'link', 'punct')
+
+    def __init__(self, text: int, link: int, punct: int):
+        self.text, self.link, self.punct = text, link, punct
+
+    @property
+    def score(self) -> float:
+        if not self.text:
+            return 0.0
+        return (self.text - self.link + PUNCT_WEIGHT * self.punct) * (1 - self.link / self.text)
+
+
+def _measure(root: Tag) -> Dict[int, _BlockStats]:
+    """后序遍历（显式栈，深层嵌套的页面也不会触发递归上限），返回 id(块级元素) → 统计。"""
+    blocks: Dict[int, _BlockStats] = {}
+    # 栈元素：[节点, 子节点迭代器, 是否在链接/噪声区域内, text, link, punct]
+    stack = [[root, iter(root.contents), False, 0, 0, 0]]
+    while stack:
+        frame = stack[-1]
+        child = next(frame[1], None)
+        if child is None:
+            stack.pop()
+            node, _, _, text, link, punct = frame
+            if node.name in BLOCK_TAGS or node is root:
+                blocks[id(node)] = _BlockStats(text, link, punct)
+            if stack:
+                parent = stack[-1]
+                parent[3] += text
+                parent[4] += link
+                parent[5] += punct
+            continue
+        if _is_text(child):
+            s = child.strip()
+            if not s:
+                continue
+            n = len(s)
+            frame[3] += n
+            if frame[2]:
+                frame[4] += n
+            frame[5] += sum(s.count(p) for p in PUNCTUATION)
+        elif isinstance(child, Tag) and child.name not in SKIP_TAGS:
+            noisy = frame[2] or child.name == "a" or child.name in BOILERPLATE_TAGS
+            stack.append([child, iter(child.contents), noisy, 0, 0, 0])
+    return blocks
+
+
+def _nearest_blocks(node: Tag) -> List[Tag]:
+    """node 之下最近的一层块级元素（不穿过块级元素，也不进入不可见标签）。"""
+    found = []
+    stack = [c for c in reversed(node.contents) if isinstance(c, Tag)]
+    while stack:
+        el = stack.pop()
+        if el.name in SKIP_TAGS:
+            continue
+        if el.name in BLOCK_TAGS:
+            found.append(el)
+        else:
+            stack.extend(c for c in reversed(el.contents) if isinstance(c, Tag))
+    return found
+
+
+def _best_region(soup: BeautifulSoup, blocks: Dict[int, _BlockStats]) -> Optional[Tag]:
+    node = soup.body or soup
+    stats = blocks.get(id(node))
+    if stats is None:
+        return None
+    while True:
+        score = stats.score
+        best, best_stats = None, None
+        for child in _nearest_blocks(node):
+            child_stats = blocks.get(id(child))
+            if child_stats and (best_stats is None or child_stats.score > best_stats.score):
+                best, best_stats = child, child_stats
+        if best is None or best_stats.score < score * DOMINANT_SHARE or best_stats.text < MIN_REGION_CHARS:
+            return node
+        node, stats = best, best_stats
+
+
+def _visible_lines(node: Tag) -> List[str]:
+    """node 内的可见文本行（按行 strip、去空行）。"""
+    lines = []
+    stack = list(reversed(node.contents))
+    while stack:
+        el = stack.pop()
+        if _is_text(el):
+            lines.extend(line.strip() for line in el.split("\n"))
+        elif isinstance(el, Tag) and el.name not in SKIP_TAGS:
+            stack.extend(reversed(el.contents))
+    return [line for line in lines if line]
+
+
+def _within_budget(lines: List[str], budget: int) -> Tuple[List[str], bool]:
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            return kept, True
+        kept.append(line)
+        used += cost
+    return kept, False
+
+
+def _lines_before(region: Tag, limit: int) -> List[str]:
+    """紧挨在区域之前的几行短文本（文档顺序），通常是正文容器外的标题、发布时间、来源。"""
+    lines = []
+    for el in region.previous_elements:
+        if len(lines) >= limit:
+            break
+        if not _is_text(el) or not el.strip() or any(p.name in SKIP_TAGS for p in el.parents):
+            continue
+        for line in reversed(el.split("\n")):
+            line = line.strip()
+            if line and len(line) <= CONTEXT_LINE_MAX_CHARS and len(lines) < limit:
+                lines.append(line)
+    return lines[::-1]
+
+
+def _context_lines(soup: BeautifulSoup, region: Tag, all_lines: List[str], region_lines: List[str]) -> List[str]:
+    """区域外的标题与日期上下文；区域前面几行里没有日期时，补上全页第一个区域外的日期行。"""
+    region_set = set(region_lines)
+    context = []
+    for el in (soup.title, soup.find("h1")):
+        title = " ".join(el.get_text(" ").split()) if el is not None else ""
+        if title and len(title) <= CONTEXT_LINE_MAX_CHARS:
+            context.append(title)
+    context.extend(_lines_before(region, CONTEXT_LINES))
+    if not any(_DATE_LINE_RE.search(line) for line in context + region_lines[:CONTEXT_LINES]):
+        date_line = next((line for line in all_lines if len(line) <= CONTEXT_LINE_MAX_CHARS
+                          and line not in region_set and _DATE_LINE_RE.search(line)), None)
+        if date_line:
+            context.append(date_line)
+    # 去重并去掉区域里已有的行
+    seen = set(region_set)
+    return [line for line in context if not (line in seen or seen.add(line))]
+
+
+def reduce_for_llm(soup: BeautifulSoup, budget: int = LLM_TEXT_TOKEN_BUDGET) -> ReducedText:
+    """挑出正文区域并拼上标题/日期上下文，控制在 budget 个 token 内。页面没有可见文本时 text 为空。"""
+    all_lines = _visible_lines(soup)
+    tokens_before = estimate_tokens("\n".join(all_lines))
+    if not all_lines:
+        return ReducedText("", 0, 0, 'full', False)
+
+    root = soup.body or soup
+    region = _best_region(soup, _measure(root))
+    region_lines = _visible_lines(region) if region is not None and region is not root else []
+    if sum(len(line) for line in region_lines) < MIN_REGION_CHARS:
+        lines, truncated = _within_budget(all_lines, budget)
+        strategy = 'full'
+    else:
+        context = _context_lines(soup, region, all_lines, region_lines)
+        body, truncated = _within_budget(region_lines, budget - estimate_tokens("\n".join(context)) - 1)
+        lines = context + [""] + body if context else body
+        strategy = 'region'
+    text = "\n".join(lines)
+    return ReducedText(text, tokens_before, estimate_tokens(text), strategy, truncated)
+
+
+def record_reduction(usage: Tuple[int, int, str, bool], url: str = '', logger=None) -> None:
+    """累计一次压缩的 token 节省量（usage 即 ReducedText.usage）。"""
+    before, after, strategy, truncated = usage
+    reducer_stats['calls'] += 1
+    reducer_stats['tokens_before'] += before
+    reducer_stats['tokens_after'] += after
+    reducer_stats['full_page'] += strategy == 'full'
+    reducer_stats['truncated'] += bool(truncated)
+    if logger:
+        saved = 1 - after / before if before else 0.0
+        logger.debug(f"llm input for {url}: {before} -> {after} tokens ({saved:.0%} saved, {strategy}"
+                     f"{', truncated' if truncated else ''})")
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# 统一的页面解码（general_crawler / new_llm_crawler / mp_crawler 共用）：
+#   1) Content-Type 头的 charset
+#   2) 前 8KB 中的 <meta charset> / http-equiv
+#   3) utf-8（非 utf-8 页面通常在第一个非 ASCII 字节就失败，代价很小）
+#   4) 该域名上次成功使用的编码（CharsetMemory，持久化在 crawler_state.db 的 domain_charsets 表）
+#   5) 只对前 DETECT_SAMPLE_BYTES 字节做编码探测（charset_normalizer，未安装时用 chardet）
+#   6) gb18030 / cp936 / big5，最后 utf-8 容错
+# 每一步都用严格模式解码整页验证，失败才进入下一步；探测只看有限前缀，不再对整页跑 charset_normalizer / chardet。
+# 域名记忆排在声明与 utf-8 之后：gb18030 几乎能“成功”解码任何字节，放在前面会把 utf-8 页面解成乱码。
+# 域名记忆只在主进程读写：解析子进程通过参数拿到记忆的编码，并把实际使用的编码随结果带回。
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils.general_utils import get_project_path
+
+try:
+    from charset_normalizer import from_bytes as cn_from_bytes
+except Exception:
+    cn_from_bytes = None
+
+try:
+    import chardet
+except Exception:
+    chardet = None
+
+DETECT_SAMPLE_BYTES = int(os.environ.get('DECODE_SAMPLE_BYTES', 64 * 1024))
+META_SCAN_BYTES = 8192
+FALLBACK_ENCODINGS = ("gb18030", "cp936", "big5")
+
+_HEADER_CHARSET_RE = re.compile(r"charset=['\"]?([^\s;'\"]+)", re.I)
+_META_CHARSET_RE = re.compile(br"<meta[^>]+charset=['\"]?\s*([a-zA-Z0-9_\-]+)", re.I)
+_META_HTTP_EQUIV_RE = re.compile(
+    br"http-equiv=['\"]?content-type['\"][^>]*content=['\"][^;]+;\s*charset=([a-zA-Z0-9_\-]+)", re.I)
+
+# 各步骤命中次数与累计耗时，便于观察记忆与探测的效果
+decode_stats: Dict[str, float] = {'pages': 0, 'seconds': 0.0}
+
+
+def normalize_encoding(enc: Optional[str]) -> Optional[str]:
+    if not enc:
+        return None
+    e = enc.strip().strip('\'"').lower()
+    # 常见同义词归一
+    if e in {"utf8", "utf-8", "utf_8"}:
+        return "utf-8"
+    if e in {"gbk", "gb2312", "gb-2312", "gb_2312-80", "gb-18030", "gb18030"}:
+        return "gb18030"  # 用最全的 gb18030
+    if e in {"cp936"}:
+        return "cp936"
+    if e in {"big5", "big-5"}:
+        return "big5"
+    return e
+
+
+def _strict(raw: bytes, enc: Optional[str]) -> Optional[str]:
+    if not enc:
+        return None
+    try:
+        return raw.decode(enc)
+    except (UnicodeDecodeError, LookupError):
+        return None
+
+
+def _header_charset(content_type: str) -> Optional[str]:
+    m = _HEADER_CHARSET_RE.search(content_type or '')
+    return normalize_encoding(m.group(1)) if m else None
+
+
+def _meta_charset(raw: bytes) -> Optional[str]:
+    head = raw[:META_SCAN_BYTES]
+    m = _META_CHARSET_RE.search(head) or _META_HTTP_EQUIV_RE.search(head)
+    return normalize_encoding(m.group(1).decode("ascii", "ignore")) if m else None
+
+
+def detect_encoding(raw: bytes, sample_bytes: int = DETECT_SAMPLE_BYTES) -> Optional[str]:
+    """只对前 sample_bytes 字节做编码探测。"""
+    sample = raw[:sample_bytes]
+    if len(raw) > sample_bytes:
+        # 截在最后一个 '<' 之前，避免把多字节字符切断（'<' 不会是 utf-8 / gb18030 / big5 的后续字节），
+        # 否则所有候选编码都会在末尾报错，探测反而更慢、更不准
+        cut = sample.rfind(b'<')
+        if cut > 0:
+            sample = sample[:cut]
+    if cn_from_bytes:
+        try:
+            r = cn_from_bytes(sample).best()
+            if r and r.encoding:
+                return normalize_encoding(r.encoding)
+        except Exception:
+            pass
+    if chardet:
+        try:
+            return normalize_encoding(chardet.detect(sample).get('encoding'))
+        except Exception:
+            pass
+    return None
+
+
+def _record(step: str, started: float) -> None:
+    decode_stats['pages'] += 1
+    decode_stats['seconds'] += time.perf_counter() - started
+    decode_stats[step] = decode_stats.get(step, 0) + 1
+
+
+def decode_html(raw: bytes, content_type: str = '', *, remembered: Optional[str] = None,
+                logger=None) -> Tuple[str, Optional[str], str]:
+    """
+    返回 (text, 实际使用的编码, 命中的步骤)；编码为 None 表示全部失败、按 utf-8 容错解码。
+    remembered: 该域名上次成功使用的编码（CharsetMemory.get）
+    """
+    started = time.perf_counter()
+    if not raw:
+        return "", None, 'empty'
+
+    candidates = (
+        ('header', lambda: _header_charset(content_type)),
+        ('meta', lambda: _meta_charset(raw)),
+        ('utf-8', lambda: 'utf-8'),
+        ('domain', lambda: normalize_encoding(remembered)),
+        ('detect', lambda: detect_encoding(raw)),
+    )
+    tried = set()
+    for step, get_enc in candidates:
+        enc = get_enc()
+        if not enc or enc in tried:
+            continue
+        tried.add(enc)
+        text = _strict(raw, enc)
+        if text is not None:
+            _record(step, started)
+            return text, enc, step
+
+    for enc in FALLBACK_ENCODINGS:
+        if enc in tried:
+            continue
+        text = _strict(raw, enc)
+        if text is not None:
+            if logger:
+                logger.debug(f"decoded with fallback encoding: {enc}")
+            _record('fallback', started)
+            return text, enc, 'fallback'
+
+    # 实在不行，按 utf-8 容错解码（可能错）
+    if logger:
+        logger.warning("decode failed with all candidates; falling back to lossy utf-8 (may be wrong).")
+    _record('lossy', started)
+    return raw.decode("utf-8", errors="replace"), None, 'lossy'
+
+
+def url_domain(url: str) -> str:
+    netloc = urlsplit(url).netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+class CharsetMemory:
+    """按域名记住上次成功解码使用的编码；只在变化时写库。"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS domain_charsets (domain TEXT PRIMARY KEY, encoding TEXT, '
+                          'updated_at REAL)')
+        self.conn.commit()
+        self._cache: Dict[str, str] = dict(self.conn.execute('SELECT domain, encoding FROM domain_charsets'))
+
+    def get(self, url: str) -> Optional[str]:
+        return self._cache.get(url_domain(url))
+
+    def remember(self, url: str, encoding: Optional[str]) -> None:
+        if not encoding:
+            return
+        domain = url_domain(url)
+        if not domain or self._cache.get(domain) == encoding:
+            return
+        with self._lock:
+            self._cache[domain] = encoding
+            self.conn.execute('INSERT OR REPLACE INTO domain_charsets (domain, encoding, updated_at) VALUES (?, ?, ?)',
+                              (domain, encoding, time.time()))
+            self.conn.commit()
+
+
+_memory: Optional[CharsetMemory] = None
+
+
+def get_charset_memory() -> CharsetMemory:
+    global _memory
+    if _memory is None:
+        _memory = CharsetMemory(get_project_path('crawler_state.db'))
+    return _memory
+
+
+def decode_response(response, logger=None) -> str:
+    """主进程中解码 FetchedPage：先试该域名记住的编码，成功后更新记忆。"""
+    memory = get_charset_memory()
+    text, enc, _ = decode_html(response.content or b"", response.headers.get("Content-Type", ""),
+                               remembered=memory.get(response.url), logger=logger)
+    memory.remember(response.url, enc)
+    return text
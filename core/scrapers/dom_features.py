@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# 单次遍历 DOM，收集页面分类与链接收割需要的全部特征：
+#   - 全部 <a href>（带“是否位于排除区域”标记，锚文本按需计算）
+#   - onclick / data-href / data-url / role=link 元素
+#   - 列表类名提示（.pagination / .list 等）
+#   - 全页文本（与 soup.get_text(" ", strip=True) 相同）及其中的日期出现次数
+#   - 标题候选（按选择器顺序 + 文档顺序，与逐个 soup.select 的结果顺序一致）
+#   - meta / <title> / <img>
+# 各分类器读取 DomFeatures，不再各自 find_all / select / find_parent / get_text 遍历整棵树。
+#
+# ExcludedZones：只需要“是否位于导航/页脚等容器内”时，一次遍历把这些容器的全部后代记成 id 集合，
+# 之后每个元素的判断是 O(1)，代替逐元素、逐选择器的 find_parent 祖先扫描。
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, Tag
+
+_ATTR_SELECTOR_RE = re.compile(r"""^\[(?P<attr>[\w-]+)(?P<op>\*?=)['"](?P<value>[^'"]*)['"]\]$""")
+
+
+def compile_simple_selector(selector: str) -> Callable[[Tag], bool]:
+    """
+    把简单 CSS 选择器编译成谓词，支持 "h1"、".cls"、"[attr='v']"、"[attr*='v']" 四种形式
+    （与 soupsieve 一致：多值属性按空格拼接后比较，属性值区分大小写）。
+    """
+    selector = selector.strip()
+    if selector.startswith('.'):
+        cls = selector[1:]
+        return lambda tag: cls in _classes(tag)
+    m = _ATTR_SELECTOR_RE.match(selector)
+    if m:
+        attr, op, value = m.group('attr'), m.group('op'), m.group('value')
+        if op == '=':
+            return lambda tag: _attr_str(tag, attr) == value
+        if not value:
+            return lambda tag: False  # CSS 规定 [attr*=''] 不匹配任何元素
+        return lambda tag: value in (_attr_str(tag, attr) or '')
+    if re.fullmatch(r"[\w-]+", selector):
+        name = selector.lower()
+        return lambda tag: tag.name == name
+    raise ValueError(f"unsupported selector: {selector}")
+
+
+def _classes(tag: Tag) -> List[str]:
+    cls = tag.attrs.get('class')
+    if not cls:
+        return []
+    return cls.split() if isinstance(cls, str) else cls
+
+
+def _attr_str(tag: Tag, attr: str) -> Optional[str]:
+    value = tag.attrs.get(attr)
+    if isinstance(value, (list, tuple)):
+        return ' '.join(value)
+    return value
+
+
+class NodeRef:
+    """特征记录中的一个元素；文本在首次访问时才计算。"""
+    __slots__ = ('el', 'excluded', '_text', '_raw_text')
+
+    def __init__(self, el: Tag, excluded: bool):
+        self.el = el
+        self.excluded = excluded
+        self._text = None
+        self._raw_text = None
+
+    @property
+    def text(self) -> str:
+        """同 el.get_text(" ", strip=True)"""
+        if self._text is None:
+            self._text = self.el.get_text(" ", strip=True)
+        return self._text
+
+    @property
+    def raw_text(self) -> str:
+        """同 el.get_text()"""
+        if self._raw_text is None:
+            self._raw_text = self.el.get_text()
+        return self._raw_text
+
+
+class DomFeatures:
+    def __init__(self):
+        self.anchors: List[NodeRef] = []
+        self.js_targets: List[NodeRef] = []
+        self.title_candidates: List[NodeRef] = []
+        self.list_hint = False
+        self.metas: Dict[Tuple[str, str], Tag] = {}
+        self.title_tag: Optional[Tag] = None
+        self.images: List[Optional[str]] = []
+        self.strings: List[str] = []
+        self.elements = 0
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        """同 soup.get_text(" ", strip=True)"""
+        if self._text is None:
+            self._text = " ".join(self.strings)
+        return self._text
+
+    @property
+    def text_length(self) -> int:
+        return len(self.text)
+
+    def date_count(self, pattern: re.Pattern, limit: int = 100000) -> int:
+        return len(pattern.findall(self.text[:limit]))
+
+    def meta(self, attr: str, value: str) -> Optional[Tag]:
+        """同 soup.find("meta", {attr: value})"""
+        return self.metas.get((attr, value))
+
+
+class ExcludedZones:
+    """
+    排除区域标记：names 中任一标签名的元素，其全部后代都在区域内
+    （与 any(el.find_parent(name) for name in names) 结果一致：只看严格祖先，容器本身不算）。
+    以 id() 记录，只对构建时的那棵树有效。
+    """
+
+    def __init__(self, soup: BeautifulSoup, names: Iterable[str]):
+        self.names = frozenset(names)
+        self._ids = set()
+        stack = [(iter(soup.contents), False)]
+        while stack:
+            children, excluded = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                continue
+            if excluded:
+                self._ids.add(id(node))
+            if isinstance(node, Tag) and node.contents:
+                stack.append((iter(node.contents), excluded or node.name in self.names))
+
+    def __contains__(self, el) -> bool:
+        return id(el) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def excluded_zones(soup: BeautifulSoup, names: Iterable[str]) -> ExcludedZones:
+    """同一棵树上多次调用只构建一次（缓存在 soup 上）。"""
+    # 直接读 __dict__：Tag.__getattr__ 会把未知属性当作 find(name)
+    zones = soup.__dict__.get('_excluded_zones')
+    if zones is None or zones.names != frozenset(names):
+        zones = ExcludedZones(soup, names)
+        soup.__dict__['_excluded_zones'] = zones
+    return zones
+
+
+def extract_dom_features(soup: BeautifulSoup, *, exclude_ancestors: Iterable[str] = (),
+                         list_hints: Iterable[str] = (), title_selectors: Iterable[str] = ()) -> DomFeatures:
+    """
+    exclude_ancestors: 按标签名匹配的排除容器（与 el.find_parent(name) 语义一致：只看严格祖先）
+    list_hints: 列表页提示的类选择器（".pagination" 等）
+    title_selectors: 标题候选选择器，结果顺序与依次 soup.select(sel) 拼接相同
+    """
+    exclude_names = frozenset(exclude_ancestors)
+    hint_classes = frozenset(sel[1:] for sel in list_hints if sel.startswith('.'))
+    title_preds = [compile_simple_selector(sel) for sel in title_selectors]
+    string_types = getattr(soup, 'interesting_string_types', NavigableString)
+    if isinstance(string_types, type):
+        string_types = {string_types}
+
+    features = DomFeatures()
+    title_hits = []
+    position = 0
+    stack = [(iter(soup.contents), False)]
+    while stack:
+        children, excluded = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            continue
+
+        if not isinstance(node, Tag):
+            if type(node) in string_types:
+                s = node.strip()
+                if s:
+                    features.strings.append(s)
+            continue
+
+        position += 1
+        name = node.name
+        attrs = node.attrs
+
+        if name == 'a' and 'href' in attrs:
+            features.anchors.append(NodeRef(node, excluded))
+        if 'onclick' in attrs or 'data-href' in attrs or 'data-url' in attrs or attrs.get('role') == 'link':
+            features.js_targets.append(NodeRef(node, excluded))
+        if hint_classes and not features.list_hint and hint_classes.intersection(_classes(node)):
+            features.list_hint = True
+        for idx, pred in enumerate(title_preds):
+            if pred(node):
+                title_hits.append((idx, position, NodeRef(node, excluded)))
+        if name == 'meta':
+            for key in ('property', 'name'):
+                value = attrs.get(key)
+                if isinstance(value, str):
+                    features.metas.setdefault((key, value), node)
+        elif name == 'title' and features.title_tag is None:
+            features.title_tag = node
+        elif name == 'img':
+            features.images.append(attrs.get('src'))
+
+        stack.append((iter(node.contents), excluded or name in exclude_names))
+
+    features.elements = position
+    title_hits.sort(key=lambda hit: (hit[0], hit[1]))
+    features.title_candidates = [hit[2] for hit in title_hits]
+    return features
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# 按域名统计各正文抽取阶段的效果（crawler_state.db 的 extractor_stats 表）：
+#   阶段：meta（JSON-LD / OG）、gne、rules（规则兜底）、llm
+#   每次运行一个阶段记一次 attempts 与耗时；它提供的字段被采纳（title / publish_time / content 任一）
+#   记一次 successes，并按字段累计由它采纳的次数
+# 用法：
+#   - extract_article_three_fields 按 order() 给出的顺序跑 meta / gne / rules，LLM 始终最后
+#   - general_crawler 的 parse_page 在 skip() 为真的域名上不跑 GNE，直接进入列表识别 / LLM 兜底
+# 一个阶段样本足够（>= EXTRACTOR_MIN_SAMPLES）后才参与排序；从未成功过的阶段被跳过，
+# 但保留 EXTRACTOR_EXPLORE 比例的探索，站点改版后能重新学到。
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from utils.general_utils import get_project_path
+from .decoder import url_domain
+
+EXTRACTOR_MIN_SAMPLES = int(os.environ.get('EXTRACTOR_MIN_SAMPLES', 10))
+# 被判定为无效的阶段仍有这个比例会被尝试
+EXTRACTOR_EXPLORE = float(os.environ.get('EXTRACTOR_EXPLORE', 0.05))
+
+STAGES = ('meta', 'gne', 'rules', 'llm')
+FIELDS = ('title', 'publish_time', 'content')
+# 表中各计数列：attempts, successes, 再按 FIELDS 各一列
+_COLUMNS = ('attempts', 'successes') + FIELDS
+
+
+class ExtractorStats:
+    def __init__(self, path: str, *, min_samples: int = EXTRACTOR_MIN_SAMPLES, explore: float = EXTRACTOR_EXPLORE):
+        self.min_samples = max(1, min_samples)
+        self.explore = explore
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS extractor_stats ('
+            'domain TEXT, stage TEXT, attempts INTEGER DEFAULT 0, successes INTEGER DEFAULT 0, '
+            'title INTEGER DEFAULT 0, publish_time INTEGER DEFAULT 0, content INTEGER DEFAULT 0, '
+            'seconds REAL DEFAULT 0, updated_at REAL, PRIMARY KEY (domain, stage))'
+        )
+        self.conn.commit()
+        # 域名 → {阶段: [attempts, successes, title, publish_time, content, seconds]}，按域名首次访问时从库中加载
+        self._domains: Dict[str, Dict[str, List[float]]] = {}
+        self.stats = {'recorded': 0, 'skipped': 0, 'explored': 0, 'reordered': 0}
+
+    def _counts(self, domain: str) -> Dict[str, List[float]]:
+        stages = self._domains.get(domain)
+        if stages is None:
+            rows = self.conn.execute(
+                f'SELECT stage, {", ".join(_COLUMNS)}, seconds FROM extractor_stats WHERE domain=?',
+                (domain,)).fetchall()
+            stages = {row[0]: list(row[1:]) for row in rows}
+            self._domains[domain] = stages
+        return stages
+
+    def record(self, url: str, stage: str, fields: Iterable[str], seconds: float) -> None:
+        """记录一次阶段运行；fields 为该阶段提供且被采纳的字段（空表示没有贡献）。"""
+        domain = url_domain(url)
+        if not domain or stage not in STAGES:
+            return
+        fields = set(fields)
+        taken = [1 if f in fields else 0 for f in FIELDS]
+        success = 1 if any(taken) else 0
+        with self._lock:
+            counts = self._counts(domain).setdefault(stage, [0] * (len(_COLUMNS) + 1))
+            for i, inc in enumerate([1, success] + taken):
+                counts[i] += inc
+            counts[-1] += seconds
+            self.conn.execute(
+                f'INSERT INTO extractor_stats (domain, stage, {", ".join(_COLUMNS)}, seconds, updated_at) '
+                f'VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?) ON CONFLICT(domain, stage) DO UPDATE SET '
+                + ', '.join(f'{c}={c}+excluded.{c}' for c in _COLUMNS + ('seconds',))
+                + ', updated_at=excluded.updated_at',
+                (domain, stage, success, *taken, seconds, time.time()))
+            self.conn.commit()
+            self.stats['recorded'] += 1
+
+    def _learned(self, domain: str, stage: str) -> Optional[List[float]]:
+        counts = self._counts(domain).get(stage)
+        return counts if counts and counts[0] >= self.min_samples else None
+
+    def skip(self, url: str, stage: str) -> bool:
+        """该域名上这个阶段样本足够且从未成功过时返回 True（按 explore 比例放行少量用于重新学习）。"""
+        with self._lock:
+            counts = self._learned(url_domain(url), stage)
+        if counts is None or counts[1] > 0:
+            return False
+        if random.random() < self.explore:
+            self.stats['explored'] += 1
+            return False
+        self.stats['skipped'] += 1
+        return True
+
+    def order(self, url: str, stages: Sequence[str]) -> List[str]:
+        """
+        stages 的自适应顺序：样本足够的阶段按“每次运行平均被采纳的字段数”从高到低（相同时耗时短的在前）
+        重排到它们原来占的位置上，样本不足的阶段保持原位；skip() 为真的阶段去掉。
+        """
+        domain = url_domain(url)
+        with self._lock:
+            learned = {s: self._learned(domain, s) for s in stages}
+        learned = {s: c for s, c in learned.items() if c is not None}
+        ranked = sorted(learned, key=lambda s: (-sum(learned[s][2:5]) / learned[s][0],
+                                                learned[s][5] / learned[s][0]))
+        ranked_iter = iter(ranked)
+        ordered = [next(ranked_iter) if s in learned else s for s in stages]
+        if ordered != list(stages):
+            self.stats['reordered'] += 1
+        return [s for s in ordered if not self.skip(url, s)]
+
+    def domain_stats(self, domain: str) -> Dict[str, Dict[str, float]]:
+        """某个域名各阶段的统计：运行次数、成功率、各字段采纳次数、平均耗时（调试用）。"""
+        domain = domain.lower()
+        with self._lock:
+            counts = dict(self._counts(domain[4:] if domain.startswith('www.') else domain))
+        out = {}
+        for stage in STAGES:
+            c = counts.get(stage)
+            if not c:
+                continue
+            row = dict(zip(_COLUMNS, c))
+            row['success_rate'] = c[1] / c[0] if c[0] else 0.0
+            row['avg_ms'] = c[5] * 1000 / c[0] if c[0] else 0.0
+            out[stage] = row
+        return out
+
+
+_store: Optional[ExtractorStats] = None
+
+
+def get_extractor_stats() -> ExtractorStats:
+    global _store
+    if _store is None:
+        _store = ExtractorStats(get_project_path('crawler_state.db'))
+    return _store
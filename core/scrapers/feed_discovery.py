@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+# 站点的 feed / sitemap 发现与增量轮询（pipeline 中先于列表页解析）：
+#   发现（每个站点入口 URL 每 FEED_REDISCOVER_DAYS 天一次，结果存 crawler_state.db 的 site_feeds 表）：
+#     1) 入口页上的 <link rel="alternate" type="application/rss+xml|atom+xml">（只属于这个栏目，优先使用）
+#     2) robots.txt 中的 Sitemap: 行，以及 /sitemap.xml、/sitemap_index.xml
+#     3) 以上都没有时，探测常见 feed 路径（/feed、/rss.xml ...）
+#   轮询（每轮）：对选中的 feed 发条件请求（ETag / Last-Modified，复用 validators 表），304 即没有新文章；
+#     条目连同 lastmod / pubDate 存在 feed_entries 表，只返回新出现且不早于 within_days 的文章 URL。
+#     sitemap 索引只展开 lastmod 有变化的子 sitemap。
+# 所有 feed 都只保留与入口同栏目的 URL（new_llm_crawler._is_same_column）：入口页 <link rel=alternate>
+# 也常是模板里的全站 RSS；发现时同栏目条目占比不足 FEED_MIN_COLUMN_SHARE 的不采用。
+# 没有可用 feed、本轮 feed 全部请求失败、或 feed 的新条目经过滤后没有本栏目的文章时 poll() 返回 None，
+# 由调用方回落到列表页解析；feed 可用时调用方仍每 FEED_LIST_RECHECK_HOURS 小时解析一次列表页
+# （list_recheck_due()，记录在 feed_list_checks 表），feed 停更或漏发时不会藏住列表页上的新文章。
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from utils.general_utils import get_project_path
+from .decoder import decode_response
+from .html_parser import make_soup
+from .http_client import ContentRejected, fetch_page, get_crawler_client
+from .new_llm_crawler import _canonicalize, _is_same_column
+from .validators import get_validator_store
+
+FEED_DISCOVERY = os.environ.get('FEED_DISCOVERY', '1').lower() not in ('0', 'false', 'no')
+FEED_REDISCOVER_DAYS = float(os.environ.get('FEED_REDISCOVER_DAYS', 7))
+FEED_MAX_BYTES = int(os.environ.get('FEED_MAX_BYTES', 10 * 1024 * 1024))
+# 每轮最多展开的子 sitemap 数（按 lastmod 从新到旧）
+FEED_MAX_CHILD_SITEMAPS = 3
+FEED_LIST_RECHECK_HOURS = float(os.environ.get('FEED_LIST_RECHECK_HOURS', 24))
+# sitemap 中带 lastmod 的条目少于这个比例时无法按日期增量，不作为 feed 使用
+SITEMAP_MIN_DATED = 0.5
+# feed 中与入口同栏目的条目少于这个比例时不采用（全站 feed / sitemap，轮询它几乎拿不到本栏目的文章）
+FEED_MIN_COLUMN_SHARE = 0.1
+
+COMMON_FEED_PATHS = ('/feed', '/rss', '/rss.xml', '/feed.xml', '/atom.xml', '/index.xml')
+FEED_LINK_TYPES = ('application/rss+xml', 'application/atom+xml')
+# 发现结果按优先级分层，轮询时只用最高一层：栏目自己的 feed > 站点 sitemap > 常见路径
+TIERS = ('page', 'sitemap', 'common')
+
+_DATE_RE = re.compile(r"(20\d{2})-?(\d{2})-?(\d{2})")
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _feed_date(text: Optional[str]) -> Optional[str]:
+    """lastmod / pubDate / updated → YYYYMMDD；ISO 8601 与 RFC 822 两种写法。"""
+    if not text:
+        return None
+    text = text.strip()
+    m = _DATE_RE.search(text)
+    if m:
+        try:
+            return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3))).strftime('%Y%m%d')
+        except ValueError:
+            return None
+    try:
+        return parsedate_to_datetime(text).strftime('%Y%m%d')
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1].lower()
+
+
+def _child_text(el: ET.Element, *names: str) -> Optional[str]:
+    for child in el:
+        if _local(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def parse_feed(content: bytes) -> Optional[Tuple[str, List[Tuple[str, Optional[str]]]]]:
+    """
+    解析 RSS / Atom / sitemap / sitemap 索引，返回 (kind, [(url, YYYYMMDD 或 None), ...])；
+    kind 为 rss / atom / sitemap / sitemapindex，不是 feed（如软 404 返回的 HTML）时返回 None。
+    """
+    if content[:2] == b'\x1f\x8b':
+        try:
+            content = gzip.decompress(content)
+        except (OSError, EOFError):
+            return None
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        try:
+            text = content.decode('utf-8', errors='replace')
+            root = ET.fromstring(_INVALID_XML_CHARS.sub('', text).encode('utf-8'))
+        except ET.ParseError:
+            return None
+
+    kind = _local(root.tag)
+    entries = []
+    if kind in ('urlset', 'sitemapindex'):
+        item_tag = 'url' if kind == 'urlset' else 'sitemap'
+        for item in root:
+            if _local(item.tag) != item_tag:
+                continue
+            loc = _child_text(item, 'loc')
+            if loc:
+                entries.append((loc, _feed_date(_child_text(item, 'lastmod'))))
+        return ('sitemap' if kind == 'urlset' else 'sitemapindex'), entries
+
+    if kind in ('rss', 'rdf'):
+        for item in root.iter():
+            if _local(item.tag) != 'item':
+                continue
+            link = _child_text(item, 'link')
+            if not link:
+                guid = _child_text(item, 'guid')
+                link = guid if guid and guid.startswith(('http://', 'https://')) else None
+            if link:
+                entries.append((link, _feed_date(_child_text(item, 'pubdate', 'date', 'updated'))))
+        return 'rss', entries
+
+    if kind == 'feed':
+        for item in root:
+            if _local(item.tag) != 'entry':
+                continue
+            link = None
+            for child in item:
+                if _local(child.tag) == 'link' and child.get('href') and child.get('rel', 'alternate') == 'alternate':
+                    link = child.get('href')
+                    break
+            if link:
+                entries.append((link, _feed_date(_child_text(item, 'published', 'updated'))))
+        return 'atom', entries
+    return None
+
+
+class FeedStore:
+    """site_feeds：站点入口 → 发现到的 feed；feed_entries：feed → 条目 URL 与 lastmod / pubDate。"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS site_feeds (site TEXT PRIMARY KEY, feeds TEXT, '
+                          'discovered_at REAL)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS feed_entries (feed TEXT, url TEXT, lastmod TEXT, '
+                          'seen_at REAL, PRIMARY KEY (feed, url))')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS feed_list_checks (site TEXT PRIMARY KEY, checked_at REAL)')
+        self.conn.commit()
+
+    def get_site(self, site: str) -> Optional[Tuple[List[Dict], float]]:
+        with self._lock:
+            row = self.conn.execute('SELECT feeds, discovered_at FROM site_feeds WHERE site=?', (site,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def save_site(self, site: str, feeds: List[Dict]) -> None:
+        with self._lock:
+            self.conn.execute('INSERT OR REPLACE INTO site_feeds (site, feeds, discovered_at) VALUES (?, ?, ?)',
+                              (site, json.dumps(feeds, ensure_ascii=False), time.time()))
+            self.conn.commit()
+
+    def entries(self, feed: str) -> Dict[str, Optional[str]]:
+        with self._lock:
+            return dict(self.conn.execute('SELECT url, lastmod FROM feed_entries WHERE feed=?', (feed,)))
+
+    def save_entries(self, feed: str, entries: List[Tuple[str, Optional[str]]]) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.executemany('INSERT OR REPLACE INTO feed_entries (feed, url, lastmod, seen_at) '
+                                  'VALUES (?, ?, ?, ?)', [(feed, url, lastmod, now) for url, lastmod in entries])
+            self.conn.commit()
+
+    def claim_list_check(self, site: str, interval: float) -> bool:
+        """距上次列表页解析已超过 interval 秒时记下本次并返回 True。"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute('SELECT checked_at FROM feed_list_checks WHERE site=?', (site,)).fetchone()
+            if row and now - row[0] < interval:
+                return False
+            self.conn.execute('INSERT OR REPLACE INTO feed_list_checks (site, checked_at) VALUES (?, ?)', (site, now))
+            self.conn.commit()
+        return True
+
+
+class FeedDiscovery:
+    def __init__(self, store: FeedStore):
+        self.store = store
+        self.stats = {'discovered': 0, 'polled': 0, 'not_modified': 0, 'new_urls': 0, 'fallbacks': 0,
+                      'list_rechecks': 0}
+
+    # -------------------- 请求 --------------------
+    async def _get_feed(self, url: str, logger, conditional: bool = False):
+        """返回 (kind, entries)；304 返回 ('not_modified', [])；请求失败或不是 feed 返回 None。"""
+        validators = get_validator_store() if conditional else None
+        headers = validators.conditional_headers(url) if validators else None
+        try:
+            page = await get_crawler_client().fetch(url, headers=headers, max_bytes=FEED_MAX_BYTES, content_types=())
+        except ContentRejected as e:
+            logger.debug(f"feed rejected: {e}")
+            return None
+        except Exception as e:
+            logger.debug(f"feed fetch failed: {url} - {e}")
+            return None
+        if page.status_code == 304:
+            return 'not_modified', []
+        parsed = parse_feed(page.content or b'')
+        if parsed is not None and validators:
+            validators.save(url, page.headers)
+        return parsed
+
+    async def _robots_sitemaps(self, origin: str, logger) -> List[str]:
+        try:
+            resp = await get_crawler_client().get(origin + '/robots.txt')
+        except Exception as e:
+            logger.debug(f"robots.txt fetch failed: {origin} - {e}")
+            return []
+        if resp.status_code != 200:
+            return []
+        return [line.split(':', 1)[1].strip() for line in resp.text.splitlines()
+                if line.lower().startswith('sitemap:') and line.split(':', 1)[1].strip()]
+
+    async def _page_feeds(self, site: str, logger) -> List[str]:
+        try:
+            page = await fetch_page(site)
+        except Exception as e:
+            logger.debug(f"entry page fetch failed: {site} - {e}")
+            return []
+        soup = make_soup(decode_response(page, logger), logger)
+        feeds = []
+        for link in soup.find_all('link', href=True):
+            rel = link.get('rel') or []
+            rel = rel if isinstance(rel, list) else rel.split()
+            if 'alternate' in [r.lower() for r in rel] and (link.get('type') or '').lower() in FEED_LINK_TYPES:
+                feeds.append(urljoin(page.url, link['href'].strip()))
+        return feeds
+
+    # -------------------- 发现 --------------------
+    async def _column_share(self, site: str, feed_url: str, kind: str, entries: List[Tuple[str, Optional[str]]],
+                            logger) -> float:
+        """feed 中与入口同栏目的条目占比；sitemap 索引按 lastmod 最新的子 sitemap 估计。"""
+        if kind == 'sitemapindex':
+            child_url = max(entries, key=lambda e: e[1] or '')[0]
+            parsed = await self._get_feed(urljoin(feed_url, child_url), logger)
+            if not parsed or parsed[0] != 'sitemap' or not parsed[1]:
+                return 0.0
+            feed_url, entries = urljoin(feed_url, child_url), parsed[1]
+        site_canon = _canonicalize(site)
+        inside = sum(1 for url, _ in entries if _is_same_column(site_canon, _canonicalize(urljoin(feed_url, url))))
+        return inside / len(entries)
+
+    async def discover(self, site: str, logger) -> List[Dict]:
+        """发现站点的 feed，返回 [{'url', 'kind', 'tier'}, ...] 并缓存（可能为空列表）。"""
+        parts = urlsplit(site)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        feeds: List[Dict] = []
+        tried = set()
+
+        async def consider(url: str, tier: str):
+            if url in tried:
+                return
+            tried.add(url)
+            parsed = await self._get_feed(url, logger)
+            if not parsed or not parsed[1]:
+                return
+            kind, entries = parsed
+            if kind in ('sitemap', 'sitemapindex'):
+                dated = sum(1 for _, lastmod in entries if lastmod)
+                if dated < len(entries) * SITEMAP_MIN_DATED:
+                    logger.debug(f"{url} has too few lastmod dates, not usable as a feed")
+                    return
+            share = await self._column_share(site, url, kind, entries, logger)
+            if share < FEED_MIN_COLUMN_SHARE:
+                logger.debug(f"only {share:.0%} of {url} is inside the column of {site}, not used")
+                return
+            feeds.append({'url': url, 'kind': kind, 'tier': tier})
+
+        for url in await self._page_feeds(site, logger):
+            await consider(url, 'page')
+        if not feeds:
+            for url in await self._robots_sitemaps(origin, logger) + [origin + '/sitemap.xml',
+                                                                      origin + '/sitemap_index.xml']:
+                await consider(url, 'sitemap')
+        if not feeds:
+            for path in COMMON_FEED_PATHS:
+                await consider(origin + path, 'common')
+                if feeds:
+                    break
+
+        self.store.save_site(site, feeds)
+        self.stats['discovered'] += 1
+        if feeds:
+            logger.info(f"feeds discovered for {site}: {[f['url'] for f in feeds]}")
+        else:
+            logger.info(f"no feed or sitemap found for {site}, keep using list page parsing")
+        return feeds
+
+    async def feeds_for(self, site: str, logger) -> List[Dict]:
+        cached = self.store.get_site(site)
+        if cached is not None and time.time() - cached[1] < FEED_REDISCOVER_DAYS * 86400:
+            return cached[0]
+        return await self.discover(site, logger)
+
+    # -------------------- 轮询 --------------------
+    async def _poll_feed(self, feed: Dict, logger, cutoff: Optional[str] = None
+                         ) -> Optional[List[Tuple[str, Optional[str]]]]:
+        """
+        一个 feed 的新条目；sitemap 索引展开 lastmod 有变化的子 sitemap（lastmod 早于 cutoff 的不必请求）。
+        请求失败返回 None。
+        """
+        parsed = await self._get_feed(feed['url'], logger, conditional=True)
+        if parsed is None:
+            return None
+        kind, entries = parsed
+        if kind == 'not_modified':
+            self.stats['not_modified'] += 1
+            return []
+        known = self.store.entries(feed['url'])
+        fresh = [(url, lastmod) for url, lastmod in entries if url not in known or (lastmod and lastmod != known[url])]
+        if kind != 'sitemapindex':
+            self.store.save_entries(feed['url'], fresh)
+            return fresh
+
+        # 子 sitemap：只展开新出现或 lastmod 变化的，按 lastmod 从新到旧
+        fresh.sort(key=lambda e: e[1] or '', reverse=True)
+        found, expanded = [], []
+        stale = [(url, lastmod) for url, lastmod in fresh if cutoff and lastmod and lastmod < cutoff]
+        fresh = [entry for entry in fresh if entry not in stale]
+        expanded.extend(stale)
+        for child_url, lastmod in fresh[:FEED_MAX_CHILD_SITEMAPS]:
+            child = await self._poll_feed({'url': child_url, 'kind': 'sitemap'}, logger, cutoff)
+            if child is None:
+                continue
+            found.extend(child)
+            expanded.append((child_url, lastmod))
+        # 未成功展开的子 sitemap 不记入，下一轮再试
+        self.store.save_entries(feed['url'], expanded)
+        return found
+
+    async def poll(self, site: str, logger, within_days: Optional[int] = None) -> Optional[List[str]]:
+        """
+        返回站点新出现的文章 URL（已规范化，可能为空列表）；没有可用 feed、本轮 feed 全部请求失败、
+        或新条目经同栏目过滤后一条不剩（站点级 sitemap / 常见路径 feed 过滤后为空即算）时返回 None
+        （由调用方解析列表页）。
+        within_days: 带日期且早于该天数的条目丢弃；不带日期的保留，由下游按发布时间过滤。
+        """
+        feeds = await self.feeds_for(site, logger)
+        tier = next((t for t in TIERS if any(f['tier'] == t for f in feeds)), None)
+        if tier is None:
+            self.stats['fallbacks'] += 1
+            return None
+
+        cutoff = (datetime.now() - timedelta(days=within_days)).strftime('%Y%m%d') if within_days else None
+        site_canon = _canonicalize(site)
+        urls, ok, dropped = [], False, 0
+        for feed in feeds:
+            if feed['tier'] != tier:
+                continue
+            entries = await self._poll_feed(feed, logger, cutoff)
+            if entries is None:
+                continue
+            ok = True
+            self.stats['polled'] += 1
+            for url, lastmod in entries:
+                if cutoff and lastmod and lastmod < cutoff:
+                    continue
+                url = _canonicalize(urljoin(feed['url'], url))
+                # 只保留与入口同栏目的文章（全站 feed 不能淹没或替代栏目列表页）
+                if not _is_same_column(site_canon, url):
+                    dropped += 1
+                    continue
+                urls.append(url)
+        if not ok:
+            logger.info(f"all feeds of {site} failed this round, fallback to list page parsing")
+            self.stats['fallbacks'] += 1
+            return None
+        urls = list(dict.fromkeys(urls))
+        if not urls and (tier != 'page' or dropped):
+            # 站点级 feed 可能本来就很少收录本栏目，过滤后的空结果不能说明栏目没有更新
+            logger.debug(f"no new urls of the column in site-level feeds of {site}, fallback to list page parsing")
+            self.stats['fallbacks'] += 1
+            return None
+        self.stats['new_urls'] += len(urls)
+        return urls
+
+    def list_recheck_due(self, site: str) -> bool:
+        """
+        feed 可用时是否仍要解析一次列表页（每 FEED_LIST_RECHECK_HOURS 小时一次，返回 True 即记为已解析）：
+        feed 停更或漏发时，列表页上的新文章不会一直被藏住。
+        """
+        if not self.store.claim_list_check(site, FEED_LIST_RECHECK_HOURS * 3600):
+            return False
+        self.stats['list_rechecks'] += 1
+        return True
+
+
+_discovery: Optional[FeedDiscovery] = None
+
+
+def get_feed_discovery() -> FeedDiscovery:
+    global _discovery
+    if _discovery is None:
+        _discovery = FeedDiscovery(FeedStore(get_project_path('crawler_state.db')))
+    return _discovery
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 # when you use this general crawler, remember followings
-# When you receive flag -7, it means that the problem occurs in the HTML fetch process.
+# When you receive flag -7, it means that the problem occurs in the HTML fetch process (network / timeout / 5xx), retry it later.
+# When you receive flag -4, the page itself is unusable (4xx, undecodable, error page), do not retry it.
+# When you receive flag -3, the url is not an html page (non-html content-type or binary body), do not retry it.
 # When you receive flag 0, it means that the problem occurred during the content parsing process.
 # when you receive flag 1, the result would be a tuple, means that the input url is possible a article_list page
 # and the set contains the url of the articles.
@@ -13,19 +15,27 @@ import httpx
 from bs4 import BeautifulSoup
 from datetime import datetime
 from urllib.parse import urlparse
-from llms.openai_wrapper import openai_llm
+from llms.openai_wrapper import openai_llm_async
 # from llms.siliconflow_wrapper import sfa_llm
-from bs4.element import Comment
 from utils.general_utils import extract_and_convert_dates
 import asyncio
 import json_repair
 import os
+import time
 from typing import Union
 from requests.compat import urljoin
 from scrapers import scraper_map
 from pathlib import Path
 from dotenv import load_dotenv
 from .new_llm_crawler import smart_crawler
+from .validators import get_validator_store, links_digest
+from .http_client import MAX_HTML_BYTES, ContentRejected, FetchedPage, fetch_page, is_retryable
+from .html_parser import make_soup, page_text
+from .dom_features import DomFeatures, extract_dom_features
+from .parse_pool import LogBuffer, run_parse
+from .decoder import decode_html, get_charset_memory
+from .content_reducer import record_reduction, reduce_for_llm
+from .extractor_stats import FIELDS, get_extractor_stats
 
 # 找到上层目录（例如上一级或两级，按实际调整）
 ROOT = Path(__file__).resolve().parents[2]  
@@ -43,24 +53,6 @@ header = {
 extractor = GeneralNewsExtractor()
 
 
-def tag_visible(element: Comment) -> bool:
-    if element.parent.name in ["style", "script", "head", "title", "meta", "[document]"]:
-        return False
-    if isinstance(element, Comment):
-        return False
-    return True
-
-
-def text_from_soup(soup: BeautifulSoup) -> str:
-    res = []
-    texts = soup.find_all(string=True)
-    visible_texts = filter(tag_visible, texts)
-    for v in visible_texts:
-        res.append(v)
-    text = "\n".join(res)
-    return text.strip()
-
-
 sys_info = '''Your task is to operate as an HTML content extractor, focusing on parsing a provided HTML segment. Your objective is to retrieve the following details directly from the raw text within the HTML, without summarizing or altering the content:
 
 - The document's title
@@ -87,7 +79,6 @@ from datetime import datetime
 import asyncio
 import httpx
 from bs4 import BeautifulSoup
-from bs4.element import Comment
 import re
 from typing import Optional
 
@@ -100,18 +91,9 @@ DETAIL_PATTERNS = [
     re.compile(r"/\d{4}(?:\d{2})?/\d{2}/[0-9a-f-]{8,}\.html$"),  # like .../202505/30/uuid.html
 ]
 
-try:
-    # 可选：如果环境里装了会更准
-    from charset_normalizer import from_bytes as cn_from_bytes
-except Exception:
-    cn_from_bytes = None
-
-
 NAV_PATH_PREFIXES = ("/search", "/s/", "/rss", "/sitemap", "/tag", "/category")  # 可按需增删
 MIN_LIST_LINKS = 20                  # 多少同域链接视为“更可能是列表页”
-MAX_LLM_TEXT_LEN = 29999             # 与你原逻辑保持一致
 REQUEST_TIMEOUT = 30                 # 秒
-RETRY_TIMES = 2                      # 网络重试次数
 
 
 def _same_site(a: str, b: str) -> bool:
@@ -125,112 +107,34 @@ def _same_site(a: str, b: str) -> bool:
     return a == b
 
 
-async def _fetch(url: str, logger) -> Tuple[httpx.Response, str]:
+async def _fetch(url: str, logger, extra_headers: Optional[Dict[str, str]] = None) -> Tuple[FetchedPage, str]:
     """
-    拉取页面，自动跟随重定向；返回 (response, final_url)
+    拉取页面，自动跟随重定向；返回 (page, final_url)
     final_url 用于后续一切 URL 解析/拼接，避免 301/302 抖动。
+    extra_headers 用于条件请求（If-None-Match / If-Modified-Since），304 直接返回。
+    非 HTML 时抛 ContentRejected（不应重试）；超过大小上限的 HTML 截断后照常返回。
     """
-    async with httpx.AsyncClient() as client:
-        last_exc = None
-        for attempt in range(RETRY_TIMES):
-            try:
-                resp = await client.get(
-                    url,
-                    headers=header,
-                    timeout=REQUEST_TIMEOUT,
-                    follow_redirects=True,  # 修复 301/302
-                )
-                resp.raise_for_status()
-                final_url = str(resp.url)
-                # 有重定向时给点调试信息
-                if resp.history:
-                    logger.debug(
-                        f"redirected: {url} -> {final_url} ({[r.status_code for r in resp.history]})"
-                    )
-                return resp, final_url
-            except Exception as e:
-                last_exc = e
-                if attempt < RETRY_TIMES - 1:
-                    logger.info(f"can not reach\n{e}\nwaiting 1min")
-                    await asyncio.sleep(60)
-                else:
-                    logger.error(e)
-        raise last_exc
-
-
-def _normalize_encoding(enc: Optional[str]) -> Optional[str]:
-    if not enc:
-        return None
-    e = enc.strip().lower()
-    # 常见同义词归一
-    if e in {"utf8", "utf-8", "utf_8"}:
-        return "utf-8"
-    if e in {"gbk", "gb2312", "gb-2312", "gb_2312-80", "gb-18030", "gb18030"}:
-        return "gb18030"  # 用最全的 gb18030
-    if e in {"cp936"}:
-        return "cp936"
-    if e in {"big5", "big-5"}:
-        return "big5"
-    return e
-
-
-def _decode_response_text(response, logger) -> str:
-    """
-    更稳的 HTML 解码：
-      1) 头部 charset
-      2) <meta charset=...> / http-equiv
-      3) charset_normalizer 兜底（若可用）
-      4) 尝试 utf-8 / gb18030 / cp936 / big5
-    """
-    raw = response.content or b""
-    if not raw:
-        return ""
-
-    # 1) HTTP 头部
-    ct = response.headers.get("Content-Type", "")
-    m = re.search(r"charset=([^\s;]+)", ct, flags=re.I)
-    enc = _normalize_encoding(m.group(1)) if m else None
-
-    # 2) HTML <meta ... charset=...>
-    if not enc:
-        head = raw[:8192]  # 看前 8KB 就足够
-        m = re.search(br"<meta[^>]+charset=['\"]?\s*([a-zA-Z0-9_\-]+)", head, flags=re.I)
-        if not m:
-            m = re.search(br"http-equiv=['\"]?content-type['\"][^>]*content=['\"][^;]+;\s*charset=([a-zA-Z0-9_\-]+)",
-                          head, flags=re.I)
-        if m:
-            try:
-                enc = _normalize_encoding(m.group(1).decode("ascii", "ignore"))
-            except Exception:
-                enc = None
-
-    # 3) charset_normalizer（可选）
-    if not enc and cn_from_bytes:
-        try:
-            r = cn_from_bytes(raw).best()
-            if r and r.encoding:
-                enc = _normalize_encoding(r.encoding)
-                logger.debug(f"charset_normalizer guessed: {enc} (confidence={getattr(r,'encoding',None)})")
-        except Exception:
-            pass
-
-    # 4) 依次尝试
-    tried = set()
-    for cand in [enc, "utf-8", "gb18030", "cp936", "big5"]:
-        if not cand or cand in tried:
-            continue
-        try:
-            text = raw.decode(cand)
-            if cand != enc:
-                logger.debug(f"decoded with fallback encoding: {cand}")
-            return text
-        except Exception:
-            tried.add(cand)
-            continue
-
-    # 实在不行，退回 httpx 自己的判断（可能错）
-    logger.warning("decode failed with all candidates; falling back to response.text (may be wrong).")
-    return response.text or ""
+    # 失败直接抛出，不在请求路径里等待；重试由调用方的延迟重试队列负责（scrapers/retry_queue.py）
+    try:
+        # 共享连接池（keep-alive / 按 host 限流）+ 流式读取，默认 UA 已带在连接池上
+        resp = await fetch_page(url, headers=extra_headers)
+        if resp.status_code == 304:
+            return resp, resp.url
+    except ContentRejected as e:
+        logger.info(f"skip {e}")
+        raise
+    except Exception as e:
+        logger.info(f"can not reach {url}\n{e}")
+        raise
+    final_url = resp.url
+    if resp.truncated:
+        logger.info(f"{url} larger than {MAX_HTML_BYTES} bytes, only the first part is parsed")
+    # 有重定向时给点调试信息
+    if resp.history:
+        logger.debug(
+            f"redirected: {url} -> {final_url} ({[r.status_code for r in resp.history]})"
+        )
+    return resp, final_url
 
 
 # === 新增/调整：新闻识别配置 ===
@@ -283,7 +187,7 @@ def _is_news_like_url(path: str, query: str, anchor_text: str = "") -> bool:
 
     return suffix_ok and depth_ok and (kw_hit or date_hit or v_hit or anchor_hit)
 
-def _collect_same_site_links(final_url: str, soup: BeautifulSoup, logger) -> Set[str]:
+def _collect_same_site_links(final_url: str, features: DomFeatures, logger) -> Set[str]:
     """
     从页面收集“同域 + 像新闻”的链接集合（更严格）。
     """
@@ -291,8 +195,8 @@ def _collect_same_site_links(final_url: str, soup: BeautifulSoup, logger) -> Set
     domain = final_parts.netloc
     urls: Set[str] = set()
 
-    for a in soup.find_all("a", href=True):
-        href = (a["href"] or "").strip()
+    for a in features.anchors:
+        href = (a.el["href"] or "").strip()
         if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
             continue
 
@@ -304,7 +208,7 @@ def _collect_same_site_links(final_url: str, soup: BeautifulSoup, logger) -> Set
             continue
 
         path = parts.path or "/"
-        if not _is_news_like_url(path, parts.query, getattr(a, "get_text", lambda: "")()):
+        if not _is_news_like_url(path, parts.query, a.raw_text):
             continue
 
         parts = parts._replace(fragment="")
@@ -316,15 +220,14 @@ def _collect_same_site_links(final_url: str, soup: BeautifulSoup, logger) -> Set
 
 ONCLICK_URL_RE = re.compile(r"(?:window\.open|location\.href\s*=|open)\s*\(\s*['\"](?P<u>[^'\"]+)['\"]", re.I)
 
-def _extract_js_nav_urls(final_url: str, soup: BeautifulSoup, domain: str, list_slug: str | None) -> set[str]:
+def _extract_js_nav_urls(final_url: str, features: DomFeatures, domain: str, list_slug: str | None) -> set[str]:
     urls = set()
-    # 覆盖 onclick/data-href/data-url/role=link
-    candidates = soup.select('[onclick], [data-href], [data-url], [role="link"]')
-
-    for el in candidates:
+    # 覆盖 onclick/data-href/data-url/role=link（遍历时已收集）
+    for node in features.js_targets:
         # ★ 排除位于导航/菜单/侧栏/页脚中的元素
-        if _is_in_excluded_zone(el):
+        if node.excluded:
             continue
+        el = node.el
 
         cand = None
         if el.has_attr('onclick'):
@@ -356,8 +259,7 @@ def _extract_js_nav_urls(final_url: str, soup: BeautifulSoup, domain: str, list_
         if list_slug and (f"/detail_{list_slug}/" not in path):
             continue
 
-        anchor_text = el.get_text(" ", strip=True) if hasattr(el, "get_text") else ""
-        if not _is_news_like_url(path, parts.query, anchor_text):
+        if not _is_news_like_url(path, parts.query, node.text):
             continue
 
         parts = parts._replace(fragment="")
@@ -367,6 +269,8 @@ def _extract_js_nav_urls(final_url: str, soup: BeautifulSoup, domain: str, list_
 
 
 # 顶部常量区新增
+# 注意：与最初的 el.find_parent(sel) 写法一致，各条目按“标签名”匹配，
+# 因此实际生效的只有 header / nav / footer；类名形式的条目保留以便日后启用
 EXCLUDE_ANCESTOR_SELECTORS = (
     "header", "nav", "footer",
     ".submenu", ".sub-menu", ".dropdown", ".dropdown-menu", ".menu", ".menus", ".navbar",
@@ -376,17 +280,6 @@ EXCLUDE_ANCESTOR_SELECTORS = (
     ".logo", ".site-nav", ".global-nav"
 )
 
-def _is_in_excluded_zone(el) -> bool:
-    """候选节点是否位于导航/顶部菜单/侧栏/页脚等容器内。"""
-    try:
-        for sel in EXCLUDE_ANCESTOR_SELECTORS:
-            if el.find_parent(sel):
-                return True
-    except Exception:
-        pass
-    return False
-
-
 # === 新增：更强的“文章链接”识别 & 栏目页提示 ===
 import re
 from urllib.parse import urlsplit, urlunsplit, urljoin
@@ -409,14 +302,14 @@ def _extract_list_slug(url_or_path: str) -> str | None:
     return m.group("slug").lower() if m else None
 
 
-def _extract_article_links(final_url: str, soup: BeautifulSoup, domain: str, list_slug: str | None) -> set[str]:
+def _extract_article_links(final_url: str, features: DomFeatures, domain: str, list_slug: str | None) -> set[str]:
     urls = set()
-    for a in soup.find_all("a", href=True):
+    for a in features.anchors:
         # ★ 排除位于导航/菜单/侧栏/页脚中的 a
-        if _is_in_excluded_zone(a):
+        if a.excluded:
             continue
 
-        href = (a["href"] or "").strip()
+        href = (a.el["href"] or "").strip()
         if not href or href.startswith(("javascript:", "#", "mailto:", "tel:")):
             continue
 
@@ -438,8 +331,7 @@ def _extract_article_links(final_url: str, soup: BeautifulSoup, domain: str, lis
             continue
 
         # 新闻启发式（含日期/关键词/或 /v/123/）
-        anchor_text = a.get_text(" ", strip=True)
-        if not _is_news_like_url(path, parts.query, anchor_text):
+        if not _is_news_like_url(path, parts.query, a.text):
             continue
 
         parts = parts._replace(fragment="")
@@ -468,14 +360,15 @@ def _cn_ratio(s: str) -> float:
 def _normalize_space(s: str) -> str:
     return re.sub(r"\s+", " ", s or "").strip()
 
-def _guess_site_names(soup: BeautifulSoup, domain: str) -> set[str]:
+def _guess_site_names(features: DomFeatures, domain: str) -> set[str]:
     names = set()
     # og:site_name
-    m = soup.find("meta", {"property": "og:site_name"})
+    m = features.meta("property", "og:site_name")
     if m and m.get("content"): names.add(_normalize_space(m["content"]))
     # <title> 拆分，短片段多为站名
-    if soup.title and soup.title.string:
-        for part in TITLE_SPLIT_RE.split(soup.title.string):
+    title_tag = features.title_tag
+    if title_tag and title_tag.string:
+        for part in TITLE_SPLIT_RE.split(title_tag.string):
             part = _normalize_space(part)
             if 0 < len(part) <= 20:
                 names.add(part)
@@ -515,38 +408,35 @@ def _clean_title(raw: str, site_names: set[str]) -> str:
     best = max(parts, key=score)
     return _clean_title_segment(best, site_names)
 
-def _collect_title_candidates(soup: BeautifulSoup) -> list[tuple[str, float]]:
+def _collect_title_candidates(features: DomFeatures) -> list[tuple[str, float]]:
     """
     返回 [(文本, 基础权重)]，只收中文候选，排除导航/侧栏/页脚等
     """
     cands: list[tuple[str, float]] = []
 
-    # 结构性标题
-    for sel in TITLE_SELECTORS:
-        for el in soup.select(sel):
-            try:
-                if _is_in_excluded_zone(el):
-                    continue
-            except Exception:
-                pass
-            txt = _normalize_space(el.get_text(" ", strip=True))
-            if not txt or _cn_ratio(txt) <= 0.2:
-                continue
-            # 基础权重：h1 > h2 > 其他
-            w = 2.5 if el.name == "h1" else (2.0 if el.name == "h2" else 1.5)
-            # class/id 中含 title/biaoti/news 提升
-            attr = " ".join([el.get("class") and " ".join(el.get("class")) or "", el.get("id") or ""]).lower()
-            if any(k in attr for k in ("title", "biaoti", "news", "detail")):
-                w += 0.5
-            cands.append((txt, w))
+    # 结构性标题（TITLE_SELECTORS 顺序 + 文档顺序，遍历时已收集）
+    for node in features.title_candidates:
+        if node.excluded:
+            continue
+        el = node.el
+        txt = _normalize_space(node.text)
+        if not txt or _cn_ratio(txt) <= 0.2:
+            continue
+        # 基础权重：h1 > h2 > 其他
+        w = 2.5 if el.name == "h1" else (2.0 if el.name == "h2" else 1.5)
+        # class/id 中含 title/biaoti/news 提升
+        attr = " ".join([el.get("class") and " ".join(el.get("class")) or "", el.get("id") or ""]).lower()
+        if any(k in attr for k in ("title", "biaoti", "news", "detail")):
+            w += 0.5
+        cands.append((txt, w))
 
     # meta 标题（次优）
-    for sel in (
-        'meta[property="og:title"]',
-        'meta[name="title"]',
-        'meta[name="twitter:title"]',
+    for attr_name, value in (
+        ("property", "og:title"),
+        ("name", "title"),
+        ("name", "twitter:title"),
     ):
-        m = soup.select_one(sel)
+        m = features.meta(attr_name, value)
         if m and m.get("content"):
             txt = _normalize_space(m["content"])
             if txt and _cn_ratio(txt) > 0.2:
@@ -554,16 +444,16 @@ def _collect_title_candidates(soup: BeautifulSoup) -> list[tuple[str, float]]:
 
     return cands
 
-def refine_chinese_title(orig_title: str, soup: BeautifulSoup, domain: str) -> str:
+def refine_chinese_title(orig_title: str, features: DomFeatures, domain: str) -> str:
     """
-    根据 DOM 强化“中文正文标题”，若无法判定则返回清洗后的 orig_title。
+    根据 DOM 特征强化“中文正文标题”，若无法判定则返回清洗后的 orig_title。
     """
-    site_names = _guess_site_names(soup, domain)
+    site_names = _guess_site_names(features, domain)
 
     # 先清洗一下原始标题作为备选
     fallback = _clean_title(orig_title or "", site_names)
 
-    cands = _collect_title_candidates(soup)
+    cands = _collect_title_candidates(features)
     if not cands:
         return fallback
 
@@ -583,208 +473,297 @@ def refine_chinese_title(orig_title: str, soup: BeautifulSoup, domain: str) -> s
     return best_txt
 
 
-def _is_list_like_page(soup) -> bool:
+def _is_list_like_page(features: DomFeatures) -> bool:
     """通过页面特征判断是否像‘列表页’：有分页/列表类名，或出现多次日期模式"""
     # 1) CSS/结构提示
-    for sel in LIST_CLASS_HINTS:
-        if soup.select_one(sel):
-            return True
-    # 2) 页面上日期出现次数较多
-    text = soup.get_text(" ", strip=True)[:100000]  # 限一次匹配的量
-    return len(DATE_REGEX.findall(text)) >= 5
+    if features.list_hint:
+        return True
+    # 2) 页面上日期出现次数较多（限前 100000 字符匹配）
+    return features.date_count(DATE_REGEX, 100000) >= 5
 
 
-async def general_crawler(url: str, logger) -> Tuple[int, Union[Set[str], Dict]]:
-    """
-    Return (flag, payload):
-      - flag < 0 : 错误（-7 为网络/解码问题）
-      - flag = 0 : 解析失败
-      - flag = 1 : 可能是“列表页”，payload 为同域文章候选 URL 集合
-      - flag = 11: 文章解析成功，payload 为 {title, content, publish_time, ...}
+def _page_features(soup: BeautifulSoup) -> DomFeatures:
+    """一次遍历收集下面各分类器需要的全部 DOM 特征。"""
+    return extract_dom_features(
+        soup,
+        exclude_ancestors=EXCLUDE_ANCESTOR_SELECTORS,
+        list_hints=LIST_CLASS_HINTS,
+        title_selectors=TITLE_SELECTORS,
+    )
 
-    工作流：
-      0) 若域名有专用爬虫 -> 走专用
-      1) 抓页面（自动跟随重定向）
-      2) 判断是否“列表页”：同域链接 >= MIN_LIST_LINKS
-      3) GNE 抽取正文
-      4) 失败则 LLM 兜底抽取
-      5) 后处理（时间、前缀、摘要、图片/作者绝对化、最终 URL）
+
+# parse_page 在“需要 LLM 兜底”时返回的内部 flag（不会返回给调用方）
+NEEDS_LLM = 2
+ERROR_PAGE_PREFIXES = ("服务器错误", "您访问的页面", "403", "出错了")
+
+
+def _finish_article(result: dict, domain: str, final_url: str, description: Optional[str]) -> dict:
+    """后处理：时间规范化、来源前缀、摘要、最终 URL（避免 301 前的地址不一致）"""
+    date_str = extract_and_convert_dates(result.get("publish_time", ""))
+    result["publish_time"] = date_str if date_str else datetime.strftime(datetime.today(), "%Y%m%d")
+
+    from_site = domain.replace("www.", "").split(".")[0]
+    result["content"] = f"[from {from_site}] {result['content']}"
+    result["abstract"] = f"[from {from_site}] {description.strip()}" if description else ""
+    result["url"] = final_url
+    return result
+
+
+def finish_crawled_article(article: dict) -> dict:
     """
-    # 0) 站点特化优先
-    parsed_url = urlparse(url)
-    init_domain = parsed_url.netloc
-    if init_domain in scraper_map:
-        return await scraper_map[init_domain](url, logger)
-    
-    # return await smart_crawler(url, logger)
+    new_llm_crawler 抽出的文章（extract_article_three_fields，publish_time 保留原样，如 ISO 时间）
+    → 与 general_crawler 产出一致：只保留 articles 表的字段，publish_time 规范为 YYYYMMDD，并做同样的后处理。
+    """
+    final_url = article["url"]
+    result = {k: article[k] for k in ("title", "content", "author", "images") if article.get(k)}
+    result["publish_time"] = article.get("publish_time_norm") or article.get("publish_time") or ""
+    return _finish_article(result, urlsplit(final_url).netloc, final_url, article.get("abstract"))
 
-    # 1) 抓页面（自动跟随重定向）；若失败 -> -7
-    try:
-        response, final_url = await _fetch(url, logger)
-    except Exception:
-        return -7, {}
+
+def parse_page(raw: bytes, content_type: str, final_url: str, page_hint: Optional[str] = None,
+               charset_hint: Optional[str] = None, skip_gne: bool = False) -> Dict:
+    """
+    CPU 部分：解码 → 建树 → 特征遍历 → 列表判定 → GNE → 标题打分。
+    模块级纯函数，由 scrapers.parse_pool 在子进程中执行；返回可 pickle 的紧凑结果：
+      {'flag': 1, 'links': [...]}                       列表页
+      {'flag': 11, 'article': {...}}                    GNE 抽取成功（已完成后处理）
+      {'flag': NEEDS_LLM, 'llm_text', 'llm_usage', 'images', 'author', 'description'}   需主进程调用 LLM
+      {'flag': 0 / -4}                                  失败（-4：解码失败或错误页，不应重试）
+    另带 'encoding'（实际使用的编码）与 'logs'（LogBuffer 记录）。
+    page_hint='detail'（URL 模板已被判定为详情页，见 scrapers/url_patterns.py）时跳过列表页识别，
+    直接按详情页抽取；抽取不理想再回到后面的列表/LLM 流程。
+    charset_hint: 该域名上次成功使用的编码（scrapers/decoder.py 的 CharsetMemory，由主进程传入）。
+    skip_gne: 该域名上 GNE 从未抽取成功过（scrapers/extractor_stats.py，由主进程判断），不再尝试；
+    跑了 GNE 时结果带 'gne': (是否被采纳, 耗时秒数)，由主进程记入统计。
+    """
+    logger = LogBuffer()
+    out = {'flag': 0, 'logs': logger.records, 'encoding': None}
 
     # 统一用“最终 URL/域名”，确保后续 join/过滤正确
     final_parts = urlsplit(final_url)
     domain = final_parts.netloc
-    base_url = f"{final_parts.scheme}://{domain}"
 
     # 2) 解码 + 解析 DOM
-    text = _decode_response_text(response, logger)
+    text, out['encoding'], _ = decode_html(raw, content_type, remembered=charset_hint, logger=logger)
     if not text:
-        return -7, {}
+        out['flag'] = -4
+        return out
 
-    soup = BeautifulSoup(text, "html.parser")
+    soup = make_soup(text, logger)
+    features = _page_features(soup)
+    meta_description = features.meta("name", "description")
+    description = meta_description.get("content") if meta_description else None
+
+    def list_page(links: Set[str]) -> Dict:
+        out.update(flag=1, links=list(links))
+        return out
 
     # ★ 识别当前列表页的栏目 slug（如 list_gzwx → gzwx）
     list_slug = _extract_list_slug(final_parts.path)
+    detail_hint = page_hint == 'detail'
 
-
-    # ——先识别“文章详情链接集合”——
-    article_links = _extract_article_links(final_url, soup, domain, list_slug)
+    # ——先识别“文章详情链接集合”——（已知是详情页模板时跳过）
+    article_links = set() if detail_hint else _extract_article_links(final_url, features, domain, list_slug)
 
     # ★ 并入通过 onclick/data-* 抓到的链接
-    js_links = _extract_js_nav_urls(final_url, soup, domain, list_slug)
+    js_links = set() if detail_hint else _extract_js_nav_urls(final_url, features, domain, list_slug)
     if js_links:
         article_links |= js_links
     # 仅当“新闻候选”达到阈值才视为列表页（比如 8，按需调小/调大）
     NEWS_LIST_MIN = 8
-    if len(article_links) >= NEWS_LIST_MIN or _is_list_like_page(soup):
+    if not detail_hint and (len(article_links) >= NEWS_LIST_MIN or _is_list_like_page(features)):
         if len(article_links) >= NEWS_LIST_MIN:
             logger.info(f"{final_url} detected as news list page, found {len(article_links)} news-like links")
             for i, u in enumerate(list(article_links)[:5]):
                 logger.debug(f"list candidate[{i}]: {u}")
-            return 1, article_links
+            return list_page(article_links)
         # 如果仅靠页面结构判定是列表页，再用“新闻过滤”收一次
-        fallback_urls = _collect_same_site_links(final_url, soup, logger)
+        fallback_urls = _collect_same_site_links(final_url, features, logger)
         if len(fallback_urls) >= NEWS_LIST_MIN:
             logger.info(f"{final_url} looks like a list (structure), collected {len(fallback_urls)} news-like links")
             for i, u in enumerate(list(fallback_urls)[:5]):
                 logger.debug(f"list candidate[{i}]: {u}")
-            return 1, fallback_urls
-
+            return list_page(fallback_urls)
 
     # 先看 URL 是否像详情页（只要像，就先尝试正文抽取）
-    path = urlsplit(final_url).path  # 注意：用最终 URL
-    is_detail_like = any(p.search(path) for p in DETAIL_PATTERNS)
-    if is_detail_like:
+    path = final_parts.path  # 注意：用最终 URL
+    is_detail_like = detail_hint or any(p.search(path) for p in DETAIL_PATTERNS)
+    gne_seconds = 0.0
+    if is_detail_like and not skip_gne:
         # 先试 GNE（快速路径）
+        started = time.perf_counter()
         try:
             result = extractor.extract(text)
             if "meta" in result:
                 del result["meta"]
-            bad_title = result.get("title", "").startswith(("服务器错误", "您访问的页面", "403", "出错了"))
+            bad_title = result.get("title", "").startswith(ERROR_PAGE_PREFIXES)
             bad_content = result.get("content", "").startswith("This website uses cookies")
             too_short = len(result.get("title", "")) < 4 or len(result.get("content", "")) < 200  # 适当收紧正文长度
             if not (bad_title or bad_content or too_short):
                 # ——后处理，与你原有逻辑一致——
-                date_str = extract_and_convert_dates(result.get("publish_time", ""))
-                result["publish_time"] = date_str if date_str else datetime.strftime(datetime.today(), "%Y%m%d")
-                from_site = domain.replace("www.", "").split(".")[0]
-                result["content"] = f"[from {from_site}] {result['content']}"
-                try:
-                    meta_description = soup.find("meta", {"name": "description"})
-                    result["abstract"] = f"[from {from_site}] {meta_description['content'].strip()}" if meta_description and meta_description.get("content") else ""
-                except Exception:
-                    result["abstract"] = ""
-                result["url"] = final_url
-                # GNE 提取成功后，返回前增加：
-                result["title"] = refine_chinese_title(result.get("title", ""), soup, domain)
-                return 11, result
+                result["title"] = refine_chinese_title(result.get("title", ""), features, domain)
+                out.update(flag=11, article=_finish_article(result, domain, final_url, description),
+                           gne=(True, time.perf_counter() - started))
+                return out
             else:
                 logger.debug("detail-like url but GNE judged not good; will fall back to list/LLM flow.")
         except Exception as e:
             logger.debug(f"GNE error on detail-like url: {e}; will fall back.")
+        gne_seconds = time.perf_counter() - started
 
     # 3) 判断“更像列表页” → 返回 flag=1
-    urls = _collect_same_site_links(final_url, soup, logger)
+    urls = _collect_same_site_links(final_url, features, logger)
     if len(urls) >= MIN_LIST_LINKS:
         logger.info(f"{final_url} is more like an article list page, find {len(urls)} urls with the same netloc")
-        return 1, urls
+        return list_page(urls)
 
     # 4) GNE 抽取正文
-    try:
-        result = extractor.extract(text)
-        if "meta" in result:
-            del result["meta"]
-        result["title"] = refine_chinese_title(result.get("title", ""), soup, domain)
-
-        # 常见异常页/隐私页/报错页过滤
-        bad_title = (
-            result.get("title", "").startswith(("服务器错误", "您访问的页面", "403", "出错了"))
-        )
-        bad_content = result.get("content", "").startswith("This website uses cookies")
-        too_short = len(result.get("title", "")) < 4 or len(result.get("content", "")) < 24
-        if bad_title or bad_content or too_short:
-            logger.info(f"gne extract not good: {result}")
+    result = None
+    if not skip_gne:
+        started = time.perf_counter()
+        try:
+            result = extractor.extract(text)
+            if "meta" in result:
+                del result["meta"]
+            result["title"] = refine_chinese_title(result.get("title", ""), features, domain)
+
+            # 常见异常页/隐私页/报错页过滤
+            bad_title = result.get("title", "").startswith(ERROR_PAGE_PREFIXES)
+            bad_content = result.get("content", "").startswith("This website uses cookies")
+            too_short = len(result.get("title", "")) < 4 or len(result.get("content", "")) < 24
+            if bad_title or bad_content or too_short:
+                logger.info(f"gne extract not good: {result}")
+                result = None
+        except Exception as e:
+            logger.info(f"gne extract error: {e}")
             result = None
-    except Exception as e:
-        logger.info(f"gne extract error: {e}")
-        result = None
-
-    # 5) LLM 兜底
-    if not result:
-        html_text = text_from_soup(soup)
-        # 清理空白行
-        html_lines = [line.strip() for line in html_text.split("\n") if line.strip()]
-        html_text = "\n".join(html_lines)
-
-        if not html_text or html_text.startswith(("服务器错误", "您访问的页面", "403", "出错了")):
-            logger.warning(f"can not get {final_url} from the Internet")
-            return -7, {}
-
-        if len(html_text) > MAX_LLM_TEXT_LEN:
-            logger.info(f"{final_url} content too long for llm parsing")
-            return 0, {}
-
-        messages = [
-            {"role": "system", "content": sys_info},
-            {"role": "user", "content": html_text},
-        ]
-        llm_output = openai_llm(messages, model=model, logger=logger, temperature=0.01)
-        result = json_repair.repair_json(llm_output, return_objects=True)
-        logger.debug(f"decoded_object: {result}")
-
-        if not isinstance(result, dict):
-            logger.debug("failed to parse from llm output")
-            return 0, {}
-        if "title" not in result or "content" not in result:
-            logger.debug("llm parsed result not good")
-            return 0, {}
-        
-        # 补充图片（绝对 URL）
-        image_links = []
-        for img in soup.find_all("img"):
-            src = img.get("src")
-            if not src:
-                continue
-            image_links.append(urljoin(final_url, src))
-        result["images"] = image_links
-
-        # 补充作者
-        author_element = soup.find("meta", {"name": "author"})
-        result["author"] = author_element["content"] if author_element else ""
+        out['gne'] = (result is not None, gne_seconds + time.perf_counter() - started)
+    else:
+        logger.debug(f"gne skipped: it has never worked on {domain}")
+
+    if result:
+        out.update(flag=11, article=_finish_article(result, domain, final_url, description))
+        return out
+
+    # 5) 准备 LLM 兜底的输入
+    # 可见文本（已按行 strip、去空行）；有 selectolax 时直接从原始 HTML 取，不再遍历 bs4 树
+    html_text = page_text(text, soup)
+    if not html_text or html_text.startswith(ERROR_PAGE_PREFIXES):
+        logger.warning(f"can not get {final_url} from the Internet")
+        out['flag'] = -4
+        return out
+
+    # 只把正文区域和标题/日期上下文交给模型，控制在 token 预算内（scrapers/content_reducer.py）
+    reduced = reduce_for_llm(soup)
+    author_element = features.meta("name", "author")
+    out.update(
+        flag=NEEDS_LLM,
+        llm_text=reduced.text,
+        llm_usage=reduced.usage,
+        # 补充图片（绝对 URL）与作者
+        images=[urljoin(final_url, src) for src in features.images if src],
+        author=author_element["content"] if author_element else "",
+        description=description,
+    )
+    return out
+
+
+async def general_crawler(url: str, logger, *, conditional: bool = False,
+                          page_hint: Optional[str] = None) -> Tuple[int, Union[Set[str], Dict]]:
+    """
+    Return (flag, payload):
+      - flag < 0 : 错误（-7 为网络 / 超时 / 5xx，可稍后重试；-4 为 4xx、解码失败或错误页，
+                   -3 为非 HTML，都不应重试）
+      - flag = 0 : 解析失败
+      - flag = 1 : 可能是“列表页”，payload 为同域文章候选 URL 集合
+      - flag = 11: 文章解析成功，payload 为 {title, content, publish_time, ...}
 
-    # 6) 后处理：时间规范化、来源前缀、摘要、最终 URL
-    date_str = extract_and_convert_dates(result.get("publish_time", ""))
-    result["publish_time"] = date_str if date_str else datetime.strftime(datetime.today(), "%Y%m%d")
+    工作流：
+      0) 若域名有专用爬虫 -> 走专用
+      1) 抓页面（自动跟随重定向）
+      2) 判断是否“列表页”：同域链接 >= MIN_LIST_LINKS
+      3) GNE 抽取正文
+      4) 失败则 LLM 兜底抽取
+      5) 后处理（时间、前缀、摘要、图片/作者绝对化、最终 URL）
+    其中 2)~3) 与 LLM 输入的准备在解析进程池中执行（parse_page），事件循环只做 I/O 与 LLM 调用。
 
-    from_site = domain.replace("www.", "").split(".")[0]
-    result["content"] = f"[from {from_site}] {result['content']}"
+    conditional=True 用于定时重复抓取的列表页：带上次的 ETag/Last-Modified 发条件请求，
+    304 或抽取出的链接集合与上次一致时返回 (1, set())，下游无需再做任何处理。
 
-    try:
-        meta_description = soup.find("meta", {"name": "description"})
-        if meta_description and meta_description.get("content"):
-            result["abstract"] = f"[from {from_site}] {meta_description['content'].strip()}"
-        else:
-            result["abstract"] = ""
-    except Exception:
-        result["abstract"] = ""
-
-    # 用“最终 URL”作为结果 URL（避免 301 前的地址不一致）
-    result["url"] = final_url
+    page_hint='detail' 表示 URL 模板已被学习为详情页（scrapers/url_patterns.py），跳过列表页识别。
+    """
+    # 0) 站点特化优先
+    parsed_url = urlparse(url)
+    init_domain = parsed_url.netloc
+    if init_domain in scraper_map:
+        return await scraper_map[init_domain](url, logger)
+    
+    # return await smart_crawler(url, logger)
 
-    return 11, result
+    validators = get_validator_store() if conditional else None
 
+    def list_result(links: Set[str]) -> Tuple[int, Set[str]]:
+        if not validators:
+            return 1, links
+        digest = links_digest(links)
+        unchanged = validators.get(url).get('links_hash') == digest
+        validators.save(url, response.headers, digest)
+        if unchanged:
+            logger.info(f"{url} link set unchanged since last crawl, skip")
+            return 1, set()
+        return 1, links
 
+    # 1) 抓页面（自动跟随重定向）；暂时性失败 -> -7，4xx 等重试无用的失败 -> -4
+    try:
+        response, final_url = await _fetch(url, logger, validators.conditional_headers(url) if validators else None)
+    except ContentRejected:
+        return -3, {}
+    except Exception as e:
+        return (-7 if is_retryable(e) else -4), {}
+    if response.status_code == 304:
+        logger.info(f"{url} not modified since last crawl, skip")
+        return 1, set()
+
+    # 2)~4) 解析（进程池）；编码的域名记忆在主进程维护
+    # GNE 的成败按域名记入 extractor_stats；在从未成功过的域名上跳过 GNE
+    charsets = get_charset_memory()
+    extractor_stats = get_extractor_stats()
+    parsed = await run_parse(parse_page, response.content or b"", response.headers.get("Content-Type", ""),
+                             final_url, page_hint, charsets.get(final_url), extractor_stats.skip(final_url, 'gne'),
+                             logger=logger)
+    charsets.remember(final_url, parsed.get('encoding'))
+    if 'gne' in parsed:
+        accepted, seconds = parsed['gne']
+        extractor_stats.record(final_url, 'gne', FIELDS if accepted else (), seconds)
+    flag = parsed['flag']
+    if flag == 1:
+        return list_result(set(parsed['links']))
+    if flag != NEEDS_LLM:
+        return flag, parsed.get('article') or {}
+
+    # 5) LLM 兜底（主进程）
+    record_reduction(parsed['llm_usage'], final_url, logger)
+    messages = [
+        {"role": "system", "content": sys_info},
+        {"role": "user", "content": parsed['llm_text']},
+    ]
+    started = time.perf_counter()
+    llm_output = await openai_llm_async(messages, model=model, logger=logger, temperature=0.01)
+    result = json_repair.repair_json(llm_output, return_objects=True)
+    logger.debug(f"decoded_object: {result}")
+
+    if not isinstance(result, dict):
+        logger.debug("failed to parse from llm output")
+        extractor_stats.record(final_url, 'llm', (), time.perf_counter() - started)
+        return 0, {}
+    if "title" not in result or "content" not in result:
+        logger.debug("llm parsed result not good")
+        extractor_stats.record(final_url, 'llm', (), time.perf_counter() - started)
+        return 0, {}
+    extractor_stats.record(final_url, 'llm', [k for k in FIELDS if result.get(k)], time.perf_counter() - started)
+
+    result["images"] = parsed['images']
+    result["author"] = parsed['author']
 
+    # 6) 后处理：时间规范化、来源前缀、摘要、最终 URL
+    return 11, _finish_article(result, urlsplit(final_url).netloc, final_url, parsed['description'])
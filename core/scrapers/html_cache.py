@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# 原始 HTML 磁盘缓存（可选，HTML_CACHE_MAX_MB > 0 时启用）：
+# - 正文 gzip 压缩后按 sha256 内容寻址存放在 PROJECT_DIR/html_cache/<前两位>/<sha256>.gz，相同正文只存一份
+# - index.db 按规范化 URL 记录最终 URL、状态码、响应头、编码、正文 sha256 与最近访问时间
+# - 压缩后总大小超过上限时按最近访问时间（LRU）淘汰
+# fetch_page() 抓取成功后写入；cache_only 为 True 时（pipeline(from_cache=True)）只读缓存、不发请求，
+# 未命中抛 CacheMiss。缓存也可作为解析基准的离线语料（scripts/bench_parsers.py --cache）。
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from utils.general_utils import get_project_path
+
+HTML_CACHE_MAX_MB = float(os.environ.get('HTML_CACHE_MAX_MB', 0))
+
+# 为 True 时 fetch_page 只读缓存；各阶段的 task 在 pipeline 内创建，会继承这个值
+cache_only: ContextVar[bool] = ContextVar('html_cache_only', default=False)
+
+
+class CacheMiss(Exception):
+    """cache_only 模式下缓存中没有该 URL。"""
+
+
+def cache_key(url: str) -> str:
+    """规范化 URL：scheme/host 小写、去掉 fragment，空路径记为 /。"""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+
+class HtmlCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, 'index.db'), check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'url TEXT PRIMARY KEY, final_url TEXT, status INTEGER, headers TEXT, encoding TEXT, '
+            'sha TEXT, fetched_at REAL, accessed_at REAL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS pages_sha ON pages (sha)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, size INTEGER, raw_size INTEGER)')
+        self.conn.commit()
+        self.total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'deduplicated': 0, 'evicted': 0}
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, sha[:2], sha + '.gz')
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self.conn.execute('SELECT 1 FROM pages WHERE url=?', (cache_key(url),)).fetchone() is not None
+
+    def put(self, url: str, final_url: str, status: int, headers: List[Tuple[str, str]],
+            encoding: Optional[str], content: bytes) -> str:
+        """写入一个响应，返回正文 sha256。同一正文已存在时只更新索引。"""
+        sha = hashlib.sha256(content).hexdigest()
+        now = time.time()
+        with self._lock:
+            exists = self.conn.execute('SELECT 1 FROM blobs WHERE sha=?', (sha,)).fetchone()
+            if exists:
+                self.stats['deduplicated'] += 1
+            else:
+                path = self._blob_path(sha)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                data = gzip.compress(content, compresslevel=6)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                self.conn.execute('INSERT INTO blobs (sha, size, raw_size) VALUES (?, ?, ?)',
+                                  (sha, len(data), len(content)))
+                self.total_bytes += len(data)
+            key = cache_key(url)
+            old = self.conn.execute('SELECT sha FROM pages WHERE url=?', (key,)).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pages (url, final_url, status, headers, encoding, sha, fetched_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, final_url, status, json.dumps(headers, ensure_ascii=False), encoding, sha, now, now))
+            if old and old[0] != sha:
+                self._drop_orphan(old[0])
+            self.stats['stored'] += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+        return sha
+
+    def get(self, url: str) -> Optional[Dict]:
+        """返回 {'url', 'final_url', 'status', 'headers', 'encoding', 'content'}；未命中返回 None。"""
+        key = cache_key(url)
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT final_url, status, headers, encoding, sha FROM pages WHERE url=?', (key,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            try:
+                with open(self._blob_path(row[4]), 'rb') as f:
+                    content = gzip.decompress(f.read())
+            except (OSError, EOFError):
+                # 文件丢失或损坏：删掉索引，当作未命中
+                self.conn.execute('DELETE FROM pages WHERE url=?', (key,))
+                self._drop_orphan(row[4])
+                self.conn.commit()
+                self.stats['misses'] += 1
+                return None
+            self.conn.execute('UPDATE pages SET accessed_at=? WHERE url=?', (time.time(), key))
+            self.conn.commit()
+            self.stats['hits'] += 1
+        return {'url': key, 'final_url': row[0], 'status': row[1], 'headers': json.loads(row[2] or '[]'),
+                'encoding': row[3], 'content': content}
+
+    def iter_pages(self, limit: int = 0) -> Iterator[Tuple[str, str, bytes]]:
+        """按 URL 顺序遍历缓存（不更新访问时间）：(最终 URL, Content-Type, 原始字节)。供离线基准使用。"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT final_url, headers, sha FROM pages ORDER BY url' + (' LIMIT ?' if limit else ''),
+                (limit,) if limit else ()).fetchall()
+        for final_url, headers, sha in rows:
+            try:
+                with open(self._blob_path(sha), 'rb') as f:
+                    content = gzip.decompress(f.read())
+            except (OSError, EOFError):
+                continue
+            ctype = next((v for k, v in json.loads(headers or '[]') if k.lower() == 'content-type'), '')
+            yield final_url, ctype, content
+
+    def _drop_orphan(self, sha: str) -> None:
+        if self.conn.execute('SELECT 1 FROM pages WHERE sha=? LIMIT 1', (sha,)).fetchone():
+            return
+        row = self.conn.execute('SELECT size FROM blobs WHERE sha=?', (sha,)).fetchone()
+        self.conn.execute('DELETE FROM blobs WHERE sha=?', (sha,))
+        if row:
+            self.total_bytes -= row[0]
+        path = self._blob_path(sha)
+        try:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))  # 目录非空时失败，忽略
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """按最近访问时间淘汰，直到总大小回到上限的 90% 以下。调用方持有锁。"""
+        target = self.max_bytes * 0.9
+        while self.total_bytes > target:
+            rows = self.conn.execute('SELECT url, sha FROM pages ORDER BY accessed_at LIMIT 64').fetchall()
+            if not rows:
+                break
+            for url, sha in rows:
+                self.conn.execute('DELETE FROM pages WHERE url=?', (url,))
+                self._drop_orphan(sha)
+                self.stats['evicted'] += 1
+                if self.total_bytes <= target:
+                    break
+
+    def summary(self) -> Dict:
+        with self._lock:
+            pages = self.conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+            blobs, raw = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(raw_size), 0) FROM blobs').fetchone()
+        return {'pages': pages, 'blobs': blobs, 'raw_bytes': raw, 'stored_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes, **self.stats}
+
+
+_cache: Optional[HtmlCache] = None
+
+
+def get_html_cache() -> Optional[HtmlCache]:
+    """HTML_CACHE_MAX_MB <= 0 时不启用，返回 None。"""
+    global _cache
+    if _cache is None and HTML_CACHE_MAX_MB > 0:
+        _cache = HtmlCache(get_project_path('html_cache'), int(HTML_CACHE_MAX_MB * 1024 * 1024))
+    return _cache
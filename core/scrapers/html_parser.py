@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# HTML 解析后端的统一入口：
+# - make_soup(): BeautifulSoup 树（分类器/抽取逻辑都基于它），默认用 lxml 构建，失败再回落 html.parser
+# - page_text() / harvest_links(): 只需要可见文本或链接时，可用 selectolax（lexbor）直接解析原始 HTML，
+#   不构建 bs4 树；未安装 selectolax 时退回 bs4
+#
+# 环境变量 HTML_PARSER: auto（默认，按 lxml → html.parser 的顺序）/ lxml / html.parser
+# 各后端解析耗时与抽取结果的一致性见 scripts/bench_parsers.py
+import os
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.element import Comment
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except Exception:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as FastHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except Exception:
+    try:
+        from selectolax.parser import HTMLParser as FastHTMLParser
+        SELECTOLAX_AVAILABLE = True
+    except Exception:
+        FastHTMLParser = None
+        SELECTOLAX_AVAILABLE = False
+
+HTML_PARSER = os.environ.get('HTML_PARSER', 'auto').strip().lower()
+
+# 这些标签内的文本不可见（与各爬虫原有的 tag_visible 一致）
+INVISIBLE_PARENTS = ("style", "script", "head", "title", "meta", "[document]")
+
+# 解析统计：回落次数可用来判断 lxml 在哪些站点上不可靠
+parse_stats = {'lxml': 0, 'html.parser': 0, 'fallbacks': 0}
+
+
+def soup_backends() -> List[str]:
+    if HTML_PARSER == 'html.parser' or not LXML_AVAILABLE:
+        return ['html.parser']
+    return ['lxml', 'html.parser']
+
+
+def make_soup(text: str, logger=None) -> BeautifulSoup:
+    """
+    按 HTML_PARSER 构建 BeautifulSoup。快速后端抛异常，或对明显是 HTML 的文本解析出空树时，
+    回落到 html.parser。
+    """
+    backends = soup_backends()
+    for backend in backends[:-1]:
+        try:
+            soup = BeautifulSoup(text, backend)
+            if soup.find() is not None or '<' not in text:
+                parse_stats[backend] += 1
+                return soup
+        except Exception as e:
+            if logger:
+                logger.debug(f"{backend} failed to parse html, fallback: {e}")
+        parse_stats['fallbacks'] += 1
+    parse_stats[backends[-1]] += 1
+    return BeautifulSoup(text, backends[-1])
+
+
+def _visible_lines(strings) -> List[str]:
+    lines = []
+    for s in strings:
+        lines.extend(line.strip() for line in s.split("\n"))
+    return [line for line in lines if line]
+
+
+def soup_text(soup: BeautifulSoup) -> str:
+    """可见文本，按行 strip 并去掉空行。"""
+    strings = (str(s) for s in soup.find_all(string=True)
+               if not isinstance(s, Comment) and not (s.parent and s.parent.name in INVISIBLE_PARENTS))
+    return "\n".join(_visible_lines(strings))
+
+
+def soup_links(soup: BeautifulSoup) -> List[Tuple[str, str]]:
+    """文档顺序的 (href, 锚文本)；锚文本空白已归一。"""
+    return [((a.get("href") or "").strip(), " ".join(a.get_text(" ").split()))
+            for a in soup.find_all("a", href=True)]
+
+
+def page_text(html: str, soup: Optional[BeautifulSoup] = None) -> str:
+    """原始 HTML 的可见文本（同 soup_text）；有 selectolax 时不构建 bs4 树。"""
+    if SELECTOLAX_AVAILABLE:
+        try:
+            tree = FastHTMLParser(html)
+            strings = (node.text(deep=False) for node in tree.root.traverse(include_text=True)
+                       if node.tag == '-text' and node.parent is not None
+                       and node.parent.tag not in INVISIBLE_PARENTS)
+            return "\n".join(_visible_lines(strings))
+        except Exception:
+            pass
+    return soup_text(soup if soup is not None else make_soup(html))
+
+
+def harvest_links(html: str, soup: Optional[BeautifulSoup] = None) -> List[Tuple[str, str]]:
+    """原始 HTML 中的全部 (href, 锚文本)（同 soup_links）；有 selectolax 时不构建 bs4 树。"""
+    if SELECTOLAX_AVAILABLE:
+        try:
+            tree = FastHTMLParser(html)
+            return [((a.attributes.get("href") or "").strip(), " ".join(a.text(deep=True, separator=" ").split()))
+                    for a in tree.css("a[href]")]
+        except Exception:
+            pass
+    return soup_links(soup if soup is not None else make_soup(html))
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# 爬虫共用的 HTTP 连接池：keep-alive、按 host 限流、可用时启用 HTTP/2，退出时统一关闭。
+# 通过 httpcore 的 trace 扩展统计新建连接数，请求数 - 新建连接数 即复用次数。
+# fetch_page() 流式下载页面：先看 Content-Type，非 HTML 直接中止（ContentRejected）；
+# HTML 不论是否声明 Content-Length 都最多读取 MAX_HTML_BYTES 字节，超出部分截断；启用时成功的响应写入原始 HTML 缓存（scrapers/html_cache.py）。
+import asyncio
+import os
+import weakref
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from .html_cache import CacheMiss, cache_only, get_html_cache
+
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+    HTTP2_AVAILABLE = True
+except Exception:
+    HTTP2_AVAILABLE = False
+
+header = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_6) AppleWebKit/605.1.15 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/604.1 Edg/112.0.100.0'}
+
+REQUEST_TIMEOUT = 30
+MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', 100))
+MAX_KEEPALIVE = int(os.environ.get('HTTP_MAX_KEEPALIVE', 20))
+MAX_PER_HOST = int(os.environ.get('HTTP_MAX_PER_HOST', 6))
+MAX_HTML_BYTES = int(os.environ.get('MAX_HTML_BYTES', 5 * 1024 * 1024))
+
+# 视为页面的 Content-Type（前缀匹配）；没有 Content-Type 时按首块内容嗅探
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+# 常见二进制文件的魔数
+BINARY_SIGNATURES = (b'%PDF', b'PK\x03\x04', b'\xd0\xcf\x11\xe0', b'\x89PNG', b'\xff\xd8\xff', b'GIF8',
+                     b'\x1f\x8b', b'Rar!', b'7z\xbc\xaf', b'ID3')
+
+
+# 除 5xx 外仍属暂时性的状态码（请求超时、限流）
+RETRYABLE_STATUS = frozenset((408, 429))
+
+
+class ContentRejected(Exception):
+    """响应不是 HTML（Content-Type 不符或内容像二进制文件）；属于内容问题，重试也不会变，调用方不应重试。"""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    抓取异常稍后重试是否可能成功：网络错误、超时、5xx（及 408 / 429）为是；
+    其余 4xx、不支持的协议、非 HTML（ContentRejected）、缓存未命中等重试也不会变，为否。
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status >= 500 or status in RETRYABLE_STATUS
+    if isinstance(exc, httpx.UnsupportedProtocol):
+        return False
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def _looks_binary(head: bytes) -> bool:
+    if head.startswith(BINARY_SIGNATURES):
+        return True
+    return b'\x00' in head[:1024]
+
+
+def _cut_at_tag(content: bytes) -> bytes:
+    """
+    截断的正文退回到最后一个 '<' 之前：任意字节处截断会切开多字节字符，严格解码全部失败后只能走有损兜底；
+    '<'（0x3C）不会出现在 UTF-8 / GBK / Big5 / Shift_JIS 多字节字符的内部，在它之前截断总是完整字符。
+    """
+    cut = content.rfind(b'<')
+    return content[:cut] if cut > 0 else content
+
+
+class FetchedPage:
+    """fetch_page 的结果；字段与 httpx.Response 同名，便于替换原来的 response 使用方式。"""
+    __slots__ = ('url', 'status_code', 'headers', 'content', 'encoding', 'history', 'truncated')
+
+    def __init__(self, url: str, status_code: int, headers: httpx.Headers, content: bytes,
+                 encoding: Optional[str], history: List[httpx.Response], truncated: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.history = history
+        self.truncated = truncated
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class CrawlerHttpClient:
+    """单个事件循环内共享的 AsyncClient 及其统计。"""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            headers=header,
+            follow_redirects=True,
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=REQUEST_TIMEOUT),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.requests = 0
+        self.connections_opened = 0
+        self.failures = 0
+        self.rejected = 0
+        self.truncated = 0
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == 'connection.connect_tcp.complete':
+            self.connections_opened += 1
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(MAX_PER_HOST)
+        return self._host_limits[host]
+
+    async def get(self, url: str, *, headers: Optional[Dict[str, str]] = None, **kwargs) -> httpx.Response:
+        extensions = dict(kwargs.pop('extensions', None) or {})
+        extensions['trace'] = self._trace
+        async with self._host_limit(url):
+            self.requests += 1
+            try:
+                return await self.client.get(url, headers=headers, extensions=extensions, **kwargs)
+            except Exception:
+                self.failures += 1
+                raise
+
+    async def fetch(self, url: str, *, headers: Optional[Dict[str, str]] = None, max_bytes: int = MAX_HTML_BYTES,
+                    content_types: Tuple[str, ...] = HTML_CONTENT_TYPES) -> FetchedPage:
+        """流式 GET：先检查状态码与响应头，再按预算读取正文（超出截断）。非 HTML 抛 ContentRejected。"""
+        extensions = {'trace': self._trace}
+        async with self._host_limit(url):
+            self.requests += 1
+            try:
+                async with self.client.stream('GET', url, headers=headers, extensions=extensions) as resp:
+                    if resp.status_code == 304:
+                        return FetchedPage(str(resp.url), 304, resp.headers, b'', resp.encoding, resp.history)
+                    resp.raise_for_status()
+
+                    ctype = resp.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                    if ctype and content_types and not ctype.startswith(content_types):
+                        raise ContentRejected(f"{url} content-type is {ctype}")
+
+                    chunks = []
+                    size = 0
+                    truncated = False
+                    async for chunk in resp.aiter_bytes():
+                        if not chunks and not ctype and _looks_binary(chunk):
+                            raise ContentRejected(f"{url} has no content-type and looks binary")
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        if size >= max_bytes:
+                            # 到达预算后不再读取；未读完的连接由 httpx 关闭而不是放回连接池
+                            truncated = size > max_bytes
+                            break
+                    content = b''.join(chunks)[:max_bytes]
+                    if truncated:
+                        self.truncated += 1
+                        content = _cut_at_tag(content)
+                    return FetchedPage(str(resp.url), resp.status_code, resp.headers, content,
+                                       resp.encoding, resp.history, truncated)
+            except ContentRejected:
+                self.rejected += 1
+                raise
+            except Exception:
+                self.failures += 1
+                raise
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'connections_opened': self.connections_opened,
+            'connections_reused': max(0, self.requests - self.connections_opened),
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'truncated': self.truncated,
+        }
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# AsyncClient 的连接池与 Semaphore 都绑定事件循环，因此按 loop 分别缓存
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_crawler_client() -> CrawlerHttpClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.client.is_closed:
+        client = CrawlerHttpClient()
+        _clients[loop] = client
+    return client
+
+
+async def http_get(url: str, *, headers: Optional[Dict[str, str]] = None, **kwargs) -> httpx.Response:
+    """所有爬虫共用的 GET（共享连接池 + 按 host 限流）。"""
+    return await get_crawler_client().get(url, headers=headers, **kwargs)
+
+
+async def fetch_page(url: str, *, headers: Optional[Dict[str, str]] = None, **kwargs) -> FetchedPage:
+    """
+    爬虫抓页面用：共享连接池 + 流式读取 + Content-Type 检查 / 大小截断（见 CrawlerHttpClient.fetch）。
+    启用 HTML 缓存时成功的响应写入缓存；cache_only 模式只读缓存，未命中抛 CacheMiss。
+    """
+    cache = get_html_cache()
+    if cache_only.get():
+        cached = await asyncio.to_thread(cache.get, url) if cache is not None else None
+        if cached is None:
+            raise CacheMiss(f"{url} is not in the html cache")
+        return FetchedPage(cached['final_url'], cached['status'], httpx.Headers(cached['headers']),
+                           cached['content'], cached['encoding'], [])
+    page = await get_crawler_client().fetch(url, headers=headers, **kwargs)
+    if cache is not None and page.status_code == 200 and page.content:
+        await asyncio.to_thread(cache.put, url, page.url, page.status_code, page.headers.multi_items(),
+                                page.encoding, page.content)
+    return page
+
+
+def http_stats() -> Dict[str, int]:
+    try:
+        client = _clients.get(asyncio.get_running_loop())
+    except RuntimeError:
+        client = None
+    return client.stats() if client else {}
+
+
+async def close_http_client(logger=None) -> None:
+    """退出前调用：关闭当前事件循环的连接池并输出连接复用统计。"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is None:
+        return
+    if logger:
+        logger.info(f"crawler http client closing: {client.stats()}")
+    await client.aclose()
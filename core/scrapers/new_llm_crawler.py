@@ -1,18 +1,24 @@
 # -*- coding: utf-8 -*-
 # 通用新闻爬虫（重构版：同栏目深爬 + 三要素抽取 + LLM 兜底一次）
 # flag 语义（保持兼容）：
-#  -7: 抓取/解码错误
+#  -7: 抓取错误（网络 / 超时 / 5xx），可稍后重试
+#  -4: 页面不可用（4xx / 解码失败），不应重试
+#  -3: 非 HTML，不应重试
 #   0: 解析失败
 #   1: 列表页，payload 为链接集合（集合 set[str]）
 #  11: 详情页，payload 为 dict：至少包含 title / publish_time / content / url
 import re
 import sys
 import os
+import json
+import hashlib
 import asyncio
-from typing import Union, Tuple, Set, Dict, Optional
-from collections import deque
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Union, Tuple, Set, Dict, List, Optional
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from urllib.parse import urlparse, urlsplit, urlunsplit, urljoin
 
 import httpx
@@ -21,8 +27,17 @@ from bs4.element import Comment
 from gne import GeneralNewsExtractor
 from dotenv import load_dotenv
 
-from llms.openai_wrapper import openai_llm
+from llms.openai_wrapper import openai_llm_async
 from utils.general_utils import extract_and_convert_dates
+from .http_client import ContentRejected, FetchedPage, fetch_page, get_crawler_client, is_retryable
+from .html_cache import CacheMiss
+from .decoder import decode_html, decode_response, get_charset_memory
+from .content_reducer import record_reduction, reduce_for_llm
+from .extractor_stats import FIELDS, get_extractor_stats
+from .html_parser import make_soup
+from .dom_features import ExcludedZones, excluded_zones
+from .parse_pool import LogBuffer, run_parse
+from .url_patterns import get_url_pattern_store
 import json_repair
 
 # -------------------- 环境 & 全局 --------------------
@@ -57,15 +72,11 @@ Ensure your response fits the following JSON structure, accurately reflecting th
 It is essential that your output adheres strictly to this format, with each field filled based on the untouched information extracted directly from the HTML source.'''
 
 # -------------------- 常量/正则 --------------------
-try:
-    from charset_normalizer import from_bytes as cn_from_bytes
-except Exception:
-    cn_from_bytes = None
-
 REQUEST_TIMEOUT = 30
 RETRY_TIMES = 2
 MIN_LIST_LINKS = 20
-MAX_LLM_TEXT_LEN = 29999
+# 栏目 BFS 同时在途的页面数；同一站点还受 HTTP_MAX_PER_HOST 限制（scrapers/http_client.py）
+BFS_CONCURRENCY = int(os.environ.get('BFS_CONCURRENCY', 6))
 
 # hebei.gov.cn 等常见详情链接形态
 DETAIL_PATTERNS = [
@@ -83,8 +94,14 @@ LIST_CLASS_HINTS = (
     ".list", ".news-list", ".list-unstyled", ".list-group"
 )
 DATE_REGEX = re.compile(r"(20\d{2})[.\-/年](\d{1,2})[.\-/月](\d{1,2})日?")
+# URL 中的发布日期（与 general_crawler.DATE_IN_URL 同形态，带分组）：/2025/05/30/、/202505/30/、/20250530/、t20250530_
+URL_DATE_RE = re.compile(r"(?:/|t)(20\d{2})[/._-]?(0[1-9]|1[0-2])[/._-]?(0[1-9]|[12]\d|3[01])(?=[/_.]|$)")
+# 锚点所在“列表项”的最大文本长度；再长多半已是整块列表容器
+LIST_ITEM_MAX_CHARS = 200
 
 # 导航/侧栏/分页等应排除区域
+# 注意：与最初的 el.find_parent(sel) 写法一致，各条目按“标签名”匹配，
+# 因此实际生效的只有 header / nav / footer；类名形式的条目保留以便日后启用
 EXCLUDE_ANCESTOR_SELECTORS = (
     "header", "nav", "footer",
     ".submenu", ".sub-menu", ".dropdown", ".dropdown-menu", ".menu", ".menus", ".navbar",
@@ -100,111 +117,51 @@ ONCLICK_URL_RE = re.compile(
 )
 
 # -------------------- 基础工具 --------------------
-def _normalize_encoding(enc: Optional[str]) -> Optional[str]:
-    if not enc:
-        return None
-    e = enc.strip().lower()
-    if e in {"utf8", "utf-8", "utf_8"}:
-        return "utf-8"
-    if e in {"gbk", "gb2312", "gb-2312", "gb_2312-80", "gb-18030", "gb18030"}:
-        return "gb18030"
-    if e in {"cp936"}:
-        return "cp936"
-    if e in {"big5", "big-5"}:
-        return "big5"
-    return e
-
-# ---- 全局连接池（HTTP/2 + 限流），替换 _fetch 使用 ----
-_HTTP_CLIENT = None
-
+# ---- 全局连接池：与其它爬虫共用 scrapers.http_client ----
 def get_http_client() -> httpx.AsyncClient:
-    global _HTTP_CLIENT
-    if _HTTP_CLIENT is None:
-        _HTTP_CLIENT = httpx.AsyncClient(
-            http2=True,
-            headers=header,
-            follow_redirects=True,
-            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=REQUEST_TIMEOUT),
-            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
-        )
-    return _HTTP_CLIENT
-
-async def _fetch(url: str, logger) -> Tuple[httpx.Response, str]:
+    return get_crawler_client().client
+
+async def _fetch(url: str, logger) -> Tuple[FetchedPage, str]:
     """
-    使用全局连接池；退避 2s -> 5s；不再 60s 卡死事件循环。
+    使用全局连接池 + 流式读取；退避 2s -> 5s；不再 60s 卡死事件循环。
+    非 HTML 抛 ContentRejected，只读缓存模式未命中抛 CacheMiss，4xx 等重试无用的错误（is_retryable）
+    直接抛出，都不重试。
     """
-    client = get_http_client()
     delays = (2, 5)
     last_exc = None
     for i, delay in enumerate(delays + (None,)):  # 最后一次不 sleep
         try:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            final_url = str(resp.url)
+            resp = await fetch_page(url)
+            final_url = resp.url
             if resp.history:
                 logger.debug(f"redirected: {url} -> {final_url} ({[r.status_code for r in resp.history]})")
             return resp, final_url
+        except ContentRejected as e:
+            logger.info(f"skip {e}")
+            raise
+        except CacheMiss as e:
+            # 只读缓存模式：重试也不会命中
+            logger.info(f"{e}")
+            raise
         except Exception as e:
+            if not is_retryable(e):
+                logger.info(f"can not fetch {url}: {e}")
+                raise
             last_exc = e
             if delay is not None:
                 logger.info(f"fetch retry in {delay}s: {url} ({e})")
                 await asyncio.sleep(delay)
     raise last_exc
 
-# ---- 更快的解码器：先试快路径，再少量样本让 charset_normalizer 猜测 ----
+# ---- 解码：统一走 scrapers/decoder.py（声明 → utf-8 → 域名记忆 → 有限前缀探测） ----
 def _decode_response_text(response, logger) -> str:
-    raw = response.content or b""
-    if not raw:
-        return ""
+    return decode_response(response, logger)
 
-    # 快路径 0：已知编码
-    if response.encoding:
-        try:
-            return raw.decode(_normalize_encoding(response.encoding) or "utf-8", errors="strict")
-        except Exception:
-            pass
 
-    # 快路径 1：先尝试 utf-8 / gb18030（覆盖绝大多数中文政务站）
-    for enc in ("utf-8", "gb18030"):
-        try:
-            return raw.decode(enc)
-        except Exception:
-            continue
-
-    # 快路径 2：HTTP 头与 <meta charset>
-    enc = None
-    ct = response.headers.get("Content-Type", "")
-    m = re.search(r"charset=([^\s;]+)", ct, flags=re.I)
-    if m:
-        enc = _normalize_encoding(m.group(1))
-        try:
-            return raw.decode(enc)
-        except Exception:
-            pass
-
-    head = raw[:8192]
-    m = re.search(br"<meta[^>]+charset=['\"]?\s*([a-zA-Z0-9_\-]+)", head, flags=re.I) or \
-        re.search(br"http-equiv=['\"]?content-type['\"][^>]*content=['\"][^;]+;\s*charset=([a-zA-Z0-9_\-]+)", head, flags=re.I)
-    if m:
-        try:
-            enc = _normalize_encoding(m.group(1).decode("ascii", "ignore"))
-            return raw.decode(enc)
-        except Exception:
-            pass
-
-    # 慢路径：仅对前 64KB 进行 charset_normalizer 猜测（避免整页大文件卡慢）
-    if cn_from_bytes:
-        try:
-            r = cn_from_bytes(raw[:65536]).best()
-            if r and r.encoding:
-                enc = _normalize_encoding(r.encoding)
-                return raw.decode(enc)
-        except Exception:
-            pass
-
-    # 最后兜底
-    logger.warning("decode fallback to response.text (may be wrong).")
-    return response.text or ""
+def _decode_bytes(raw: bytes, charset_hint: Optional[str], ct: str, logger) -> Tuple[str, Optional[str]]:
+    """子进程中使用：charset_hint 为主进程记住的该域名编码，返回 (text, 实际使用的编码)。"""
+    text, enc, _ = decode_html(raw, ct, remembered=charset_hint, logger=logger)
+    return text, enc
 
 
 def tag_visible(element: Comment) -> bool:
@@ -234,14 +191,9 @@ def _same_etld1(a: str, b: str) -> bool:
         return h[4:] if h.startswith("www.") else h
     return norm(a) == norm(b)
 
-def _is_in_excluded_zone(el) -> bool:
-    try:
-        for sel in EXCLUDE_ANCESTOR_SELECTORS:
-            if el.find_parent(sel):
-                return True
-    except Exception:
-        pass
-    return False
+def _excluded_zones(soup: BeautifulSoup) -> ExcludedZones:
+    """导航/菜单/页脚等容器的后代集合，每棵树只计算一次；成员判断 O(1)。"""
+    return excluded_zones(soup, EXCLUDE_ANCESTOR_SELECTORS)
 
 # -------------------- 页面/栏目判定 --------------------
 def _is_detail_like_url(url: str) -> bool:
@@ -253,7 +205,7 @@ def _is_same_column(base_url: str, candidate_url: str) -> bool:
     仅允许在“同一栏目根”下深入：
     例：/columns/de3fe4ea-.../index.html -> /columns/de3fe4ea-.../202505/30/*.html ✅
        /columns/OTHER-.../... ❌
-    若 base 非 columns 结构，则退化为“同目录前缀”限定。
+    若 base 非 columns 结构，则退化为“同目录前缀”限定（base 为 index.html / list.html 等文件时取其所在目录）。
     """
     bp, cp = urlsplit(base_url), urlsplit(candidate_url)
     if not _same_etld1(bp.netloc, cp.netloc):
@@ -262,7 +214,8 @@ def _is_same_column(base_url: str, candidate_url: str) -> bool:
     if bm and cm:
         return bm.group("cid") == cm.group("cid")
     # 非 columns 结构：使用目录前缀限定
-    base_dir = re.sub(r"index\.html?$", "", bp.path or "").rstrip("/")
+    head, _, last = (bp.path or "").rpartition("/")
+    base_dir = head if "." in last else (bp.path or "").rstrip("/")
     return (cp.path or "/").startswith(base_dir + "/")
 
 def is_list_like_page(soup: BeautifulSoup) -> bool:
@@ -287,9 +240,10 @@ def _extract_js_nav_urls_from_dom(final_url: str, soup: BeautifulSoup) -> set[st
     candidates = soup.select(
         '[onclick], [data-href], [data-url], [data-link], [data-target], [role="link"], [role="button"]'
     )
+    zones = _excluded_zones(soup)
     for el in candidates:
         # 排除导航/菜单/页脚/侧栏等
-        if _is_in_excluded_zone(el):
+        if el in zones:
             continue
 
         # onclick 解析
@@ -331,6 +285,73 @@ SCRIPT_URL_RE = re.compile(
     re.X | re.I,
 )
 
+# 脚本块挖 URL 的开销控制：
+#   - JSON 样脚本块先严格解析（json.JSONDecoder.raw_decode，允许结尾的 ; 与空白），
+#     严格解析失败或其后还有其它脚本时才用 json_repair 宽容解析，且只对不超过 SCRIPT_REPAIR_MAX_CHARS 的块做
+#   - 不短于 SCRIPT_CACHE_MIN_CHARS 的块按内容哈希缓存挖到的 URL（站点公共配置、内联框架代码等每页都一样）。
+#     挖到的字符串都以 http(s):// 或 / 开头，补全结果只取决于页面的 scheme + host，因此按来源再缓存一份规范化结果
+SCRIPT_REPAIR_MAX_CHARS = int(os.environ.get('SCRIPT_REPAIR_MAX_CHARS', 256 * 1024))
+SCRIPT_CACHE_MIN_CHARS = 2048
+SCRIPT_CACHE_SIZE = 256
+# 内容哈希 → (URL 字符串, {(scheme, host): 规范化后的 URL 集合})
+_script_url_cache: "OrderedDict[str, Tuple[Tuple[str, ...], Dict[Tuple[str, str], frozenset]]]" = OrderedDict()
+# PARSE_WORKERS=0 或进程池回落时，多个线程会同时解析页面
+_script_cache_lock = threading.Lock()
+_json_decoder = json.JSONDecoder()
+script_stats: Dict[str, int] = {'blocks': 0, 'cached': 0, 'strict': 0, 'repaired': 0, 'over_budget': 0}
+
+def _is_url_string(s: str) -> bool:
+    return s.startswith(("http://", "https://", "/")) and len(s) > 6
+
+def _parse_json_block(maybe: str):
+    """严格解析优先；返回 None 表示放弃（超过 repair 上限）。"""
+    try:
+        data, end = _json_decoder.raw_decode(maybe)
+        if not maybe[end:].strip("; \t\r\n"):
+            script_stats['strict'] += 1
+            return data
+    except ValueError:
+        pass
+    if len(maybe) > SCRIPT_REPAIR_MAX_CHARS:
+        script_stats['over_budget'] += 1
+        return None
+    script_stats['repaired'] += 1
+    # json.loads 已在上面失败过，跳过 json_repair 内部的同一次尝试
+    return json_repair.repair_json(maybe, return_objects=True, skip_json_loads=True)
+
+def _script_block_url_strings(content: str) -> Tuple[str, ...]:
+    """单个脚本块中形如 URL 的字符串（已 strip，未 urljoin）。"""
+    found = []
+
+    # 1) 优先解析 JSON（常见数据块）
+    if ("__INITIAL_STATE__" in content or "__NEXT_DATA__" in content
+        or content.lstrip().startswith("{") or content.lstrip().startswith("[")):
+        try:
+            # 尝试提纯 JSON：找到第一个 { 或 [
+            start = min([i for i in (content.find("{"), content.find("[")) if i != -1], default=-1)
+            if start >= 0:
+                data = _parse_json_block(content[start:])
+                # 深度搜集 value 中的 URL 字符串
+                def walk(x):
+                    if isinstance(x, dict):
+                        for v in x.values(): walk(v)
+                    elif isinstance(x, list):
+                        for v in x: walk(v)
+                    elif isinstance(x, str):
+                        s = x.strip()
+                        if _is_url_string(s):
+                            found.append(s)
+                walk(data)
+        except Exception:
+            pass
+
+    # 2) 通用字符串常量里的 URL
+    for m in SCRIPT_URL_RE.finditer(content):
+        s = m.group("u").strip()
+        if _is_url_string(s):
+            found.append(s)
+    return tuple(dict.fromkeys(found))
+
 def _extract_urls_from_script_blocks(final_url: str, soup: BeautifulSoup) -> set[str]:
     """
     从脚本块里提取字符串常量形式的 URL。
@@ -340,41 +361,39 @@ def _extract_urls_from_script_blocks(final_url: str, soup: BeautifulSoup) -> set
     """
     urls = set()
     for js in soup.find_all("script"):
+        # 外链脚本（src=）没有内联内容，不必取文本
+        if js.get("src") and not js.contents:
+            continue
         # 只取可见文本（忽略巨大内联框架/空脚本）
         content = js.string or js.get_text("", strip=True) or ""
         if not content or len(content) < 5:
             continue
+        script_stats['blocks'] += 1
 
-        # 1) 优先解析 JSON（常见数据块）
-        if ("__INITIAL_STATE__" in content or "__NEXT_DATA__" in content
-            or content.lstrip().startswith("{") or content.lstrip().startswith("[")):
-            try:
-                import json
-                # 尝试提纯 JSON：找到第一个 { 或 [
-                start = min([i for i in (content.find("{"), content.find("[")) if i != -1], default=-1)
-                if start >= 0:
-                    maybe = content[start:]
-                    # 宽容解析：尽量把外层 JSON 读出来（失败则回退到正则抽）
-                    data = json_repair.repair_json(maybe, return_objects=True)
-                    # 深度搜集 value 中的 URL 字符串
-                    def walk(x):
-                        if isinstance(x, dict):
-                            for v in x.values(): walk(v)
-                        elif isinstance(x, list):
-                            for v in x: walk(v)
-                        elif isinstance(x, str):
-                            s = x.strip()
-                            if s.startswith(("http://", "https://", "/")) and len(s) > 6:
-                                urls.add(_canonicalize(urljoin(final_url, s)))
-                    walk(data)
-            except Exception:
-                pass
-
-        # 2) 通用字符串常量里的 URL
-        for m in SCRIPT_URL_RE.finditer(content):
-            s = m.group("u").strip()
-            if s.startswith(("http://", "https://", "/")) and len(s) > 6:
+        if len(content) < SCRIPT_CACHE_MIN_CHARS:
+            for s in _script_block_url_strings(content):
                 urls.add(_canonicalize(urljoin(final_url, s)))
+            continue
+
+        key = hashlib.sha1(content.encode("utf-8", "surrogatepass")).hexdigest()
+        with _script_cache_lock:
+            entry = _script_url_cache.get(key)
+            if entry is not None:
+                _script_url_cache.move_to_end(key)
+                script_stats['cached'] += 1
+        if entry is None:
+            # 挖掘在锁外进行；两个线程同时处理同一脚本块时各算一次，结果相同
+            entry = (_script_block_url_strings(content), {})
+            with _script_cache_lock:
+                _script_url_cache[key] = entry
+                if len(_script_url_cache) > SCRIPT_CACHE_SIZE:
+                    _script_url_cache.popitem(last=False)
+        strings, joined = entry
+        origin = urlsplit(final_url)[:2]
+        resolved = joined.get(origin)
+        if resolved is None:
+            resolved = joined[origin] = frozenset(_canonicalize(urljoin(final_url, s)) for s in strings)
+        urls |= resolved
 
     return urls
 
@@ -394,8 +413,9 @@ def extract_section_links(final_url: str, soup: BeautifulSoup, base_section_url:
     candidates = set()
 
     # A) 普通 <a> 链接
+    zones = _excluded_zones(soup)
     for a in soup.find_all("a", href=True):
-        if _is_in_excluded_zone(a):
+        if a in zones:
             continue
         href = (a.get("href") or "").strip()
         if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
@@ -433,6 +453,82 @@ def extract_section_links(final_url: str, soup: BeautifulSoup, base_section_url:
     return filtered
 
 
+# -------------------- 列表项日期与水位 --------------------
+def _ymd(y, m, d) -> Optional[str]:
+    try:
+        return datetime(int(y), int(m), int(d)).strftime("%Y%m%d")
+    except ValueError:
+        return None
+
+def _date_from_url(url: str) -> Optional[str]:
+    m = URL_DATE_RE.search(urlsplit(url).path)
+    return _ymd(*m.groups()) if m else None
+
+def _anchor_dates(final_url: str, soup: BeautifulSoup) -> Dict[str, str]:
+    """
+    列表项的发布日期：锚文本中的日期，否则向上至多两层找所在条目（如 <li>），
+    条目文本不超过 LIST_ITEM_MAX_CHARS 且只含一个日期时取之。返回 {规范化 URL: YYYYMMDD}。
+    """
+    dates: Dict[str, str] = {}
+    texts: Dict[int, str] = {}
+    zones = _excluded_zones(soup)
+    for a in soup.find_all("a", href=True):
+        if a in zones:
+            continue
+        href = (a.get("href") or "").strip()
+        if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
+            continue
+        url = _canonicalize(urljoin(final_url, href))
+        if url in dates:
+            continue
+        node = a
+        for _ in range(3):
+            if node is None:
+                break
+            text = texts.get(id(node))
+            if text is None:
+                text = texts[id(node)] = node.get_text(" ", strip=True)
+            if len(text) > LIST_ITEM_MAX_CHARS:
+                break
+            found = DATE_REGEX.findall(text)
+            if found:
+                date = _ymd(*found[0]) if len(found) == 1 else None
+                if date:
+                    dates[url] = date
+                break
+            node = node.parent
+    return dates
+
+def link_dates(final_url: str, soup: BeautifulSoup, links) -> Dict[str, str]:
+    """子链接的发布日期：列表项中的日期优先，其次是 URL 中的日期；都没有的不出现在结果中。"""
+    anchors = _anchor_dates(final_url, soup)
+    out = {}
+    for link in links:
+        date = anchors.get(link) or _date_from_url(link)
+        if date:
+            out[link] = date
+    return out
+
+def _apply_watermark(links: List[str], dates: Dict[str, str], cutoff: Optional[str], is_seen) -> Tuple[List[str], bool]:
+    """
+    按水位过滤子链接：文章链接（带日期或形似详情页）发布日期早于 cutoff、或 is_seen(url) 为真的不再跟进；
+    分页/子栏目等其它链接保留。返回 (保留的链接, 是否到底)：页面上有文章链接且全部被过滤时为“到底”，
+    调用方不再跟进该页的分页。
+    """
+    kept, articles, fresh = [], 0, 0
+    for link in links:
+        date = dates.get(link)
+        if not date and not _is_detail_like_url(link):
+            kept.append(link)
+            continue
+        articles += 1
+        if (cutoff and date and date < cutoff) or (is_seen and is_seen(link)):
+            continue
+        fresh += 1
+        kept.append(link)
+    return kept, articles > 0 and fresh == 0
+
+
 # -------------------- 详情三要素抽取（结构化→GNE→规则→LLM 一次） --------------------
 def extract_structured_meta(soup: BeautifulSoup) -> dict:
     out = {}
@@ -499,9 +595,22 @@ def extract_by_rules(soup: BeautifulSoup) -> dict:
         res["content"] = "\n".join([v.strip() for v in vt if str(v).strip()])
     return res
 
-def extract_article_three_fields(final_url: str, text: str, soup: BeautifulSoup, *, call_llm_once: bool, logger) -> dict:
+def _gne_fields(text: str, logger) -> dict:
+    try:
+        g = extractor.extract(text)
+    except Exception as e:
+        logger.debug(f"GNE err: {e}")
+        return {}
+    out = {"title": g.get("title"), "publish_time": g.get("publish_time")}
+    if g.get("content") and len(g["content"]) > 100:
+        out["content"] = g["content"]
+    return out
+
+
+async def extract_article_three_fields(final_url: str, text: str, soup: BeautifulSoup, *, call_llm_once: bool, logger) -> dict:
     """
-    固定顺序：结构化→GNE→规则；若 title/publish_time/content 任一缺失则仅调用一次 LLM 兜底。
+    结构化 / GNE / 规则按该域名的历史效果排序（scrapers/extractor_stats.py；样本不足时就是这个默认顺序，
+    从未成功过的阶段跳过），前面的阶段先占住字段；若 title/publish_time/content 任一缺失则仅调用一次 LLM 兜底。
     返回至少：title, publish_time, content, url；并附加 site/crawl_time（不污染 content）。
     """
     result = {"url": final_url}
@@ -509,48 +618,47 @@ def extract_article_three_fields(final_url: str, text: str, soup: BeautifulSoup,
     result["site"] = domain.split(":")[0].replace("www.", "")
     result["crawl_time"] = datetime.utcnow().isoformat()
 
-    # 1) 结构化
-    meta = extract_structured_meta(soup)
-    result.update({k: v for k, v in meta.items() if v})
-
-    # 2) GNE
-    if not all(result.get(k) for k in ("title", "publish_time", "content")):
-        try:
-            g = extractor.extract(text)
-            g.pop("meta", None)
-            if g.get("title"): result.setdefault("title", g["title"])
-            if g.get("publish_time"): result.setdefault("publish_time", g["publish_time"])
-            if g.get("content") and len(g["content"]) > 100:
-                result.setdefault("content", g["content"])
-        except Exception as e:
-            logger.debug(f"GNE err: {e}")
-
-    # 3) 规则兜底（不调模型）
-    if not all(result.get(k) for k in ("title", "publish_time", "content")):
-        rule_res = extract_by_rules(soup)
-        for k in ("title", "publish_time", "content"):
-            if rule_res.get(k):
-                result.setdefault(k, rule_res[k])
+    # 1)~3) 结构化 → GNE → 规则兜底（不调模型）
+    stages = {
+        "meta": lambda: extract_structured_meta(soup),
+        "gne": lambda: _gne_fields(text, logger),
+        "rules": lambda: extract_by_rules(soup),
+    }
+    extractor_stats = get_extractor_stats()
+    for stage in extractor_stats.order(final_url, tuple(stages)):
+        missing = [k for k in FIELDS if not result.get(k)]
+        if not missing:
+            break
+        started = time.perf_counter()
+        found = stages[stage]()
+        taken = [k for k in missing if found.get(k)]
+        for k in taken:
+            result[k] = found[k]
+        extractor_stats.record(final_url, stage, taken, time.perf_counter() - started)
 
     # 4) 模型兜底（仅一次）
-    need_llm = not all(result.get(k) for k in ("title", "publish_time", "content"))
+    need_llm = not all(result.get(k) for k in FIELDS)
     if need_llm and call_llm_once:
-        html_lines = [line.strip() for line in soup.get_text("\n").split("\n") if line.strip()]
-        html_text = "\n".join(html_lines)
-        if 0 < len(html_text) <= MAX_LLM_TEXT_LEN:
+        # 正文区域 + 标题/日期上下文，控制在 token 预算内（scrapers/content_reducer.py）
+        reduced = reduce_for_llm(soup)
+        if reduced.text:
+            record_reduction(reduced.usage, final_url, logger)
             messages = [
                 {"role": "system", "content": sys_info},
-                {"role": "user", "content": html_text},
+                {"role": "user", "content": reduced.text},
             ]
-            llm_output = openai_llm(messages, model=model, logger=logger, temperature=0.01)
+            started = time.perf_counter()
+            llm_output = await openai_llm_async(messages, model=model, logger=logger, temperature=0.01)
             parsed = json_repair.repair_json(llm_output, return_objects=True)
+            taken = []
             if isinstance(parsed, dict):
-                for k in ("title", "publish_time", "content"):
-                    if parsed.get(k):
-                        result[k] = parsed[k]
+                taken = [k for k in FIELDS if parsed.get(k)]
+                for k in taken:
+                    result[k] = parsed[k]
                 # 可选：让模型产出摘要
                 if parsed.get("abstract"):
                     result["abstract"] = parsed["abstract"]
+            extractor_stats.record(final_url, "llm", taken, time.perf_counter() - started)
 
     # 额外提供标准化时间（不覆盖原始 publish_time）
     if result.get("publish_time"):
@@ -563,51 +671,119 @@ def extract_article_three_fields(final_url: str, text: str, soup: BeautifulSoup,
 
     return result
 
+# -------------------- 并发 BFS --------------------
+async def _level_bfs(start_url: str, visit, logger, *, max_depth: int, max_pages: int,
+                     concurrency: int = BFS_CONCURRENCY) -> List[str]:
+    """
+    分层并发 BFS：同一层的 URL 并发处理（最多 concurrency 个在途），整层完成后按本层顺序合并子链接作为下一层。
+    visit(url, depth) 返回子链接列表（已按同栏目等约束过滤；depth >= max_depth 时不必收集），None 表示不扩展。
+
+    访问集合与原先逐个 popleft 的 FIFO 实现一致：每层按顺序去重、跳过已访问，累计访问数到 max_pages 为止
+    （失败的页面同样计数）；子链接按各页返回顺序合并，结果与完成先后无关。
+    返回按 BFS 顺序排列的已访问 URL。
+    """
+    seen: Set[str] = set()
+    visited: List[str] = []
+    sem = asyncio.Semaphore(max(1, concurrency))
+    frontier = [start_url]
+    depth = 0
+
+    async def _visit(url: str, level: int):
+        async with sem:
+            return await visit(url, level)
+
+    while frontier and len(seen) < max_pages:
+        level_urls = []
+        for url in frontier:
+            if len(seen) >= max_pages:
+                break
+            if url in seen:
+                continue
+            seen.add(url)
+            level_urls.append(url)
+        visited.extend(level_urls)
+
+        results = await asyncio.gather(*(_visit(url, depth) for url in level_urls), return_exceptions=True)
+        if depth >= max_depth:
+            break
+        frontier = []
+        for url, children in zip(level_urls, results):
+            if isinstance(children, BaseException):
+                logger.debug(f"BFS visit failed: {url} - {children}")
+                continue
+            frontier.extend(link for link in children or () if link not in seen)
+        depth += 1
+    return visited
+
+
+def _date_cutoff(within_days: Optional[int]) -> Optional[str]:
+    """within_days 换算成 YYYYMMDD 截止日期；未给出时不按日期过滤。"""
+    if not within_days:
+        return None
+    return (datetime.now() - timedelta(days=within_days)).strftime("%Y%m%d")
+
+def _follow_above_watermark(url: str, links: List[str], dates: Dict[str, str], cutoff: Optional[str], is_seen,
+                            logger) -> Optional[List[str]]:
+    """
+    增量模式下列表页的子链接：记下该页出现的最新日期，按水位过滤；
+    页面上的文章链接全部过期或已见过时返回 None（不再跟进分页）。
+    """
+    newest = max(dates.values(), default=None)
+    kept, exhausted = _apply_watermark(links, dates, cutoff, is_seen)
+    if exhausted:
+        logger.debug(f"watermark reached at {url} (newest {newest}, cutoff {cutoff}), not following its pages")
+        return None
+    logger.debug(f"list page {url}: newest {newest}, following {len(kept)}/{len(links)} links")
+    return kept
+
+
 # -------------------- 深爬入口：同栏目 BFS（最多 3 层） --------------------
-async def crawl_section(base_list_url: str, logger, max_depth: int = 3, max_pages: int = 500):
+async def crawl_section(base_list_url: str, logger, max_depth: int = 3, max_pages: int = 500,
+                        concurrency: int = BFS_CONCURRENCY, within_days: Optional[int] = None, is_seen=None):
     """
-    从“栏目列表页”出发，按同栏目路径向下 BFS 深入至 max_depth。
-    返回：列表 [article_dict, ...]，每个至少包含 title/publish_time/content/url。
+    从“栏目列表页”出发，按同栏目路径向下 BFS 深入至 max_depth（同一层并发抓取，见 _level_bfs）。
+    within_days / is_seen（如 URL 库的 __contains__）任一给出时为增量模式：发布日期早于 within_days 天前、
+    或已见过的文章链接不再跟进，列表页上的文章链接全部如此时不再跟进其分页（栏目按时间倒序时即“到底”）。
+    返回：列表 [article_dict, ...]，每个至少包含 title/publish_time/content/url，按 BFS 顺序排列。
     """
-    seen = set()
-    articles = []
-    q = deque()
-    q.append((_canonicalize(base_list_url), 0))
     base_canon = _canonicalize(base_list_url)
+    found = {}
+    incremental = bool(within_days or is_seen)
+    cutoff = _date_cutoff(within_days)
 
-    while q and len(seen) < max_pages:
-        url, depth = q.popleft()
-        if url in seen:
-            continue
-        seen.add(url)
-
+    async def visit(url: str, depth: int):
         # 抓取
         try:
             resp, final_url = await _fetch(url, logger)
         except Exception as e:
             logger.info(f"fetch failed: {url} {e}")
-            continue
+            return None
 
         text = _decode_response_text(resp, logger)
         if not text:
-            continue
-        soup = BeautifulSoup(text, "html.parser")
+            return None
+        soup = make_soup(text, logger)
 
         ptype = classify_page(final_url, soup)
         if ptype == "detail" or _is_detail_like_url(final_url):
-            data = extract_article_three_fields(final_url, text, soup, call_llm_once=True, logger=logger)
+            data = await extract_article_three_fields(final_url, text, soup, call_llm_once=True, logger=logger)
             if all(data.get(k) for k in ("title", "publish_time", "content")):
-                articles.append(data)
-            continue
+                found[url] = data
+            return None
 
         # 列表/未知页：在同栏目内继续扩展
         if depth < max_depth:
             links = extract_section_links(final_url, soup, base_canon)
-            for link in links:
-                if link not in seen and _is_same_column(base_canon, link):
-                    q.append((link, depth + 1))
+            links = [link for link in sorted(links) if _is_same_column(base_canon, link)]
+            if incremental:
+                return _follow_above_watermark(url, links, link_dates(final_url, soup, links), cutoff, is_seen,
+                                               logger)
+            return links
+        return None
 
-    return articles
+    visited = await _level_bfs(base_canon, visit, logger, max_depth=max_depth, max_pages=max_pages,
+                               concurrency=concurrency)
+    return [found[url] for url in visited if url in found]
 
 # -------------------- 单页入口：保留并升级 --------------------
 async def general_crawler(url: str, logger) -> Tuple[int, Union[Set[str], Dict]]:
@@ -624,14 +800,16 @@ async def general_crawler(url: str, logger) -> Tuple[int, Union[Set[str], Dict]]
     # 1) 抓页面
     try:
         response, final_url = await _fetch(url, logger)
-    except Exception:
-        return -7, {}
+    except ContentRejected:
+        return -3, {}
+    except Exception as e:
+        return (-7 if is_retryable(e) else -4), {}
 
     # 2) 解码 + 解析
     text = _decode_response_text(response, logger)
     if not text:
-        return -7, {}
-    soup = BeautifulSoup(text, "html.parser")
+        return -4, {}
+    soup = make_soup(text, logger)
 
     # 3) 判定
     ptype = classify_page(final_url, soup)
@@ -644,8 +822,9 @@ async def general_crawler(url: str, logger) -> Tuple[int, Union[Set[str], Dict]]
             # 降级：保留同域新闻感链接（不强制同栏目）
             links = set()
             domain = urlsplit(final_url).netloc
+            zones = _excluded_zones(soup)
             for a in soup.find_all("a", href=True):
-                if _is_in_excluded_zone(a):
+                if a in zones:
                     continue
                 href = (a.get("href") or "").strip()
                 if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
@@ -659,7 +838,7 @@ async def general_crawler(url: str, logger) -> Tuple[int, Union[Set[str], Dict]]
             return 1, links
 
     # 3.b 详情页：抽三要素（不足则 LLM 兜底一次）
-    data = extract_article_three_fields(final_url, text, soup, call_llm_once=True, logger=logger)
+    data = await extract_article_three_fields(final_url, text, soup, call_llm_once=True, logger=logger)
     if all(data.get(k) for k in ("title", "publish_time", "content")):
         return 11, data
 
@@ -667,91 +846,216 @@ async def general_crawler(url: str, logger) -> Tuple[int, Union[Set[str], Dict]]
     return 0, {}
 
 
-from collections import deque
 
-async def smart_crawler(
+
+def parse_bfs_page(raw: bytes, charset_hint: Optional[str], content_type: str, final_url: str,
+                   base_canon: str, expand: bool, with_dates: bool = False) -> Dict:
+    """
+    BFS 中单页的 CPU 部分（解码 → 建树 → 页面判定 → 同栏目链接），由 scrapers.parse_pool 在子进程中执行。
+    返回 {'flag': -4 | 1, 'detail': bool, 'links': [...], 'dates': {...}, 'encoding': ..., 'logs': [...]}；
+    expand=False 时不收集子链接；with_dates=True 时 dates 为子链接的发布日期（link_dates）。
+    """
+    logger = LogBuffer()
+    out = {'flag': 1, 'detail': False, 'links': [], 'dates': {}, 'logs': logger.records}
+    t, out['encoding'] = _decode_bytes(raw, charset_hint, content_type, logger)
+    if not t:
+        out['flag'] = -4
+        return out
+    sp = make_soup(t, logger)
+
+    # 判定类型
+    if classify_page(final_url, sp) == "detail" or _is_detail_like_url(final_url):
+        out['detail'] = True
+    elif expand:
+        out['links'] = list(extract_section_links(final_url, sp, base_canon))
+        if with_dates:
+            out['dates'] = link_dates(final_url, sp, out['links'])
+    return out
+
+
+# 流式 BFS 中已发现、尚未被消费的详情页数；消费方处理慢时 BFS 在此等待（背压）
+SMART_CRAWLER_BUFFER = 64
+
+
+async def iter_smart_crawler(
     url: str,
     logger,
     *,
     max_depth: int = 3,
     max_pages: int = 1000,
-) -> Tuple[int, Union[Set[str], Dict]]:
+    concurrency: int = BFS_CONCURRENCY,
+    within_days: Optional[int] = None,
+    is_seen=None,
+    parse_articles: bool = False,
+) -> AsyncIterator[Tuple[int, Union[str, Dict]]]:
     """
-    融合入口：
-      - 若是详情页：抽三要素（缺任一 → 模型兜底一次）→ (11, article_dict)
-      - 若是列表/未知页：同栏目 BFS 深爬，深入至 max_depth 层，仅收集“详情页 URL”集合 → (1, set[str])
-
-    返回 (flag, payload) 兼容老接口：
-      - flag < 0 : 错误（-7 为网络/解码问题）
-      - flag = 0 : 解析失败
-      - flag = 1 : 列表页（payload 为同栏目内 BFS 收集到的文章详情 URL 集合）
-      - flag = 11: 详情页解析成功（payload 为 {title, content, publish_time, ...}）
+    smart_crawler 的流式版本：边 BFS 边产出 (flag, payload)，不必等整个栏目爬完。
+      - 入口是详情页：产出一次 (11, article_dict)，抽取失败为 (0, {})
+      - 入口抓取失败：产出一次 (-7, {})、(-4, {}) 或 (-3, {})
+      - 入口是列表/未知页：同栏目 BFS，每发现一个详情页产出一次（同一 URL 只产出一次）：
+          parse_articles=False → (1, 详情页 URL)
+          parse_articles=True  → (11, article_dict)；抽取失败的详情页不产出
+    其余参数同 smart_crawler。提前停止迭代（break / aclose）会取消尚未完成的 BFS。
     """
-    # 站点专用分发（与 general_crawler 保持一致）
-    parsed_url = urlparse(url)
-    init_domain = parsed_url.netloc
-
     # 抓入口页
     try:
         resp, final_url = await _fetch(url, logger)
-    except Exception:
-        return -7, {}
+    except ContentRejected:
+        yield -3, {}
+        return
+    except Exception as e:
+        yield (-7 if is_retryable(e) else -4), {}
+        return
 
     text = _decode_response_text(resp, logger)
     if not text:
-        return -7, {}
-    soup = BeautifulSoup(text, "html.parser")
+        yield -4, {}
+        return
+    soup = make_soup(text, logger)
 
     # 页面类型判定
     ptype = classify_page(final_url, soup)
 
     # --- 情况 A：详情页 → 直接抽三要素（不足则 LLM 兜底一次） ---
     if ptype == "detail" or _is_detail_like_url(final_url):
-        data = extract_article_three_fields(final_url, text, soup, call_llm_once=True, logger=logger)
+        data = await extract_article_three_fields(final_url, text, soup, call_llm_once=True, logger=logger)
         if all(data.get(k) for k in ("title", "publish_time", "content")):
-            return 11, data
-        return 0, {}
+            yield 11, data
+        else:
+            yield 0, {}
+        return
 
-    # --- 情况 B：列表/未知页 → 同栏目 BFS，收集“文章详情 URL 集合” ---
+    # --- 情况 B：列表/未知页 → 同栏目 BFS（同一层并发抓取），发现详情页即交给消费方 ---
     base_canon = _canonicalize(final_url)
-    seen: Set[str] = set()
-    article_urls: Set[str] = set()
-    q = deque()
-    q.append((base_canon, 0))
+    emitted: Set[str] = set()
+    found: asyncio.Queue = asyncio.Queue(SMART_CRAWLER_BUFFER)
+    patterns = get_url_pattern_store()
+    charsets = get_charset_memory()
+    incremental = bool(within_days or is_seen)
+    cutoff = _date_cutoff(within_days)
+
+    async def emit(detail_url: str, page: Optional[FetchedPage] = None):
+        if detail_url in emitted:
+            return
+        emitted.add(detail_url)
+        if not parse_articles:
+            await found.put((1, detail_url))
+            return
+        # 需要正文时，按 URL 模板直接认定的详情页此时才抓取（已见过的不再抓取）
+        if page is None:
+            if is_seen and is_seen(detail_url):
+                return
+            try:
+                page, _ = await _fetch(detail_url, logger)
+            except Exception as e:
+                logger.debug(f"BFS fetch fail: {detail_url} - {e}")
+                return
+        page_text = _decode_response_text(page, logger)
+        if not page_text:
+            return
+        data = await extract_article_three_fields(page.url, page_text, make_soup(page_text, logger),
+                                                  call_llm_once=True, logger=logger)
+        if all(data.get(k) for k in ("title", "publish_time", "content")):
+            await found.put((11, data))
 
-    while q and len(seen) < max_pages:
-        cur_url, depth = q.popleft()
-        cur_url = _canonicalize(cur_url)
-        if cur_url in seen:
-            continue
-        seen.add(cur_url)
+    async def visit(cur_url: str, depth: int):
+        # URL 模板已学到结论的（scrapers/url_patterns.py）：详情页直接收集，junk 直接丢弃，都不再抓取判定
+        route = patterns.route(cur_url) if depth > 0 else None
+        if route == 'skip':
+            return None
+        if route == 'detail':
+            await emit(cur_url)
+            return None
 
         try:
             r, fu = await _fetch(cur_url, logger)
         except Exception as e:
             logger.debug(f"BFS fetch fail: {cur_url} - {e}")
-            continue
-
-        t = _decode_response_text(r, logger)
-        if not t:
-            continue
-        sp = BeautifulSoup(t, "html.parser")
+            return None
 
-        # 判定类型
-        cur_type = classify_page(fu, sp)
+        # 解码/建树/判定在解析进程池中执行
+        parsed = await run_parse(parse_bfs_page, r.content or b"", charsets.get(fu), r.headers.get("Content-Type", ""),
+                                 fu, base_canon, depth < max_depth, incremental, logger=logger)
+        charsets.remember(fu, parsed.get('encoding'))
+        if parsed['flag'] < 0:
+            return None
 
-        # 命中“详情页” → 收集 URL（不解析正文，满足 flag=1 的接口要求）
-        if cur_type == "detail" or _is_detail_like_url(fu):
-            article_urls.add(_canonicalize(fu))
-            continue
+        # 命中“详情页” → 产出 URL（或正文）
+        if parsed['detail']:
+            await emit(_canonicalize(fu), r)
+            return None
 
         # 列表/未知 → 仅在同栏目内继续扩展
-        if depth < max_depth:
-            children = extract_section_links(fu, sp, base_canon)
-            for link in children:
-                if link not in seen and _is_same_column(base_canon, link):
-                    q.append((link, depth + 1))
+        if parsed['links']:
+            patterns.record(cur_url, 'list')
+        links = [_canonicalize(link) for link in sorted(parsed['links']) if _is_same_column(base_canon, link)]
+        if incremental:
+            dates = {_canonicalize(link): date for link, date in parsed['dates'].items()}
+            return _follow_above_watermark(cur_url, links, dates, cutoff, is_seen, logger)
+        return links
+
+    async def crawl():
+        # 正常结束或出错时放入结束标记；被取消（消费方已停止）时不放，避免在满队列上等待
+        try:
+            await _level_bfs(base_canon, visit, logger, max_depth=max_depth, max_pages=max_pages,
+                             concurrency=concurrency)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await found.put(e)
+            return
+        await found.put(None)
+
+    bfs = asyncio.create_task(crawl())
+    try:
+        while True:
+            item = await found.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if not bfs.done():
+            bfs.cancel()
+            try:
+                await bfs
+            except asyncio.CancelledError:
+                pass
+
+
+async def smart_crawler(
+    url: str,
+    logger,
+    *,
+    max_depth: int = 3,
+    max_pages: int = 1000,
+    concurrency: int = BFS_CONCURRENCY,
+    within_days: Optional[int] = None,
+    is_seen=None,
+) -> Tuple[int, Union[Set[str], Dict]]:
+    """
+    融合入口（iter_smart_crawler 的汇总封装）：
+      - 若是详情页：抽三要素（缺任一 → 模型兜底一次）→ (11, article_dict)
+      - 若是列表/未知页：同栏目 BFS 深爬，深入至 max_depth 层，仅收集“详情页 URL”集合 → (1, set[str])
+        同一层最多 concurrency 个页面并发抓取（默认 BFS_CONCURRENCY）
+      - within_days / is_seen（如 URL 库的 __contains__）任一给出时为增量模式：发布日期早于 within_days 天前
+        或已见过的文章链接不再跟进，列表页上的文章链接全部如此时不再跟进其分页
+
+    返回 (flag, payload) 兼容老接口：
+      - flag < 0 : 错误（-7 为网络 / 超时 / 5xx，可稍后重试；-4 为 4xx 或解码失败，
+                   -3 为非 HTML，都不应重试）
+      - flag = 0 : 解析失败
+      - flag = 1 : 列表页（payload 为同栏目内 BFS 收集到的文章详情 URL 集合）
+      - flag = 11: 详情页解析成功（payload 为 {title, content, publish_time, ...}）
+    """
+    article_urls: Set[str] = set()
+    async for flag, payload in iter_smart_crawler(url, logger, max_depth=max_depth, max_pages=max_pages,
+                                                  concurrency=concurrency, within_days=within_days,
+                                                  is_seen=is_seen):
+        if flag != 1:
+            return flag, payload
+        article_urls.add(payload)
 
     # 无论是否抓到文章 URL，都是“列表页”语义，返回 flag=1
     return 1, article_urls
-
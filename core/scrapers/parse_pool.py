@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# CPU 密集的页面解析（解码、建树、特征遍历、GNE、标题打分、脚本块挖掘）放到进程池执行，
+# 事件循环只负责 I/O；LLM 调用仍在主进程。
+#
+# 约定：worker 函数是模块级函数，参数为原始字节 / content-type / final_url 等可 pickle 的值，
+# 返回紧凑的 dict；子进程里用 LogBuffer 代替 logger，日志随结果带回主进程再输出。
+#
+# PARSE_WORKERS: 进程数；0 表示不启用进程池，在线程中解析（不做 pickle，但受 GIL 限制）。
+# 进程池统一使用 spawn 启动（Windows 下也只有 spawn），入口脚本需有 __main__ 保护。
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Tuple
+
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', max(1, min(4, (os.cpu_count() or 2) - 1))))
+
+
+class LogBuffer:
+    """子进程中使用的 logger 替身，记录 (level, message)。"""
+
+    def __init__(self):
+        self.records: List[Tuple[str, str]] = []
+
+    def debug(self, msg, *args, **kwargs):
+        self.records.append(('debug', str(msg)))
+
+    def info(self, msg, *args, **kwargs):
+        self.records.append(('info', str(msg)))
+
+    def warning(self, msg, *args, **kwargs):
+        self.records.append(('warning', str(msg)))
+
+    def error(self, msg, *args, **kwargs):
+        self.records.append(('error', str(msg)))
+
+
+def replay_logs(records: Optional[List[Tuple[str, str]]], logger) -> None:
+    if not records or logger is None:
+        return
+    for level, msg in records:
+        getattr(logger, level, logger.info)(msg)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+stats = {'pool': 0, 'thread': 0, 'broken': 0}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_parse(func: Callable[..., Any], *args, logger=None) -> Any:
+    """
+    在解析进程池中执行 func(*args)；结果为 dict 且带 'logs' 时，在主进程用 logger 输出。
+    进程池损坏（子进程崩溃等）时重建，本次改在线程中执行。
+    """
+    result = None
+    if PARSE_WORKERS > 0:
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(_get_pool(), func, *args)
+            stats['pool'] += 1
+        except BrokenProcessPool:
+            stats['broken'] += 1
+            if logger:
+                logger.warning(f"parse pool broken while running {func.__name__}, restarting it")
+            _reset_pool()
+    if result is None:
+        result = await asyncio.to_thread(func, *args)
+        stats['thread'] += 1
+    if isinstance(result, dict):
+        replay_logs(result.pop('logs', None), logger)
+    return result
+
+
+def close_parse_pool(logger=None) -> None:
+    """退出前调用：关闭解析进程池。"""
+    if logger and (stats['pool'] or stats['thread']):
+        logger.info(f"parse pool closing: {stats}")
+    _reset_pool()
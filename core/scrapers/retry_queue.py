@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# 抓取失败的 URL 不再在请求路径里 sleep 等待，而是交给延迟重试：
+# - RetryQueue: 单次 pipeline 内按 URL 记录失败次数，指数退避（带抖动）后重新投递到 crawl 阶段，
+#   等待期间 worker 继续处理其它 URL
+# - DeadLetterStore: 超过最大次数仍失败的 URL 落到 crawler_state.db 的 dead_letters 表，
+#   可查看、可重放（见 scripts/dead_letters.py）
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from utils.general_utils import get_project_path
+
+RETRY_MAX_ATTEMPTS = int(os.environ.get('CRAWL_RETRY_MAX_ATTEMPTS', 3))
+RETRY_BASE_DELAY = float(os.environ.get('CRAWL_RETRY_BASE_DELAY', 30))
+RETRY_MAX_DELAY = 600
+
+
+class DeadLetterStore:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS dead_letters ('
+            'url TEXT PRIMARY KEY, attempts INTEGER, reason TEXT, context TEXT, '
+            'first_failed REAL, last_failed REAL)'
+        )
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM dead_letters').fetchone()[0]
+
+    def add(self, url: str, attempts: int, reason: str = '', context: Optional[Dict] = None) -> None:
+        """记录一次最终失败；同一 URL 再次失败时累加次数、保留首次失败时间。"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT INTO dead_letters (url, attempts, reason, context, first_failed, last_failed) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET attempts=attempts+excluded.attempts, reason=excluded.reason, '
+                'context=excluded.context, last_failed=excluded.last_failed',
+                (url, attempts, reason, json.dumps(context or {}, ensure_ascii=False), now, now))
+            self.conn.commit()
+
+    def list(self, limit: int = 100) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT url, attempts, reason, context, first_failed, last_failed FROM dead_letters '
+                'ORDER BY last_failed DESC LIMIT ?', (limit,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def pop(self, limit: int = 100) -> List[Dict]:
+        """取出（并删除）最早失败的若干条，用于重放；重放再失败会被重新写入。"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT url, attempts, reason, context, first_failed, last_failed FROM dead_letters '
+                'ORDER BY first_failed LIMIT ?', (limit,)).fetchall()
+            self.conn.executemany('DELETE FROM dead_letters WHERE url=?', [(row[0],) for row in rows])
+            self.conn.commit()
+        return [self._row(row) for row in rows]
+
+    def remove(self, url: str) -> None:
+        with self._lock:
+            self.conn.execute('DELETE FROM dead_letters WHERE url=?', (url,))
+            self.conn.commit()
+
+    @staticmethod
+    def _row(row) -> Dict:
+        return {'url': row[0], 'attempts': row[1], 'reason': row[2], 'context': json.loads(row[3] or '{}'),
+                'first_failed': row[4], 'last_failed': row[5]}
+
+
+_store: Optional[DeadLetterStore] = None
+
+
+def get_dead_letter_store() -> DeadLetterStore:
+    global _store
+    if _store is None:
+        _store = DeadLetterStore(get_project_path('crawler_state.db'))
+    return _store
+
+
+class RetryQueue:
+    """
+    单次 pipeline 的重试调度。
+
+    stage: 失败 URL 重新投递的阶段（需要 put_later，即 utils.stages.Stage）
+    context: 写入死信时附带的信息（category / within_days 等），重放时原样使用
+    """
+
+    def __init__(self, stage, logger, *, context: Optional[Dict] = None,
+                 max_attempts: int = RETRY_MAX_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY, store: Optional[DeadLetterStore] = None):
+        self.stage = stage
+        self.logger = logger
+        self.context = context or {}
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.store = store
+        self.attempts: Dict[str, int] = {}
+        self.retried = 0
+        self.dead = 0
+
+    def next_delay(self, url: str) -> Optional[float]:
+        """记一次失败；还能重试则返回等待秒数，否则返回 None。"""
+        attempts = self.attempts.get(url, 0) + 1
+        self.attempts[url] = attempts
+        if attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def schedule(self, url: str, reason: str = '') -> bool:
+        """失败 URL 进入延迟重试；次数用尽则写入死信，返回 False。"""
+        delay = self.next_delay(url)
+        if delay is None:
+            self.dead += 1
+            self.logger.warning(f"{url} failed {self.attempts[url]} times, moved to dead letters")
+            (self.store or get_dead_letter_store()).add(url, self.attempts[url], reason, self.context)
+            return False
+        self.retried += 1
+        self.logger.info(f"{url} fetch failed (attempt {self.attempts[url]}), retry in {delay:.0f}s")
+        self.stage.put_later(url, delay)
+        return True
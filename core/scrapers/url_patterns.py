@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# 按域名学习的 URL 路径模板：
+#   https://www.hebei.gov.cn/columns/de3fe4ea-.../202505/30/5f1c...e2.html
+#     → www 去掉后的域名 hebei.gov.cn + /columns/<uuid>/<yyyymm>/<dd>/<uuid>.html
+# 每次抓取+判定后按模板累计 detail / list / junk 次数（crawler_state.db 的 url_patterns 表）。
+# 样本足够且结论一致的模板可直接预测：
+#   - detail: 列表收割出的 URL 直接走正文抽取，BFS 中不必再抓取判定
+#   - junk:   非 HTML 的模板在请求前丢弃（保留少量探索，模板变化时可自我纠正）；
+#             抽取失败（flag 0）不计入，LLM 故障时不会把详情页模板学成 junk
+# 硬编码的 DETAIL_PATTERNS / DATE_IN_URL 仍然生效，这里只是补充。
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from utils.general_utils import get_project_path
+
+URL_PATTERN_MIN_SAMPLES = int(os.environ.get('URL_PATTERN_MIN_SAMPLES', 5))
+URL_PATTERN_CONFIDENCE = float(os.environ.get('URL_PATTERN_CONFIDENCE', 0.9))
+# 预测为 junk 的 URL 仍有这个比例会被抓取，用来发现模板含义的变化
+URL_PATTERN_EXPLORE = float(os.environ.get('URL_PATTERN_EXPLORE', 0.05))
+
+KINDS = ('detail', 'list', 'junk')
+
+_UUID_RE = re.compile(r"[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}")
+_HEX_RE = re.compile(r"(?<![0-9a-z])(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{16,}(?![0-9a-z])")
+_DIGITS_RE = re.compile(r"\d+")
+_SLUG_RE = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+){2,}")
+_EXT_RE = re.compile(r"\.[a-z0-9]{1,5}$")
+
+
+def _month_ok(mm: str) -> bool:
+    return 1 <= int(mm) <= 12
+
+
+def _digits_placeholder(run: str) -> str:
+    if run[:2] in ('19', '20'):
+        if len(run) == 8 and _month_ok(run[4:6]) and 1 <= int(run[6:]) <= 31:
+            return '<yyyymmdd>'
+        if len(run) == 6 and _month_ok(run[4:]):
+            return '<yyyymm>'
+        if len(run) == 4:
+            return '<yyyy>'
+    return '<n>'
+
+
+def _segment_template(seg: str, prev: str, last: bool) -> str:
+    ext_m = _EXT_RE.search(seg)
+    ext = ext_m.group(0) if ext_m else ''
+    stem = seg[:len(seg) - len(ext)]
+
+    # 文件名是多段英文 slug（如 my-first-article）时整体归一，否则每篇文章一个模板
+    if last and _SLUG_RE.fullmatch(stem) and sum(bool(re.search(r"[a-z]{2,}", p)) for p in re.split(r"[-_]", stem)) >= 2:
+        return '<slug>' + ext
+    # 日期目录下的 1~2 位数字段：/<yyyy>/<mm>/<dd>/、/<yyyymm>/<dd>/
+    if stem.isdigit() and len(stem) <= 2:
+        if prev == '<yyyy>':
+            return '<mm>' + ext
+        if prev in ('<yyyymm>', '<mm>'):
+            return '<dd>' + ext
+    stem = _UUID_RE.sub('<uuid>', stem)
+    stem = _HEX_RE.sub('<uuid>', stem)
+    stem = _DIGITS_RE.sub(lambda m: _digits_placeholder(m.group(0)), stem)
+    return stem + ext
+
+
+def _domain(netloc: str) -> str:
+    netloc = netloc.lower().split('@')[-1]
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def url_template(url: str) -> Optional[tuple]:
+    """返回 (域名, 路径模板)；查询串只保留参数名（排序后）。无法解析时返回 None。"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+    if not parts.netloc:
+        return None
+    segments = (parts.path or '/').lower().split('/')
+    last = max((i for i, seg in enumerate(segments) if seg), default=-1)  # 末尾 / 不算一段
+    out = []
+    prev = ''
+    for idx, seg in enumerate(segments):
+        tpl = _segment_template(seg, prev, idx == last) if seg else ''
+        out.append(tpl)
+        prev = tpl
+    template = '/'.join(out) or '/'
+    if parts.query:
+        keys = sorted({k for k, _ in parse_qsl(parts.query, keep_blank_values=True)})
+        if keys:
+            template += '?' + '&'.join(keys)
+    return _domain(parts.netloc), template
+
+
+class UrlPatternStore:
+    def __init__(self, path: str, *, min_samples: int = URL_PATTERN_MIN_SAMPLES,
+                 confidence: float = URL_PATTERN_CONFIDENCE, explore: float = URL_PATTERN_EXPLORE):
+        self.min_samples = max(1, min_samples)
+        self.confidence = confidence
+        self.explore = explore
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS url_patterns ('
+            'domain TEXT, template TEXT, detail INTEGER DEFAULT 0, list INTEGER DEFAULT 0, '
+            'junk INTEGER DEFAULT 0, updated_at REAL, PRIMARY KEY (domain, template))'
+        )
+        self.conn.commit()
+        # 域名 → {模板: [detail, list, junk]}，按域名首次访问时从库中加载
+        self._domains: Dict[str, Dict[str, List[int]]] = {}
+        self.stats = {'recorded': 0, 'routed_detail': 0, 'skipped': 0, 'explored': 0}
+
+    def _counts(self, domain: str) -> Dict[str, List[int]]:
+        templates = self._domains.get(domain)
+        if templates is None:
+            rows = self.conn.execute(
+                'SELECT template, detail, list, junk FROM url_patterns WHERE domain=?', (domain,)).fetchall()
+            templates = {row[0]: [row[1], row[2], row[3]] for row in rows}
+            self._domains[domain] = templates
+        return templates
+
+    def record(self, url: str, kind: str) -> None:
+        """记录一次判定结果；kind 为 detail / list / junk。"""
+        key = url_template(url)
+        if key is None or kind not in KINDS:
+            return
+        domain, template = key
+        column = KINDS.index(kind)
+        with self._lock:
+            counts = self._counts(domain).setdefault(template, [0, 0, 0])
+            counts[column] += 1
+            self.conn.execute(
+                f'INSERT INTO url_patterns (domain, template, {kind}, updated_at) VALUES (?, ?, 1, ?) '
+                f'ON CONFLICT(domain, template) DO UPDATE SET {kind}={kind}+1, updated_at=excluded.updated_at',
+                (domain, template, time.time()))
+            self.conn.commit()
+            self.stats['recorded'] += 1
+
+    def predict(self, url: str) -> Optional[str]:
+        """模板样本数 >= min_samples 且某一类占比 >= confidence 时返回该类，否则返回 None。"""
+        key = url_template(url)
+        if key is None:
+            return None
+        domain, template = key
+        with self._lock:
+            counts = self._counts(domain).get(template)
+        if not counts:
+            return None
+        total = sum(counts)
+        if total < self.min_samples:
+            return None
+        best = max(range(len(KINDS)), key=lambda i: counts[i])
+        if counts[best] / total < self.confidence:
+            return None
+        return KINDS[best]
+
+    def route(self, url: str) -> Optional[str]:
+        """
+        列表收割出的候选 URL 如何处理：
+          'detail' 直接按详情页处理；'skip' 请求前丢弃；None 照常抓取判定。
+        预测为 junk 的 URL 按 explore 比例放行少量，以便模板含义变化时重新学习。
+        """
+        kind = self.predict(url)
+        if kind == 'detail':
+            self.stats['routed_detail'] += 1
+            return 'detail'
+        if kind == 'junk':
+            if random.random() < self.explore:
+                self.stats['explored'] += 1
+                return None
+            self.stats['skipped'] += 1
+            return 'skip'
+        return None
+
+    def templates(self, domain: str) -> Dict[str, Dict[str, int]]:
+        """某个域名已学到的模板及计数（调试用）。"""
+        with self._lock:
+            counts = dict(self._counts(_domain(domain)))
+        return {tpl: dict(zip(KINDS, c)) for tpl, c in sorted(counts.items())}
+
+
+_store: Optional[UrlPatternStore] = None
+
+
+def get_url_pattern_store() -> UrlPatternStore:
+    global _store
+    if _store is None:
+        _store = UrlPatternStore(get_project_path('crawler_state.db'))
+    return _store
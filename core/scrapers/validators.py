@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# 列表页条件请求：按 URL 记录 ETag / Last-Modified 与上次抽取出的链接集合哈希。
+# - 服务器支持校验头：下次请求带 If-None-Match / If-Modified-Since，304 直接短路
+# - 服务器不支持：对抽取出的链接集合做哈希，与上次一致则跳过下游处理
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from utils.general_utils import get_project_path
+
+
+def links_digest(links: Iterable[str]) -> str:
+    h = hashlib.sha1()
+    for link in sorted(links):
+        h.update(link.encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+class ValidatorStore:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS validators ('
+            'url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, links_hash TEXT, updated_at REAL)'
+        )
+        self.conn.commit()
+
+    def get(self, url: str) -> Dict[str, Optional[str]]:
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified, links_hash FROM validators WHERE url=?', (url,)).fetchone()
+        if not row:
+            return {}
+        return {'etag': row[0], 'last_modified': row[1], 'links_hash': row[2]}
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        record = self.get(url)
+        headers = {}
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def save(self, url: str, response_headers, links_hash: Optional[str] = None) -> None:
+        etag = response_headers.get('ETag') if response_headers is not None else None
+        last_modified = response_headers.get('Last-Modified') if response_headers is not None else None
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO validators (url, etag, last_modified, links_hash, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, etag, last_modified, links_hash, time.time()))
+            self.conn.commit()
+
+
+_store: Optional[ValidatorStore] = None
+
+
+def get_validator_store() -> ValidatorStore:
+    global _store
+    if _store is None:
+        _store = ValidatorStore(get_project_path('crawler_state.db'))
+    return _store
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 兜底输入的压缩效果：scrapers/content_reducer.reduce_for_llm 每页的 token 数（整页可见文本 → 正文区域 + 上下文）
+  - strategy: region（找到正文区域）/ full（退回全页文本）；T 表示被 token 预算截断
+  - coverage: GNE 抽出的正文行（去空白）有多少出现在压缩结果里，用来粗看区域是否选对
+  - legacy: 原逻辑下的结果（整页可见文本超过 29999 字符时直接放弃，flag 0）
+
+语料：--corpus 目录下的 *.html / *.htm，或 --cache（原始 HTML 缓存）。
+
+用法（在 core 目录下）: python scripts/bench_content_reducer.py (--corpus DIR | --cache) [--budget 6000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gne import GeneralNewsExtractor  # noqa: E402
+from scrapers.content_reducer import LLM_TEXT_TOKEN_BUDGET, reduce_for_llm  # noqa: E402
+from scrapers.decoder import decode_html  # noqa: E402
+from scrapers.html_parser import make_soup, page_text  # noqa: E402
+
+LEGACY_MAX_CHARS = 29999
+
+
+def load_pages(args):
+    pages = []
+    if args.cache:
+        from scrapers.html_cache import get_html_cache
+        cache = get_html_cache()
+        if cache is not None:
+            pages = [(url, ct, raw) for url, ct, raw in cache.iter_pages(args.limit)]
+    else:
+        for name in sorted(os.listdir(args.corpus)):
+            if name.lower().endswith(('.html', '.htm')):
+                with open(os.path.join(args.corpus, name), 'rb') as f:
+                    pages.append((name, '', f.read()))
+    return [(url, decode_html(raw, ct)[0]) for url, ct, raw in pages]
+
+
+def coverage(extractor, html: str, reduced: str) -> float:
+    try:
+        content = extractor.extract(html).get('content', '')
+    except Exception:
+        return float('nan')
+    lines = ["".join(line.split()) for line in content.split("\n") if line.strip()]
+    if not lines:
+        return float('nan')
+    squeezed = "".join(reduced.split())
+    return sum(line in squeezed for line in lines) / len(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default='')
+    parser.add_argument('--cache', action='store_true')
+    parser.add_argument('--limit', type=int, default=0)
+    parser.add_argument('--budget', type=int, default=LLM_TEXT_TOKEN_BUDGET)
+    args = parser.parse_args()
+    if not args.corpus and not args.cache:
+        parser.error('--corpus or --cache is required')
+
+    pages = load_pages(args)
+    if not pages:
+        print("no pages")
+        return
+    extractor = GeneralNewsExtractor()
+    total_before = total_after = rescued = 0
+    elapsed = 0.0
+    print(f"{'page':<40} {'tokens':>15} {'saved':>6} {'strategy':>9} {'coverage':>9} {'ms':>6} {'legacy':>7}")
+    for url, html in pages:
+        soup = make_soup(html, None)
+        start = time.perf_counter()
+        reduced = reduce_for_llm(soup, args.budget)
+        ms = (time.perf_counter() - start) * 1000
+        elapsed += ms
+        legacy_ok = 0 < len(page_text(html, soup)) <= LEGACY_MAX_CHARS
+        rescued += not legacy_ok and bool(reduced.text)
+        total_before += reduced.tokens_before
+        total_after += reduced.tokens_after
+        saved = 1 - reduced.tokens_after / reduced.tokens_before if reduced.tokens_before else 0.0
+        strategy = reduced.strategy + (' T' if reduced.truncated else '')
+        print(f"{url[-40:]:<40} {reduced.tokens_before:>6} -> {reduced.tokens_after:>5} {saved:>6.0%} {strategy:>9} "
+              f"{coverage(extractor, html, reduced.text):>9.2f} {ms:>6.1f} {'ok' if legacy_ok else 'flag 0':>7}")
+    print(f"{len(pages)} pages, budget {args.budget}: {total_before} -> {total_after} tokens "
+          f"({1 - total_after / max(total_before, 1):.0%} saved), {elapsed / len(pages):.1f} ms/page, "
+          f"{rescued} pages over the old {LEGACY_MAX_CHARS}-char limit now sent to the model")
+
+
+if __name__ == '__main__':
+    main()
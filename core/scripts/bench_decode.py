@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+页面解码基准：每页的解码耗时（改动前 / 改动后）
+  - legacy-general: 原 general_crawler._decode_html（头部 / meta 之后对整页跑 charset_normalizer）
+  - legacy-chardet: 原 dashboard simple_crawler（整页 chardet.detect）
+  - decoder-cold:   scrapers/decoder.py，域名没有记忆（首次抓取）
+  - decoder-warm:   scrapers/decoder.py，已记住该域名的编码
+并以 legacy-general 为基准校验解码出的文本是否一致。
+
+语料：--corpus 目录下的 *.html / *.htm，或 --cache（原始 HTML 缓存）。每页除原始字节外，
+再生成去掉 <meta charset> 的 gb18030 / big5 版本（无法编码的字符跳过），模拟“没有任何声明”的最坏情况。
+
+用法（在 core 目录下）: python scripts/bench_decode.py (--corpus DIR | --cache) [--repeat 3]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.decoder import cn_from_bytes, chardet, decode_html, normalize_encoding  # noqa: E402
+
+META_RE = re.compile(br"<meta[^>]+charset=[^>]*>", re.I)
+
+
+def legacy_general(raw: bytes, ct: str) -> str:
+    m = re.search(r"charset=([^\s;]+)", ct, flags=re.I)
+    enc = normalize_encoding(m.group(1)) if m else None
+    if not enc:
+        head = raw[:8192]
+        m = re.search(br"<meta[^>]+charset=['\"]?\s*([a-zA-Z0-9_\-]+)", head, flags=re.I)
+        if m:
+            enc = normalize_encoding(m.group(1).decode("ascii", "ignore"))
+    if not enc and cn_from_bytes:
+        try:
+            r = cn_from_bytes(raw).best()
+            if r and r.encoding:
+                enc = normalize_encoding(r.encoding)
+        except Exception:
+            pass
+    for cand in [enc, "utf-8", "gb18030", "cp936", "big5"]:
+        if not cand:
+            continue
+        try:
+            return raw.decode(cand)
+        except Exception:
+            continue
+    return raw.decode("utf-8", errors="replace")
+
+
+def legacy_chardet(raw: bytes, ct: str) -> str:
+    try:
+        return raw.decode(chardet.detect(raw)['encoding'])
+    except Exception:
+        return raw.decode("utf-8", errors="replace")
+
+
+def load_pages(args):
+    pages = []
+    if args.cache:
+        from scrapers.html_cache import get_html_cache
+        cache = get_html_cache()
+        if cache is not None:
+            pages = [(url, ct, raw) for url, ct, raw in cache.iter_pages(args.limit)]
+    else:
+        for name in sorted(os.listdir(args.corpus)):
+            if name.lower().endswith(('.html', '.htm')):
+                with open(os.path.join(args.corpus, name), 'rb') as f:
+                    pages.append((name, '', f.read()))
+    variants = []
+    for name, ct, raw in pages:
+        variants.append((f"{name} (as served)", ct, raw, None))
+        text = legacy_general(raw, ct)
+        stripped = META_RE.sub(b"", text.encode('utf-8')).decode('utf-8')
+        for enc in ('gb18030', 'big5'):
+            variants.append((f"{name} ({enc}, undeclared)", '', stripped.encode(enc, errors='ignore'), enc))
+    return variants
+
+
+def bench(label, pages, run, repeat):
+    best = float('inf')
+    outputs = []
+    for _ in range(repeat):
+        outputs = []
+        start = time.perf_counter()
+        for name, ct, raw, enc in pages:
+            outputs.append(run(raw, ct, enc))
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / len(pages), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default='')
+    parser.add_argument('--cache', action='store_true')
+    parser.add_argument('--limit', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    if not args.corpus and not args.cache:
+        parser.error('--corpus or --cache is required')
+
+    pages = load_pages(args)
+    if not pages:
+        print("no pages")
+        return
+    kb = sum(len(p[2]) for p in pages) / len(pages) / 1024
+    print(f"{len(pages)} page variants, {kb:.0f} KB/page on average; "
+          f"detector: {'charset_normalizer' if cn_from_bytes else 'chardet'}")
+
+    runs = [('legacy-general', lambda raw, ct, enc: legacy_general(raw, ct))]
+    if chardet:
+        runs.append(('legacy-chardet', lambda raw, ct, enc: legacy_chardet(raw, ct)))
+    runs.append(('decoder-cold', lambda raw, ct, enc: decode_html(raw, ct)[0]))
+    runs.append(('decoder-warm', lambda raw, ct, enc: decode_html(raw, ct, remembered=enc)[0]))
+
+    baseline = None
+    print(f"{'decoder':>16} {'ms/page':>9} {'speedup':>8} {'same text':>10}")
+    base_ms = None
+    for label, run in runs:
+        ms, outputs = bench(label, pages, run, args.repeat)
+        base_ms = base_ms or ms
+        baseline = baseline or outputs
+        same = sum(a == b for a, b in zip(outputs, baseline))
+        print(f"{label:>16} {ms:>9.2f} {base_ms / ms:>7.1f}x {same:>5}/{len(pages):<4}")
+
+
+if __name__ == '__main__':
+    main()
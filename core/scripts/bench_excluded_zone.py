@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+排除区域判断基准：在菜单很重的门户页上比较
+  - legacy: 每个 <a> / onclick 元素依次 el.find_parent(sel) 扫描 EXCLUDE_ANCESTOR_SELECTORS
+  - zones:  ExcludedZones 一次遍历标记后代 id，之后 O(1) 判断（含构建时间）
+并校验两者保留下来的元素完全一致。
+
+默认生成合成的门户页（--anchors 控制链接数量）；也可用 --corpus 指定保存的 HTML 目录，
+或用 --cache 取原始 HTML 缓存（scrapers/html_cache.py）中的页面。
+
+用法（在 core 目录下）: python scripts/bench_excluded_zone.py [--anchors 1000 5000 20000] [--corpus DIR | --cache [--limit N]]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.html_parser import make_soup  # noqa: E402
+from scrapers.dom_features import ExcludedZones  # noqa: E402
+from scrapers.new_llm_crawler import EXCLUDE_ANCESTOR_SELECTORS  # noqa: E402
+
+WORDS = "新闻 公告 政策 发布 会议 经济 发展 改革 通知 关于 工作 报告 科技 创新 数据 市场".split()
+
+
+def _words(rnd, n):
+    return "".join(rnd.choice(WORDS) for _ in range(n))
+
+
+def portal_page(n_anchors: int, seed: int = 1) -> str:
+    """一半以上的链接位于多层嵌套的 header/nav 菜单、侧栏和页脚中，其余在正文列表里。"""
+    rnd = random.Random(seed)
+    menu = n_anchors // 2
+    body = n_anchors - menu - n_anchors // 10
+    foot = n_anchors // 10
+    out = ['<!DOCTYPE html><html><head><title>门户</title></head><body><header><nav class="navbar"><ul class="menu">']
+    for i in range(menu):
+        out.append(f'<li class="dropdown"><div class="sub-menu"><ul><li><span>'
+                   f'<a href="/col{i % 40}/index.html">{_words(rnd, 2)}</a></span></li></ul></div></li>')
+    out.append('</ul></nav></header><div class="wrap"><div class="main"><div class="sidebar">')
+    for i in range(body):
+        if i % 7 == 0:
+            out.append(f'<div class="item"><span onclick="window.open(\'/news/{i}.html\')">{_words(rnd, 4)}</span></div>')
+        else:
+            out.append(f'<div class="item"><p><a href="/news/2024/{i % 12 + 1:02d}/{i}.html">{_words(rnd, 6)}</a></p></div>')
+    out.append('</div></div></div><footer><div class="links">')
+    for i in range(foot):
+        out.append(f'<a href="/about/{i}.html">{_words(rnd, 2)}</a>')
+    out.append('</div></footer></body></html>')
+    return "".join(out)
+
+
+def legacy_excluded(el) -> bool:
+    for sel in EXCLUDE_ANCESTOR_SELECTORS:
+        if el.find_parent(sel):
+            return True
+    return False
+
+
+def candidates(soup):
+    return soup.find_all("a", href=True) + soup.select('[onclick], [data-href], [data-url], [role="link"]')
+
+
+def bench(label: str, html: str, repeat: int) -> None:
+    soup = make_soup(html)
+    elements = candidates(soup)
+
+    best_legacy = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        kept_legacy = [el for el in elements if not legacy_excluded(el)]
+        best_legacy = min(best_legacy, time.perf_counter() - start)
+
+    best_zones = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        zones = ExcludedZones(soup, EXCLUDE_ANCESTOR_SELECTORS)
+        kept_zones = [el for el in elements if el not in zones]
+        best_zones = min(best_zones, time.perf_counter() - start)
+
+    same = [id(el) for el in kept_legacy] == [id(el) for el in kept_zones]
+    print(f"{label:>24} {len(elements):>8} {len(kept_zones):>6} {best_legacy * 1000:>10.1f} "
+          f"{best_zones * 1000:>9.2f} {best_legacy / best_zones:>8.0f}x  {'ok' if same else 'MISMATCH'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--anchors', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--corpus', default='')
+    parser.add_argument('--cache', action='store_true')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'page':>24} {'checked':>8} {'kept':>6} {'legacy ms':>10} {'zones ms':>9} {'speedup':>9}")
+    if args.cache:
+        from scrapers.html_cache import get_html_cache
+        cache = get_html_cache()
+        if cache is None:
+            print("html cache is disabled, set HTML_CACHE_MAX_MB")
+            return
+        for url, _, raw in cache.iter_pages(args.limit):
+            bench(url[-24:], raw.decode('utf-8', errors='replace'), args.repeat)
+    elif args.corpus:
+        for name in sorted(os.listdir(args.corpus)):
+            if name.lower().endswith(('.html', '.htm')):
+                with open(os.path.join(args.corpus, name), 'rb') as f:
+                    html = f.read().decode('utf-8', errors='replace')
+                bench(name[:24], html, args.repeat)
+    else:
+        for n in args.anchors:
+            bench(f"portal-{n}", portal_page(n), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
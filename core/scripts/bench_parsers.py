@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 解析后端基准：在保存下来的真实列表页/详情页语料上比较
+  - html.parser: BeautifulSoup(text, "html.parser")（原实现）
+  - lxml:        BeautifulSoup(text, "lxml")
+  - selectolax:  selectolax（lexbor）直接取链接与可见文本，不构建 bs4 树
+报告每个后端的解析 + 抽取耗时，并以 html.parser 为基准校验抽取出的链接（href + 锚文本）与可见文本是否一致。
+
+语料目录下每个 *.html / *.htm 文件为一个页面（原始字节）。可先用 --fetch 下载：
+  python scripts/bench_parsers.py --corpus work_dir/html_corpus --fetch urls.txt
+也可直接使用爬虫积累的原始 HTML 缓存（scrapers/html_cache.py）作为语料：--cache [--limit N]
+
+用法（在 core 目录下）: python scripts/bench_parsers.py (--corpus DIR | --cache) [--repeat 3] [--show-diff 3]
+"""
+import argparse
+import difflib
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from scrapers.html_parser import (LXML_AVAILABLE, SELECTOLAX_AVAILABLE, soup_links, soup_text,  # noqa: E402
+                                  harvest_links, page_text)
+
+
+def decode(raw: bytes) -> str:
+    for enc in ('utf-8', 'gb18030'):
+        try:
+            return raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode('utf-8', errors='replace')
+
+
+def load_corpus(corpus: str):
+    pages = []
+    for name in sorted(os.listdir(corpus)):
+        if name.lower().endswith(('.html', '.htm')):
+            with open(os.path.join(corpus, name), 'rb') as f:
+                pages.append((name, decode(f.read())))
+    return pages
+
+
+def load_cache(limit: int):
+    from scrapers.html_cache import get_html_cache
+
+    cache = get_html_cache()
+    if cache is None:
+        print("html cache is disabled, set HTML_CACHE_MAX_MB")
+        return []
+    return [(url, decode(raw)) for url, _, raw in cache.iter_pages(limit)]
+
+
+def fetch_corpus(corpus: str, url_file: str) -> None:
+    import httpx
+    from scrapers.http_client import header
+
+    os.makedirs(corpus, exist_ok=True)
+    with open(url_file, encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    with httpx.Client(headers=header, follow_redirects=True, timeout=30) as client:
+        for url in urls:
+            try:
+                resp = client.get(url)
+                resp.raise_for_status()
+            except Exception as e:
+                print(f"skip {url}: {e}")
+                continue
+            name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + '.html'
+            with open(os.path.join(corpus, name), 'wb') as f:
+                f.write(resp.content)
+            print(f"saved {url} -> {name} ({len(resp.content)} bytes)")
+
+
+def run_bs4(parser: str):
+    def _run(text):
+        soup = BeautifulSoup(text, parser)
+        return soup_links(soup), soup_text(soup)
+    return _run
+
+
+def run_selectolax(text):
+    return harvest_links(text), page_text(text)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default='')
+    parser.add_argument('--cache', action='store_true', help='使用原始 HTML 缓存作为语料')
+    parser.add_argument('--limit', type=int, default=0, help='--cache 时最多取多少页（0 为全部）')
+    parser.add_argument('--fetch', default='', help='先把该文件中的 URL（每行一个）下载到语料目录')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--show-diff', type=int, default=3, help='每个后端最多打印几个不一致页面的差异')
+    args = parser.parse_args()
+
+    if not args.corpus and not args.cache:
+        parser.error('--corpus or --cache is required')
+    if args.fetch:
+        fetch_corpus(args.corpus, args.fetch)
+    pages = load_cache(args.limit) if args.cache else load_corpus(args.corpus)
+    if not pages:
+        print(f"no html pages in {'the html cache' if args.cache else args.corpus}")
+        return
+    total_kb = sum(len(text.encode('utf-8')) for _, text in pages) / 1024
+    print(f"corpus: {len(pages)} pages, {total_kb:.0f} KB")
+
+    backends = [('html.parser', run_bs4('html.parser'))]
+    if LXML_AVAILABLE:
+        backends.append(('lxml', run_bs4('lxml')))
+    if SELECTOLAX_AVAILABLE:
+        backends.append(('selectolax', run_selectolax))
+
+    baseline = {}
+    print(f"{'backend':>12} {'ms/page':>9} {'speedup':>8} {'links ok':>9} {'text ok':>8}")
+    base_ms = None
+    for name, run in backends:
+        best = float('inf')
+        outputs = {}
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for page, text in pages:
+                outputs[page] = run(text)
+            best = min(best, time.perf_counter() - start)
+        ms = best * 1000 / len(pages)
+        base_ms = base_ms or ms
+        if not baseline:
+            baseline = outputs
+        links_ok = sum(outputs[p][0] == baseline[p][0] for p, _ in pages)
+        text_ok = sum(outputs[p][1] == baseline[p][1] for p, _ in pages)
+        print(f"{name:>12} {ms:>9.2f} {base_ms / ms:>7.1f}x {links_ok:>4}/{len(pages):<4} {text_ok:>3}/{len(pages):<4}")
+
+        shown = 0
+        for page, _ in pages:
+            if shown >= args.show_diff or outputs[page] == baseline[page]:
+                continue
+            shown += 1
+            for idx, label in ((0, 'links'), (1, 'text')):
+                if outputs[page][idx] == baseline[page][idx]:
+                    continue
+                a = baseline[page][idx] if idx else [f"{h} | {t}" for h, t in baseline[page][idx]]
+                b = outputs[page][idx] if idx else [f"{h} | {t}" for h, t in outputs[page][idx]]
+                a = a.split("\n") if idx else a
+                b = b.split("\n") if idx else b
+                diff = list(difflib.unified_diff(a, b, 'html.parser', name, n=0, lineterm=''))
+                print(f"  {page} {label} differs:")
+                for line in diff[2:12]:
+                    print(f"    {line}")
+
+
+if __name__ == '__main__':
+    main()
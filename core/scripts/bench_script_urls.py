@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+脚本块挖 URL 基准：new_llm_crawler._extract_urls_from_script_blocks 每页耗时（改动前 / 改动后）
+  - legacy: 原实现（每个 JSON 样脚本块都整块 json_repair.repair_json）
+  - current: 严格解析优先 + repair 大小上限 + 按内容哈希缓存（同一进程内第二轮起命中缓存）
+并以 legacy 为基准校验每页得到的 URL 集合是否一致。
+
+语料：--corpus 目录下的 *.html / *.htm，或 --cache（原始 HTML 缓存）。
+
+用法（在 core 目录下）: python scripts/bench_script_urls.py (--corpus DIR | --cache) [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_repair  # noqa: E402
+from scrapers import new_llm_crawler  # noqa: E402
+from scrapers.html_parser import make_soup  # noqa: E402
+from scrapers.new_llm_crawler import SCRIPT_URL_RE, _canonicalize, _extract_urls_from_script_blocks  # noqa: E402
+
+
+def legacy(final_url, soup) -> set:
+    urls = set()
+    for js in soup.find_all("script"):
+        content = js.string or js.get_text("", strip=True) or ""
+        if not content or len(content) < 5:
+            continue
+        if ("__INITIAL_STATE__" in content or "__NEXT_DATA__" in content
+                or content.lstrip().startswith("{") or content.lstrip().startswith("[")):
+            try:
+                start = min([i for i in (content.find("{"), content.find("[")) if i != -1], default=-1)
+                if start >= 0:
+                    data = json_repair.repair_json(content[start:], return_objects=True)
+
+                    def walk(x):
+                        if isinstance(x, dict):
+                            for v in x.values():
+                                walk(v)
+                        elif isinstance(x, list):
+                            for v in x:
+                                walk(v)
+                        elif isinstance(x, str):
+                            s = x.strip()
+                            if s.startswith(("http://", "https://", "/")) and len(s) > 6:
+                                urls.add(_canonicalize(urljoin(final_url, s)))
+                    walk(data)
+            except Exception:
+                pass
+        for m in SCRIPT_URL_RE.finditer(content):
+            s = m.group("u").strip()
+            if s.startswith(("http://", "https://", "/")) and len(s) > 6:
+                urls.add(_canonicalize(urljoin(final_url, s)))
+    return urls
+
+
+def load_pages(args):
+    pages = []
+    if args.cache:
+        from scrapers.html_cache import get_html_cache
+        cache = get_html_cache()
+        if cache is not None:
+            pages = [(url, raw) for url, ct, raw in cache.iter_pages(args.limit)]
+    else:
+        for name in sorted(os.listdir(args.corpus)):
+            if name.lower().endswith(('.html', '.htm')):
+                with open(os.path.join(args.corpus, name), 'rb') as f:
+                    pages.append((f"https://www.example.gov.cn/columns/abc/{name}", f.read()))
+    return [(url, make_soup(raw.decode('utf-8', errors='replace'), None)) for url, raw in pages]
+
+
+def bench(pages, run, repeat):
+    best = float('inf')
+    outputs = []
+    for _ in range(repeat):
+        outputs = []
+        start = time.perf_counter()
+        for url, soup in pages:
+            outputs.append(run(url, soup))
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / len(pages), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default='')
+    parser.add_argument('--cache', action='store_true')
+    parser.add_argument('--limit', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    if not args.corpus and not args.cache:
+        parser.error('--corpus or --cache is required')
+
+    pages = load_pages(args)
+    if not pages:
+        print("no pages")
+        return
+    print(f"{len(pages)} pages, {sum(len(s.find_all('script')) for _, s in pages)} script blocks")
+
+    legacy_ms, baseline = bench(pages, legacy, args.repeat)
+    # 第一轮：缓存为空（每个脚本块第一次出现）
+    new_llm_crawler._script_url_cache.clear()
+    cold_ms, cold = bench(pages, _extract_urls_from_script_blocks, 1)
+    warm_ms, warm = bench(pages, _extract_urls_from_script_blocks, args.repeat)
+
+    print(f"{'implementation':>16} {'ms/page':>9} {'speedup':>8} {'same urls':>10}")
+    for label, ms, outputs in (('legacy', legacy_ms, baseline), ('current-cold', cold_ms, cold),
+                               ('current-warm', warm_ms, warm)):
+        same = sum(a == b for a, b in zip(outputs, baseline))
+        print(f"{label:>16} {ms:>9.2f} {legacy_ms / ms:>7.1f}x {same:>5}/{len(pages):<4}")
+    print(f"script blocks: {new_llm_crawler.script_stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+相似度引擎基准：在 1k / 10k / 100k 条存量 insight 上比较
+  - legacy: 原 compare_phrase_with_list（每次调用对目标与全部短语重新分词，逐条比较）
+  - scan:   预分词后逐条比较（只去掉重复分词的开销）
+  - index:  SimilarityIndex 倒排 + 前缀过滤（精确）
+  - lsh:    SimilarityIndex MinHash/LSH（近似，报告召回率）
+并校验 index 与逐条比较的结果完全一致。
+
+用法（在 core 目录下）: python scripts/bench_similarity.py [--sizes 1000 10000 100000] [--queries 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jieba  # noqa: E402
+from utils.similarity import SimilarityIndex, overlap_ratio  # noqa: E402
+
+THRESHOLD = 0.65
+
+
+def legacy_compare(target_phrase, phrase_list, threshold):
+    target_tokens = set(jieba.lcut(target_phrase))
+    tokenized_phrases = {phrase: set(jieba.lcut(phrase)) for phrase in phrase_list}
+    return [phrase for phrase, tokens in tokenized_phrases.items()
+            if len(target_tokens & tokens) / min(len(target_tokens), len(tokens)) > threshold]
+
+
+def make_corpus(size: int, rnd: random.Random):
+    jieba.initialize()
+    words = [w for w, f in jieba.dt.FREQ.items() if f > 50 and 1 < len(w) <= 4]
+    rnd.shuffle(words)
+    words = words[:20000]
+    places = ['北京', '上海', '河北', '石家庄', '广州', '深圳', '天津', '雄安']
+    corpus = []
+    for _ in range(size):
+        body = ''.join(rnd.choice(words) for _ in range(rnd.randint(8, 20)))
+        corpus.append(f"{rnd.randint(2023, 2025)}年{rnd.randint(1, 12)}月，{rnd.choice(places)}{body}。")
+    return corpus
+
+
+def make_queries(corpus, n: int, rnd: random.Random):
+    queries = []
+    for i in range(n):
+        base = rnd.choice(corpus)
+        if i % 2:
+            # 近似重复：截掉尾部再补一点文字
+            queries.append(base[:int(len(base) * 0.8)] + '等相关工作')
+        else:
+            queries.append(make_corpus(1, rnd)[0])
+    return queries
+
+
+def bench(size: int, n_queries: int, legacy_limit: int):
+    rnd = random.Random(size)
+    corpus = make_corpus(size, rnd)
+    queries = make_queries(corpus, n_queries, rnd)
+    print(f"\n== {size} stored insights, {n_queries} queries ==")
+
+    t = time.perf_counter()
+    index = SimilarityIndex()
+    for i, text in enumerate(corpus):
+        index.add(i, text)
+    print(f"build index:            {time.perf_counter() - t:8.2f}s")
+
+    t = time.perf_counter()
+    lsh = SimilarityIndex(use_lsh=True)
+    for i, text in enumerate(corpus):
+        lsh.add(i, tokens=index.tokens_of(i))
+    print(f"build lsh index:        {time.perf_counter() - t:8.2f}s")
+
+    token_list = [index.tokens_of(i) for i in range(size)]
+    query_tokens = [index.tokens(q) for q in queries]
+
+    if size <= legacy_limit:
+        q = queries[:max(1, min(n_queries, 200000 // size))]
+        t = time.perf_counter()
+        for query in q:
+            legacy_compare(query, corpus, THRESHOLD)
+        print(f"legacy  per query:      {(time.perf_counter() - t) / len(q) * 1000:8.2f}ms  ({len(q)} queries)")
+
+    t = time.perf_counter()
+    expected = []
+    for qt in query_tokens:
+        expected.append([i for i, tokens in enumerate(token_list) if overlap_ratio(qt, tokens) > THRESHOLD])
+    print(f"scan    per query:      {(time.perf_counter() - t) / n_queries * 1000:8.2f}ms")
+
+    t = time.perf_counter()
+    got = [index.query(tokens=qt, threshold=THRESHOLD) for qt in query_tokens]
+    print(f"index   per query:      {(time.perf_counter() - t) / n_queries * 1000:8.2f}ms")
+    assert got == expected, "index results differ from exhaustive comparison"
+
+    t = time.perf_counter()
+    approx = [lsh.query(tokens=qt, threshold=THRESHOLD, approximate=True) for qt in query_tokens]
+    elapsed = time.perf_counter() - t
+    total = sum(len(e) for e in expected)
+    found = sum(len(set(a) & set(e)) for a, e in zip(approx, expected))
+    recall = found / total if total else 1.0
+    print(f"lsh     per query:      {elapsed / n_queries * 1000:8.2f}ms  (recall {recall:.2%})")
+    print(f"matches: {total}, results identical: {got == expected}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--legacy-limit', type=int, default=100000,
+                        help='skip the legacy function above this corpus size')
+    args = parser.parse_args()
+    jieba.setLogLevel(60)
+    for size in args.sizes:
+        bench(size, args.queries, args.legacy_limit)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+查看 / 重放抓取死信（多次重试仍失败的 URL，见 scrapers/retry_queue.py）。
+
+用法（在 core 目录下，需已加载 .env）:
+  python scripts/dead_letters.py list [--limit 100]
+  python scripts/dead_letters.py replay [--limit 100]   # 按失败时记录的 category / within_days 重新走 pipeline
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.retry_queue import get_dead_letter_store  # noqa: E402
+
+
+def _fmt(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def list_dead_letters(limit: int) -> None:
+    store = get_dead_letter_store()
+    print(f"{len(store)} dead letters")
+    for item in store.list(limit):
+        print(f"{_fmt(item['last_failed'])}  attempts={item['attempts']:<3} {item['url']}  "
+              f"({item['reason']}; first failed {_fmt(item['first_failed'])}; context {item['context']})")
+
+
+async def replay(limit: int) -> None:
+    from insights import pipeline, logger
+    from scrapers.http_client import close_http_client
+
+    items = get_dead_letter_store().pop(limit)
+    print(f"replaying {len(items)} dead letters")
+    try:
+        for item in items:
+            context = item['context']
+            kwargs = {'category': context.get('category') or ""}
+            if context.get('within_days'):
+                kwargs['within_days'] = int(context['within_days'])
+            # 再次失败会按正常流程重试，最终仍失败则重新写入死信表
+            await pipeline(item['url'], **kwargs)
+    finally:
+        await close_http_client(logger)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('action', choices=['list', 'replay'])
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+    if args.action == 'list':
+        list_dead_letters(args.limit)
+    else:
+        asyncio.run(replay(args.limit))
+
+
+if __name__ == '__main__':
+    main()
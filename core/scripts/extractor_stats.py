@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+查看按域名记录的正文抽取阶段统计（见 scrapers/extractor_stats.py），以及该域名上的抽取顺序。
+
+用法（在 core 目录下，需已加载 .env）:
+  python scripts/extractor_stats.py www.hebei.gov.cn
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.extractor_stats import FIELDS, get_extractor_stats  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('domain')
+    args = parser.parse_args()
+
+    store = get_extractor_stats()
+    stages = store.domain_stats(args.domain)
+    if not stages:
+        print(f"no extraction recorded for {args.domain}")
+        return
+    print(f"{'stage':>6} {'runs':>6} {'success':>8} " + " ".join(f"{f:>12}" for f in FIELDS) + f" {'avg ms':>8}")
+    for stage, row in stages.items():
+        print(f"{stage:>6} {row['attempts']:>6} {row['success_rate']:>8.0%} "
+              + " ".join(f"{row[f]:>12}" for f in FIELDS) + f" {row['avg_ms']:>8.1f}")
+    # 不含探索：只看统计本身给出的顺序与跳过
+    store.explore = 0
+    url = f"https://{args.domain}/"
+    print(f"order: {' -> '.join(store.order(url, ('meta', 'gne', 'rules')) + ['llm'])}")
+    print(f"general_crawler skips gne: {store.skip(url, 'gne')}")
+
+
+if __name__ == '__main__':
+    main()
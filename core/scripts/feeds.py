@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+查看 / 重新发现站点的 RSS、Atom 与 sitemap（见 scrapers/feed_discovery.py）。
+
+用法（在 core 目录下，需已加载 .env）:
+  python scripts/feeds.py show https://www.example.gov.cn/news/index.html
+  python scripts/feeds.py discover https://www.example.gov.cn/news/index.html   # 忽略缓存重新发现
+  python scripts/feeds.py poll https://www.example.gov.cn/news/index.html [--within-days 30]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.feed_discovery import get_feed_discovery  # noqa: E402
+from scrapers.http_client import close_http_client  # noqa: E402
+
+logger = logging.getLogger('feeds')
+
+
+def show(site: str) -> None:
+    cached = get_feed_discovery().store.get_site(site)
+    if cached is None:
+        print(f"{site} has not been discovered yet")
+        return
+    feeds, discovered_at = cached
+    print(f"discovered at {datetime.fromtimestamp(discovered_at):%Y-%m-%d %H:%M}, {len(feeds)} feeds")
+    for feed in feeds:
+        entries = get_feed_discovery().store.entries(feed['url'])
+        print(f"{feed['tier']:>8} {feed['kind']:>12} {len(entries):>6} entries  {feed['url']}")
+
+
+async def run(cmd: str, site: str, within_days: int) -> None:
+    discovery = get_feed_discovery()
+    try:
+        if cmd == 'discover':
+            await discovery.discover(site, logger)
+            show(site)
+        else:
+            urls = await discovery.poll(site, logger, within_days or None)
+            if urls is None:
+                print("no usable feed, the pipeline parses the list page")
+            else:
+                print(f"{len(urls)} new urls")
+                for url in urls:
+                    print(url)
+    finally:
+        await close_http_client()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    for name in ('show', 'discover', 'poll'):
+        p = sub.add_parser(name)
+        p.add_argument('site')
+        if name == 'poll':
+            p.add_argument('--within-days', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.cmd == 'show':
+        show(args.site)
+    else:
+        asyncio.run(run(args.cmd, args.site, getattr(args, 'within_days', 0)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+原始 HTML 缓存（见 scrapers/html_cache.py，需 HTML_CACHE_MAX_MB > 0）的查看与离线重新抽取。
+
+用法（在 core 目录下，需已加载 .env）:
+  python scripts/html_cache.py stats
+  python scripts/html_cache.py reextract URL [URL ...] [--category C] [--within-days N]
+      # 以 pipeline(from_cache=True) 重跑抽取：只读缓存，不发网络请求，已入库的文章不重复写入
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.html_cache import get_html_cache  # noqa: E402
+
+
+def stats() -> None:
+    cache = get_html_cache()
+    if cache is None:
+        print("html cache is disabled, set HTML_CACHE_MAX_MB")
+        return
+    summary = cache.summary()
+    ratio = summary['stored_bytes'] / summary['raw_bytes'] if summary['raw_bytes'] else 0
+    print(f"{summary['pages']} pages, {summary['blobs']} distinct bodies, "
+          f"{summary['raw_bytes'] / 1048576:.1f} MB raw -> {summary['stored_bytes'] / 1048576:.1f} MB stored "
+          f"({ratio:.0%}), limit {summary['max_bytes'] / 1048576:.0f} MB")
+
+
+async def reextract(urls, category: str, within_days: int) -> None:
+    from insights import pipeline, logger
+    from scrapers.parse_pool import close_parse_pool
+
+    try:
+        for url in urls:
+            kwargs = {'category': category, 'from_cache': True}
+            if within_days:
+                kwargs['within_days'] = within_days
+            await pipeline(url, **kwargs)
+    finally:
+        close_parse_pool(logger)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('stats')
+    p_re = sub.add_parser('reextract')
+    p_re.add_argument('urls', nargs='+')
+    p_re.add_argument('--category', default='')
+    p_re.add_argument('--within-days', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.cmd == 'stats':
+        stats()
+    else:
+        asyncio.run(reextract(args.urls, args.category, args.within_days))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+查看按域名学到的 URL 模板（见 scrapers/url_patterns.py），以及某个 URL 会被如何路由。
+
+用法（在 core 目录下，需已加载 .env）:
+  python scripts/url_patterns.py show www.hebei.gov.cn
+  python scripts/url_patterns.py check https://www.hebei.gov.cn/columns/.../202505/30/xxx.html
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.url_patterns import get_url_pattern_store, url_template  # noqa: E402
+
+
+def show(domain: str) -> None:
+    store = get_url_pattern_store()
+    templates = store.templates(domain)
+    print(f"{len(templates)} templates for {domain}")
+    print(f"{'detail':>6} {'list':>6} {'junk':>6}  template")
+    for template, counts in templates.items():
+        print(f"{counts['detail']:>6} {counts['list']:>6} {counts['junk']:>6}  {template}")
+
+
+def check(url: str) -> None:
+    store = get_url_pattern_store()
+    print(f"template: {url_template(url)}")
+    print(f"predict:  {store.predict(url)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_show = sub.add_parser('show')
+    p_show.add_argument('domain')
+    p_check = sub.add_parser('check')
+    p_check.add_argument('url')
+    args = parser.parse_args()
+
+    if args.cmd == 'show':
+        show(args.domain)
+    else:
+        check(args.url)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,43 +1,57 @@
 import asyncio
-from insights import pipeline, pb, logger
+import os
+from utils.scheduler import SiteScheduler
+from utils.tokenizer import init_tokenizer
+from scrapers.http_client import close_http_client
+from scrapers.parse_pool import close_parse_pool
 from pathlib import Path
 from dotenv import load_dotenv
 
 # 找到上层目录（例如上一级或两级，按实际调整）
-ROOT = Path(__file__).resolve().parents[2]  
+ROOT = Path(__file__).resolve().parents[2]
 load_dotenv(ROOT / ".env", override=True)
 
-counter = 1
+# 全局同时运行的站点数上限
+max_concurrent_sites = int(os.environ.get('MAX_CONCURRENT_SITES', 8))
+# 多久重新读取一次 sites 配置（秒）
+sites_refresh_seconds = int(os.environ.get('SITES_REFRESH_SECONDS', 300))
 
 
-async def process_site(site, counter):
-    if not site['per_hours'] or not site['url']:
-        return
-    if counter % site['per_hours'] == 0:
-        logger.info(f"applying {site['url']}")
+async def schedule_pipeline(pipeline, pb, logger):
+    async def process_site(site):
         await pipeline(
             site['url'].rstrip('/'),
             category=(site.get('category') or ""),
-            within_days=int(site.get('within_days') or 30)
+            within_days=int(site.get('within_days') or 30),
+            deep_crawl=bool(site.get('deep_crawl')),
+            # 只有配置的栏目入口才做 feed 发现 / 轮询
+            poll_feeds=True
         )
 
-
-
-async def schedule_pipeline(interval):
-    global counter
-    while True:
-        sites = pb.read('sites', filter='activated=True')
-        logger.info(f'task execute loop {counter}')
-        await asyncio.gather(*[process_site(site, counter) for site in sites])
-
-        counter += 1
-        logger.info(f'task execute loop finished, work after {interval} seconds')
-        await asyncio.sleep(interval)
+    scheduler = SiteScheduler(
+        load_sites=lambda: pb.read('sites', filter='activated=True'),
+        run_site=process_site,
+        logger=logger,
+        max_concurrency=max_concurrent_sites,
+        refresh_interval=sites_refresh_seconds,
+    )
+    await scheduler.run_forever()
 
 
 async def main():
-    interval_hours = 1
-    interval_seconds = interval_hours * 60 * 60
-    await schedule_pipeline(interval_seconds)
-
-asyncio.run(main())
+    # insights 在导入时登录 PocketBase、同步 URL 索引、添加日志文件；解析进程池以 spawn 启动的子进程
+    # 会重新导入本模块，所以只在这里导入，子进程不做这些初始化
+    from insights import pipeline, pb, logger
+
+    # 启动时预热分词词典，避免第一篇文章承担加载耗时
+    init_tokenizer(logger=logger)
+    try:
+        await schedule_pipeline(pipeline, pb, logger)
+    finally:
+        await close_http_client(logger)
+        close_parse_pool(logger)
+
+# 解析进程池以 spawn 方式启动子进程，子进程会重新导入本模块（作为 __mp_main__），
+# 因此模块顶层不能有副作用，入口必须放在 __main__ 保护下
+if __name__ == '__main__':
+    asyncio.run(main())
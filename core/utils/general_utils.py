@@ -1,7 +1,7 @@
 from urllib.parse import urlparse
 import os
 import re
-import jieba
+from .similarity import SimilarityIndex
 
 
 def isURL(string):
@@ -92,6 +92,14 @@ def get_logger_level() -> str:
     return level_map.get(level, 'info')
 
 
+def get_project_path(file_name: str) -> str:
+    """Path of a state file under PROJECT_DIR (created if missing)."""
+    project_dir = os.environ.get("PROJECT_DIR", "")
+    if project_dir:
+        os.makedirs(project_dir, exist_ok=True)
+    return os.path.join(project_dir, file_name)
+
+
 def compare_phrase_with_list(target_phrase, phrase_list, threshold):
     """
     Compare the similarity of a target phrase to each phrase in the phrase list.
@@ -104,11 +112,9 @@ def compare_phrase_with_list(target_phrase, phrase_list, threshold):
     if not target_phrase:
         return []  # The target phrase is empty, and the empty list is returned directly.
 
-    # Preprocessing: Segmentation of the target phrase and each phrase in the phrase list
-    target_tokens = set(jieba.lcut(target_phrase))
-    tokenized_phrases = {phrase: set(jieba.lcut(phrase)) for phrase in phrase_list}
-
-    similar_phrases = [phrase for phrase, tokens in tokenized_phrases.items()
-                       if len(target_tokens & tokens) / min(len(target_tokens), len(tokens)) > threshold]
-
-    return similar_phrases
+    # Build a throwaway index: the inverted index only scores phrases sharing enough tokens with the target,
+    # and results are identical to comparing against every phrase.
+    index = SimilarityIndex()
+    for phrase in phrase_list:
+        index.add(phrase, phrase)
+    return index.query(target_phrase, threshold)
@@ -1,7 +1,7 @@
 import os
 from pocketbase import PocketBase  # Client also works the same
 from pocketbase.client import FileUpload
-from typing import BinaryIO, Optional, List, Dict
+from typing import BinaryIO, Optional, List, Dict, Iterator
 import requests
 
 
@@ -64,6 +64,31 @@ class PbTalker:
                 results.append(attributes)
         return results
 
+    def read_iter(self, collection_name: str, fields: Optional[List[str]] = None, filter: str = '',
+                  sort: str = '', per_page: int = 500) -> Iterator[Dict]:
+        """
+        逐页读取，不受 read() 的 9 页上限约束；适合全量同步大集合。
+        某一页读取失败即停止（避免在错误状态下无限翻页）。
+        """
+        page = 1
+        while True:
+            try:
+                res = self.client.collection(collection_name).get_list(page, per_page,
+                                                                       {"filter": filter,
+                                                                        "fields": ','.join(fields) if fields else '',
+                                                                        "sort": sort,
+                                                                        "skiptotal": True})
+            except Exception as e:
+                self.logger.error(f"pocketbase get list failed: {e}")
+                return
+            if not res.items:
+                return
+            for _res in res.items:
+                yield vars(_res)
+            if len(res.items) < per_page:
+                return
+            page += 1
+
     def add(self, collection_name: str, body: Dict) -> str:
         try:
             res = self.client.collection(collection_name).create(body)
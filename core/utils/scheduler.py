@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# 按站点截止时间调度：最小堆维护每个站点的下次到期时间，
+# 到期即启动（受全局并发上限约束），慢站点不再拖住整轮循环。
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class SiteScheduler:
+    """
+    基于截止时间（deadline）的站点调度器。
+
+    - 每个站点独立维护 next_due（单调时钟），按 per_hours 周期推进；
+    - 到期站点在全局并发上限内立即启动，不等待其它站点完成；
+    - 计划时间以“上一次计划时间 + 周期”推进，不会因为单次运行耗时而累积漂移；
+      若已落后超过一个周期（例如刚跑完一个 40 分钟的站点），则从当前时间重新对齐；
+    - 同一站点上一次未结束时不会重复启动；
+    - stats 中记录每个站点最近一次的计划/实际启动时间与延迟。
+
+    load_sites: 返回站点列表的同步函数（通常是 pb.read('sites', filter='activated=True')）
+    run_site:   执行单个站点的协程函数
+    """
+
+    def __init__(self,
+                 load_sites: Callable[[], List[Dict]],
+                 run_site: Callable[[Dict], Awaitable[None]],
+                 logger,
+                 *,
+                 max_concurrency: int = 8,
+                 refresh_interval: float = 300):
+        self.load_sites = load_sites
+        self.run_site = run_site
+        self.logger = logger
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.refresh_interval = refresh_interval
+
+        self._heap: List[tuple] = []          # (next_due, seq, site_key)
+        self._seq = 0
+        self._due: Dict[str, float] = {}      # site_key -> 当前有效的 next_due（堆中其余条目视为过期）
+        self._sites: Dict[str, Dict] = {}     # site_key -> site record
+        self._periods: Dict[str, float] = {}  # site_key -> 周期（秒）
+        self._planned: Dict[str, float] = {}  # site_key -> 最近一次启动的计划时间
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _site_key(site: Dict) -> str:
+        return site.get('id') or site['url']
+
+    def _push(self, key: str, due: float) -> None:
+        self._seq += 1
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, self._seq, key))
+
+    def refresh_sites(self) -> None:
+        """重新读取站点配置：新增站点立即到期，已停用站点移出调度，周期变化即时生效。"""
+        try:
+            sites = self.load_sites()
+        except Exception as e:
+            self.logger.error(f"load sites failed: {e}")
+            return
+
+        now = time.monotonic()
+        latest = {}
+        for site in sites:
+            if not site.get('per_hours') or not site.get('url'):
+                continue
+            latest[self._site_key(site)] = site
+
+        for key in list(self._sites):
+            if key not in latest:
+                self.logger.info(f"site removed from schedule: {self._sites[key]['url']}")
+                del self._sites[key]
+                self._periods.pop(key, None)
+                self._planned.pop(key, None)
+                self._due.pop(key, None)
+
+        for key, site in latest.items():
+            period = float(site['per_hours']) * 3600
+            if key not in self._sites:
+                self.logger.info(f"site added to schedule: {site['url']} (every {site['per_hours']}h)")
+                self._push(key, now)
+            elif period != self._periods[key]:
+                self.logger.info(f"site period changed: {site['url']} (every {site['per_hours']}h)")
+                # 已排好的下一次按新周期重算：周期缩短时不必等完按旧周期排定的那次；运行中的站点结束时按新周期排入
+                if key in self._due and key not in self._running and key in self._planned:
+                    due = min(self._due[key], self._planned[key] + period)
+                    if due != self._due[key]:
+                        self._push(key, due)
+            self._sites[key] = site
+            self._periods[key] = period
+
+    def _start(self, key: str, planned: float) -> None:
+        site = self._sites[key]
+        actual = time.monotonic()
+        lag = actual - planned
+        record = self.stats.setdefault(key, {'url': site['url'], 'runs': 0, 'max_lag': 0.0})
+        record['runs'] += 1
+        record['planned_start'] = time.time() - lag
+        record['actual_start'] = time.time()
+        record['lag'] = lag
+        record['max_lag'] = max(record['max_lag'], lag)
+        self.logger.info(f"applying {site['url']} (planned lag {lag:.1f}s, running {len(self._running) + 1}/{self.max_concurrency})")
+
+        self._planned[key] = planned
+        task = asyncio.create_task(self._run(key, site, planned))
+        self._running[key] = task
+
+    async def _run(self, key: str, site: Dict, planned: float) -> None:
+        started = time.monotonic()
+        try:
+            await self.run_site(site)
+        except Exception as e:
+            self.logger.error(f"site {site['url']} failed: {e}")
+        finally:
+            elapsed = time.monotonic() - started
+            self._running.pop(key, None)
+            if key in self.stats:
+                self.stats[key]['last_duration'] = elapsed
+            self.logger.info(f"site {site['url']} finished in {elapsed:.1f}s")
+            if key in self._sites:
+                period = self._periods[key]
+                next_due = planned + period
+                # 已经落后一个以上周期：从当前时间重新对齐，避免连续补跑
+                now = time.monotonic()
+                if next_due < now:
+                    next_due = now
+                self._push(key, next_due)
+            if self._wakeup:
+                self._wakeup.set()
+
+    async def run_forever(self) -> None:
+        self._wakeup = asyncio.Event()
+        self.refresh_sites()
+        next_refresh = time.monotonic() + self.refresh_interval
+
+        while True:
+            now = time.monotonic()
+            if now >= next_refresh:
+                self.refresh_sites()
+                next_refresh = now + self.refresh_interval
+
+            # 启动所有已到期、且未在运行的站点（受并发上限约束）
+            while self._heap and self._heap[0][0] <= now and len(self._running) < self.max_concurrency:
+                due, _, key = heapq.heappop(self._heap)
+                # 已被移除/过期条目；或仍在运行（结束时会自行排入下一次）
+                if key not in self._sites or self._due.get(key) != due or key in self._running:
+                    continue
+                self._start(key, due)
+
+            # 计算下一次需要醒来的时间
+            if self._heap and len(self._running) < self.max_concurrency:
+                timeout = max(0.0, self._heap[0][0] - time.monotonic())
+            else:
+                timeout = self.refresh_interval
+            timeout = min(timeout, max(0.0, next_refresh - time.monotonic()))
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# 短文本相似度引擎：缓存分词结果 + 倒排索引（token -> 长度分桶 -> key）
+#
+# 判定与 compare_phrase_with_list 完全一致：|A∩B| / min(|A|,|B|) > threshold
+#
+# 精确模式下用前缀过滤裁剪候选：若 B 满足条件，则 |A∩B| >= α = floor(t*min(|A|,|B|)) + 1，
+# 因此 B 必然包含 A 中文档频率最低的 |A|-α+1 个 token 之一。α 只与 |B| 有关，
+# 所以倒排表按 |B| 分桶，高频 token（“的”“年”之类）只需要看很短的那几个桶。
+# 候选再用缓存的 token 集合精确打分，结果与逐条比较相同。
+#
+# 另提供 MinHash/LSH 分桶的近似模式（approximate=True），适合超大规模的粗筛。
+import hashlib
+import math
+import random
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from .tokenizer import tokenize
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'big')
+
+
+def overlap_ratio(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / min(len(a), len(b))
+
+
+class SimilarityIndex:
+    """
+    key -> token 集合的相似度索引。
+
+    tokenizer: 文本 -> token 集合，默认使用带 LRU 缓存的 utils.tokenizer.tokenize
+    use_lsh: 是否维护 MinHash 签名（近似模式所需，会增加 add 的开销）
+    num_perm / bands: MinHash 签名长度与 LSH 分段数
+    """
+
+    def __init__(self, tokenizer: Optional[Callable[[str], Iterable[str]]] = None,
+                 *, use_lsh: bool = False, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        self.tokenizer = tokenizer or tokenize
+        self._tokens: Dict[Hashable, frozenset] = {}
+        self._postings: Dict[str, Dict[int, Set[Hashable]]] = defaultdict(lambda: defaultdict(set))
+        self._df: Dict[str, int] = defaultdict(int)
+        self._order: Dict[Hashable, int] = {}
+        self._seq = 0
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = max(1, num_perm // bands)
+        rnd = random.Random(seed)
+        self._perms = [(rnd.randint(1, _MERSENNE_PRIME - 1), rnd.randint(0, _MERSENNE_PRIME - 1))
+                       for _ in range(num_perm)]
+        self._signatures: Optional[Dict[Hashable, tuple]] = {} if use_lsh else None
+        self._lsh: List[Dict[tuple, Set[Hashable]]] = [defaultdict(set) for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tokens
+
+    def tokens(self, text: str) -> frozenset:
+        return frozenset(self.tokenizer(text))
+
+    def tokens_of(self, key: Hashable) -> frozenset:
+        return self._tokens[key]
+
+    # ---------- 维护 ----------
+    def add(self, key: Hashable, text: str = None, *, tokens: Iterable[str] = None) -> None:
+        if key in self._tokens:
+            self.remove(key)
+        token_set = frozenset(tokens) if tokens is not None else self.tokens(text or '')
+        if not token_set:
+            return  # 空文本永远不会命中（原实现会除零）
+        self._tokens[key] = token_set
+        self._seq += 1
+        self._order[key] = self._seq
+        size = len(token_set)
+        for tok in token_set:
+            self._postings[tok][size].add(key)
+            self._df[tok] += 1
+        if self._signatures is not None:
+            sig = self._minhash(token_set)
+            self._signatures[key] = sig
+            for band, bucket in zip(range(self.bands), self._band_keys(sig)):
+                self._lsh[band][bucket].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        token_set = self._tokens.pop(key, None)
+        if token_set is None:
+            return
+        self._order.pop(key, None)
+        size = len(token_set)
+        for tok in token_set:
+            buckets = self._postings[tok]
+            buckets[size].discard(key)
+            if not buckets[size]:
+                del buckets[size]
+            if not buckets:
+                del self._postings[tok]
+            self._df[tok] -= 1
+            if self._df[tok] <= 0:
+                del self._df[tok]
+        sig = self._signatures.pop(key, None) if self._signatures is not None else None
+        if sig is not None:
+            for band, bucket in zip(range(self.bands), self._band_keys(sig)):
+                members = self._lsh[band].get(bucket)
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del self._lsh[band][bucket]
+
+    # ---------- 查询 ----------
+    def query(self, text: str = None, threshold: float = 0.65, *, tokens: Iterable[str] = None,
+              approximate: bool = False) -> List[Hashable]:
+        """
+        返回满足 |A∩B| / min(|A|,|B|) > threshold 的 key（按加入顺序）。
+        approximate=True 时改用 MinHash/LSH 取候选，可能漏掉少量结果。
+        """
+        target = frozenset(tokens) if tokens is not None else self.tokens(text or '')
+        if not target or not self._tokens:
+            return []
+        if threshold < 0:
+            candidates = set(self._tokens)
+        elif approximate:
+            if self._signatures is None:
+                raise ValueError('approximate query requires SimilarityIndex(use_lsh=True)')
+            candidates = self._lsh_candidates(target)
+        else:
+            candidates = self._prefix_candidates(target, threshold)
+
+        hits = [key for key in candidates if overlap_ratio(target, self._tokens[key]) > threshold]
+        hits.sort(key=self._order.__getitem__)
+        return hits
+
+    def _prefix_candidates(self, target: frozenset, threshold: float) -> Set[Hashable]:
+        a = len(target)
+        # 按文档频率升序：索引中不存在的 token（频率 0）排在最前，越稀有越靠前
+        ordered = sorted((tok for tok in target if tok in self._postings), key=self._df.__getitem__)
+        offset = a - len(ordered)
+        candidates: Set[Hashable] = set()
+        for i, tok in enumerate(ordered, start=offset):
+            for size, keys in self._postings[tok].items():
+                # 对长度为 size 的 B，只需检查 A 的前 a - floor(t*min(a,size)) 个 token
+                # （减去极小量，避免浮点误差把前缀算短）
+                if i < a - math.floor(threshold * min(a, size) - 1e-9):
+                    candidates |= keys
+        return candidates
+
+    def _minhash(self, token_set: frozenset) -> tuple:
+        hashes = [_token_hash(tok) for tok in token_set]
+        return tuple(min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in self._perms)
+
+    def _band_keys(self, sig: tuple):
+        for band in range(self.bands):
+            yield sig[band * self.rows:(band + 1) * self.rows]
+
+    def _lsh_candidates(self, target: frozenset) -> Set[Hashable]:
+        sig = self._minhash(target)
+        candidates: Set[Hashable] = set()
+        for band, bucket in zip(range(self.bands), self._band_keys(sig)):
+            candidates |= self._lsh[band].get(bucket, set())
+        return candidates
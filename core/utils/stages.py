@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# 分阶段流水线：每个阶段一个 asyncio.Queue + 若干 worker。
+# 阶段之间用有界队列衔接（put 阻塞即背压），各阶段统计吞吐与队列深度。
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+
+class Stage:
+    """
+    流水线中的一个阶段。
+
+    handler: async def handler(item) -> None；由 handler 自己决定是否把结果 put 到下游阶段
+    workers: 并发 worker 数
+    maxsize: 输入队列上限（0 为不限；有自环回写的阶段应使用不限长队列，避免自锁）
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[None]], logger,
+                 *, workers: int = 1, maxsize: int = 0):
+        self.name = name
+        self.handler = handler
+        self.logger = logger
+        self.workers = max(1, int(workers))
+        self.maxsize = maxsize
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self._tasks: List[asyncio.Task] = []
+        self._started_at: Optional[float] = None
+        # 延迟投递（put_later）中尚未入队的任务
+        self._deferred: Set[asyncio.Task] = set()
+        self._deferred_done = asyncio.Event()
+
+    async def put(self, item: Any) -> None:
+        await self.queue.put(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def put_nowait(self, item: Any) -> None:
+        self.queue.put_nowait(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def put_later(self, item: Any, delay: float) -> None:
+        """delay 秒后再投递到本阶段；等待期间不占用 worker，join() 会等待其投递完成。"""
+        async def _delayed():
+            await asyncio.sleep(delay)
+            self.put_nowait(item)
+            self._deferred.discard(task)
+            self._deferred_done.set()
+
+        task = asyncio.create_task(_delayed())
+        self._deferred.add(task)
+
+    async def join(self) -> None:
+        """等待队列清空，且没有待投递的延迟任务。"""
+        while True:
+            await self.queue.join()
+            if not self._deferred:
+                return
+            self._deferred_done.clear()
+            await self._deferred_done.wait()
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self.queue.get()
+            start = time.monotonic()
+            try:
+                await self.handler(item)
+            except Exception as e:
+                self.failed += 1
+                self.logger.error(f"stage {self.name} failed on {str(item)[:120]}: {e}")
+            finally:
+                self.busy_seconds += time.monotonic() - start
+                self.processed += 1
+                self.queue.task_done()
+
+    def start(self) -> None:
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        tasks = self._tasks + list(self._deferred)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._deferred.clear()
+
+    def report(self) -> str:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        limit = self.maxsize if self.maxsize else '∞'
+        deferred = f", deferred {len(self._deferred)}" if self._deferred else ''
+        return (f"{self.name}: processed {self.processed} (failed {self.failed}), {rate:.2f}/s, "
+                f"busy {self.busy_seconds:.1f}s, queue {self.queue.qsize()}/{limit} (max {self.max_depth}{deferred}), "
+                f"workers {self.workers}")
+
+
+async def run_stages(stages: List[Stage], logger, *, report_interval: float = 60, label: str = '') -> None:
+    """
+    启动所有阶段，按上游到下游的顺序依次等待队列清空后关闭。
+    调用前应已经向第一个阶段投递了初始任务。
+    """
+    for stage in stages:
+        stage.start()
+
+    async def _reporter():
+        while True:
+            await asyncio.sleep(report_interval)
+            for stage in stages:
+                logger.info(f"[{label}] {stage.report()}")
+
+    reporter = asyncio.create_task(_reporter())
+    try:
+        # 上游全部完成后下游不会再有新任务，因此按顺序 join 即可
+        for stage in stages:
+            await stage.join()
+    finally:
+        reporter.cancel()
+        for stage in stages:
+            await stage.stop()
+        for stage in stages:
+            logger.info(f"[{label}] {stage.report()}")
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# jieba 分词的统一入口：
+# - init_tokenizer() 在服务启动时预加载前缀词典（可指定持久化的缓存文件），不再让第一篇文章承担加载耗时
+# - tokenize() 带 LRU 缓存，同一字符串只分词一次，compare_phrase_with_list / SimilarityIndex 共用
+import os
+import time
+from functools import lru_cache
+
+import jieba
+
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 65536))
+
+
+def _default_cache_file() -> str:
+    cache_file = os.environ.get('JIEBA_CACHE_FILE', '')
+    if cache_file:
+        return os.path.abspath(cache_file)
+    project_dir = os.environ.get('PROJECT_DIR', '')
+    if project_dir:
+        return os.path.abspath(os.path.join(project_dir, 'jieba.cache'))
+    return ''  # 使用 jieba 默认位置（系统临时目录）
+
+
+def init_tokenizer(cache_file: str = '', logger=None) -> float:
+    """
+    预加载 jieba 前缀词典。cache_file 为序列化缓存文件路径（默认 JIEBA_CACHE_FILE 或 PROJECT_DIR/jieba.cache），
+    文件存在则直接加载，不存在则构建后写入，供下次启动使用。返回耗时（秒）。
+    """
+    start = time.perf_counter()
+    cache_file = cache_file or _default_cache_file()
+    if cache_file and not jieba.dt.initialized:
+        jieba.dt.cache_file = cache_file
+    jieba.initialize()
+    elapsed = time.perf_counter() - start
+    if logger:
+        logger.info(f"jieba initialized in {elapsed:.2f}s (cache: {cache_file or 'default'})")
+    return elapsed
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def tokenize(text: str) -> frozenset:
+    """分词结果（token 集合）；按字符串缓存，调用方不应修改返回值。"""
+    return frozenset(jieba.lcut(text))
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# 已入库文章的 URL 索引：内存 Bloom filter + 磁盘 SQLite（64 位 URL 哈希）。
+# - 成员判断 O(1)：Bloom 判否即返回；判是再查 SQLite 主键确认（无误判）
+# - 常驻内存只有 Bloom 的位数组（约 10 bit/URL），百万级 URL 也只占 1~2 MB
+# - 启动时从 PocketBase 按 created 水位增量同步，不再受 PbTalker.read 的 9 页上限影响
+import hashlib
+import math
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+
+
+def url_hash(url: str) -> int:
+    """URL 的 64 位有符号哈希（SQLite INTEGER 主键可直接存储）。"""
+    digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class BloomFilter:
+    """基于 64 位哈希的双重哈希 Bloom filter。"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1024)
+        self.capacity = capacity
+        self.num_bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2)) + 1
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h: int):
+        h &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, h: int) -> None:
+        for pos in self._positions(h):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, h: int) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(h))
+
+
+class UrlIndex:
+    """
+    持久化的 URL 集合，接口与原来的 set 保持一致（in / add / update）。
+    线程安全：文章入库后在线程里 add（每次写入都 commit，不要在事件循环上调用），
+    SQLite 连接、Bloom 位数组与计数都由同一把锁保护。
+
+    path: SQLite 文件路径（建议放在 PROJECT_DIR 下）
+    """
+
+    def __init__(self, path: str, logger=None, error_rate: float = 0.01):
+        self.path = path
+        self.logger = logger
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS urls (h INTEGER PRIMARY KEY)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.commit()
+        self._size = self.conn.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+        self._rebuild_bloom(self._size * 2)
+
+    def _rebuild_bloom(self, capacity: int) -> None:
+        self.bloom = BloomFilter(capacity, self.error_rate)
+        for (h,) in self.conn.execute('SELECT h FROM urls'):
+            self.bloom.add(h)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, url: str) -> bool:
+        if not url:
+            return False
+        h = url_hash(url)
+        with self._lock:
+            if h not in self.bloom:
+                return False
+            return self.conn.execute('SELECT 1 FROM urls WHERE h=?', (h,)).fetchone() is not None
+
+    def _insert(self, hashes: list) -> None:
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany('INSERT OR IGNORE INTO urls (h) VALUES (?)', [(h,) for h in hashes])
+            self.conn.commit()
+            self._size += self.conn.total_changes - before
+            if self._size > self.bloom.capacity:
+                # 超出设计容量时误判率上升，按两倍容量重建
+                self._rebuild_bloom(self._size * 2)
+            else:
+                for h in hashes:
+                    self.bloom.add(h)
+
+    def add(self, url: str) -> None:
+        if url:
+            self._insert([url_hash(url)])
+
+    def update(self, urls: Iterable[str]) -> None:
+        hashes = [url_hash(u) for u in urls if u]
+        if hashes:
+            self._insert(hashes)
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute('SELECT value FROM meta WHERE key=?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+            self.conn.commit()
+
+    def sync_from_pb(self, pb, collection_name: str = 'articles', batch: int = 5000) -> int:
+        """
+        从 PocketBase 增量同步 URL：只读取 created 不早于上次水位的记录。
+        返回本次读到的记录数。
+        """
+        watermark = self._get_meta(f'{collection_name}_synced')
+        _filter = f"created>='{watermark}'" if watermark else ''
+        total = 0
+        pending = []
+        latest = watermark or ''
+        for record in pb.read_iter(collection_name, fields=['url', 'created'], filter=_filter, sort='created'):
+            total += 1
+            if record.get('url'):
+                pending.append(url_hash(record['url']))
+            created = record.get('created')
+            if isinstance(created, datetime):
+                created = created.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] + 'Z'
+            if created and str(created) > latest:
+                latest = str(created)
+            if len(pending) >= batch:
+                self._insert(pending)
+                pending = []
+        if pending:
+            self._insert(pending)
+        if latest and latest != watermark:
+            self._set_meta(f'{collection_name}_synced', latest)
+        if self.logger:
+            self.logger.info(f"url index synced {total} records from {collection_name}, {self._size} urls indexed")
+        return total
@@ -1,6 +1,20 @@
 from urllib.parse import urlparse
 import os
 import re
+from bs4 import BeautifulSoup
+
+try:
+    import chardet
+except Exception:
+    chardet = None
+
+try:
+    import lxml  # noqa: F401
+    _SOUP_BACKENDS = ['lxml', 'html.parser']
+except Exception:
+    _SOUP_BACKENDS = ['html.parser']
+if os.environ.get('HTML_PARSER', 'auto').strip().lower() == 'html.parser':
+    _SOUP_BACKENDS = ['html.parser']
 
 
 def isURL(string):
@@ -48,6 +62,68 @@ def extract_and_convert_dates(input_string):
     return None
 
 
+def make_soup(text: str) -> BeautifulSoup:
+    """BeautifulSoup with lxml when available, falling back to html.parser (same as core/scrapers/html_parser.py)"""
+    for backend in _SOUP_BACKENDS[:-1]:
+        try:
+            soup = BeautifulSoup(text, backend)
+            if soup.find() is not None or '<' not in text:
+                return soup
+        except Exception:
+            pass
+    return BeautifulSoup(text, _SOUP_BACKENDS[-1])
+
+
+# 与 core/scrapers/decoder.py 相同的解码顺序：声明 → utf-8 → 域名记忆 → 有限前缀探测 → 常见中文编码
+_DETECT_SAMPLE_BYTES = 64 * 1024
+_HEADER_CHARSET_RE = re.compile(r"charset=['\"]?([^\s;'\"]+)", re.I)
+_META_CHARSET_RE = re.compile(br"<meta[^>]+charset=['\"]?\s*([a-zA-Z0-9_\-]+)", re.I)
+_domain_charsets = {}
+
+
+def _normalize_encoding(enc):
+    if not enc:
+        return None
+    e = enc.strip().strip('\'"').lower()
+    if e in {"utf8", "utf-8", "utf_8"}:
+        return "utf-8"
+    if e in {"gbk", "gb2312", "gb-2312", "gb_2312-80", "gb-18030", "gb18030"}:
+        return "gb18030"
+    return e
+
+
+def decode_html(raw: bytes, content_type: str = '', url: str = '') -> str:
+    """页面字节解码；只对前 64KB 做 chardet 探测，并按域名记住成功使用的编码"""
+    if not raw:
+        return ""
+    domain = urlparse(str(url)).netloc.lower()
+    header = _HEADER_CHARSET_RE.search(content_type or '')
+    meta = _META_CHARSET_RE.search(raw[:8192])
+    candidates = [
+        lambda: _normalize_encoding(header.group(1)) if header else None,
+        lambda: _normalize_encoding(meta.group(1).decode("ascii", "ignore")) if meta else None,
+        lambda: "utf-8",
+        lambda: _domain_charsets.get(domain),
+        lambda: _normalize_encoding(chardet.detect(raw[:_DETECT_SAMPLE_BYTES]).get('encoding')) if chardet else None,
+        lambda: "gb18030",
+        lambda: "big5",
+    ]
+    tried = set()
+    for get_enc in candidates:
+        enc = get_enc()
+        if not enc or enc in tried:
+            continue
+        tried.add(enc)
+        try:
+            text = raw.decode(enc)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        if domain:
+            _domain_charsets[domain] = enc
+        return text
+    return raw.decode("utf-8", errors="replace")
+
+
 def get_logger_level() -> str:
     level_map = {
         'silly': 'CRITICAL',
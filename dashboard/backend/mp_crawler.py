@@ -1,7 +1,7 @@
 import httpx
-from bs4 import BeautifulSoup
 from datetime import datetime
 import re
+from general_utils import make_soup, decode_html
 
 
 header = {
@@ -22,11 +22,12 @@ def mp_crawler(url: str, logger) -> (int, dict):
         logger.warning(f"cannot get content from {url}\n{e}")
         return -7, {}
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    text = decode_html(response.content, response.headers.get('Content-Type', ''), url)
+    soup = make_soup(text)
 
     # Get the original release date first
     pattern = r"var createTime = '(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}'"
-    match = re.search(pattern, response.text)
+    match = re.search(pattern, text)
 
     if match:
         date_only = match.group(1)
@@ -1,10 +1,8 @@
 from gne import GeneralNewsExtractor
 import httpx
-from bs4 import BeautifulSoup
 from datetime import datetime
 from pathlib import Path
-from general_utils import extract_and_convert_dates
-import chardet
+from general_utils import extract_and_convert_dates, make_soup, decode_html
 
 
 extractor = GeneralNewsExtractor()
@@ -19,9 +17,7 @@ def simple_crawler(url: str | Path, logger) -> (int, dict):
     try:
         with httpx.Client() as client:
             response = client.get(url, headers=header, timeout=30)
-            rawdata = response.content
-            encoding = chardet.detect(rawdata)['encoding']
-            text = rawdata.decode(encoding)
+            text = decode_html(response.content, response.headers.get('Content-Type', ''), url)
         result = extractor.extract(text)
     except Exception as e:
         logger.warning(f"cannot get content from {url}\n{e}")
@@ -46,7 +42,7 @@ def simple_crawler(url: str | Path, logger) -> (int, dict):
     else:
         result['publish_time'] = datetime.strftime(datetime.today(), "%Y%m%d")
 
-    soup = BeautifulSoup(text, "html.parser")
+    soup = make_soup(text)
     try:
         meta_description = soup.find("meta", {"name": "description"})
         if meta_description: